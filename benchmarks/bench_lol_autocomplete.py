@@ -0,0 +1,141 @@
+"""Benchmark autocomplete tướng/item của cog LoL (cogs/lol_integration.py).
+
+Gọi thẳng champion_autocomplete/item_autocomplete của cog (kể cả tạo Choice)
+với mọi tiền tố của mọi tên tướng/item như khi người dùng gõ từng phím, cộng
+tên tiếng Việt và tên gõ sai. Dữ liệu lấy từ snapshot Data Dragon trên đĩa
+(data/ddragon), không có thì tải về thư mục tạm; --synthetic (hoặc khi không có
+mạng) dùng bộ dữ liệu giả cùng kích thước.
+
+    python benchmarks/bench_lol_autocomplete.py
+    python benchmarks/bench_lol_autocomplete.py --synthetic --target-ms 1
+"""
+import argparse
+import asyncio
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cogs.lol_integration import LeagueOfLegends  # noqa: E402
+from utils.ddragon import DataDragonSnapshot, DataDragonStore  # noqa: E402
+from utils.http_client import http_client  # noqa: E402
+
+CHAMPIONS = 170
+ITEMS = 650
+
+
+def synthetic_snapshot(aliases: dict, seed: int = 1) -> DataDragonSnapshot:
+    rng = random.Random(seed)
+
+    def word(low, high):
+        return ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(low, high))).capitalize()
+
+    champions = {}
+    while len(champions) < CHAMPIONS:
+        name = word(3, 8) if rng.random() < 0.8 else f"{word(2, 5)}'{word(2, 5)}"
+        champ_id = name.replace("'", "")
+        champions[champ_id] = {'id': champ_id, 'name': name, 'key': str(len(champions) + 1)}
+
+    # Tên item thật có trong bảng tiếng Việt, phần còn lại là tên giả nhiều từ
+    names = list(aliases)
+    while len(names) < ITEMS:
+        names.append(' '.join(word(3, 9) for _ in range(rng.randint(1, 4))))
+    items = {str(1000 + i): {'name': name} for i, name in enumerate(names)}
+    return DataDragonSnapshot('synthetic', champions, items)
+
+
+async def load_snapshot(synthetic: bool, aliases: dict):
+    if not synthetic:
+        store = DataDragonStore()
+        await store.load()
+        if store.snapshot:
+            return store.snapshot, f"Data Dragon {store.snapshot.version} (data/ddragon)"
+        with tempfile.TemporaryDirectory() as tmp:
+            store = DataDragonStore(data_dir=tmp)
+            try:
+                await store.refresh()
+            except Exception as e:
+                print(f"# download failed ({e}), using synthetic data")
+            finally:
+                await http_client.close()
+            if store.snapshot:
+                return store.snapshot, f"Data Dragon {store.snapshot.version} (downloaded)"
+            print("# Data Dragon not available, using synthetic data")
+    return synthetic_snapshot(aliases), f"synthetic ({CHAMPIONS} champions, {ITEMS} items)"
+
+
+def keystrokes(names, typos: int, rng) -> list:
+    """Mọi tiền tố của mọi tên (kể cả chuỗi rỗng) và một số tên gõ sai"""
+    queries = ['']
+    for name in names:
+        queries.extend(name[:length] for length in range(1, len(name) + 1))
+    for _ in range(typos):
+        name = rng.choice(names)
+        if len(name) > 3:
+            position = rng.randrange(1, len(name) - 1)
+            queries.append(name[:position] + name[position + 1] + name[position] + name[position + 2:])
+    return queries
+
+
+async def measure(callback, queries) -> list:
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        await callback(None, query)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return samples
+
+
+async def run(args):
+    cog = LeagueOfLegends(SimpleNamespace(config={}))
+    snapshot, source = await load_snapshot(args.synthetic, cog.items_vietnamese)
+    cog.ddragon.snapshot = snapshot
+
+    started = time.perf_counter()
+    cog.champion_index()
+    cog.item_index()
+    print(f"data      : {source}")
+    print(f"build     : {(time.perf_counter() - started) * 1000:.1f} ms (một lần mỗi patch)")
+
+    rng = random.Random(2)
+    champion_names = [champ['name'] for champ in snapshot.champions.values()]
+    item_names = [item.get('name', '') for item in snapshot.items.values()]
+    item_names += list(cog.items_vietnamese.values())
+
+    cases = (
+        ('champion', cog.champion_autocomplete, keystrokes(champion_names, 500, rng)),
+        ('item', cog.item_autocomplete, keystrokes(item_names, 2000, rng)),
+    )
+    failed = False
+    for name, callback, queries in cases:
+        samples = await measure(callback, queries)
+        count = len(samples)
+        p50 = samples[count // 2] * 1000
+        p99 = samples[min(count - 1, int(count * 0.99))] * 1000
+        worst = samples[-1] * 1000
+        verdict = 'OK' if p99 < args.target_ms else 'OVER TARGET'
+        failed |= p99 >= args.target_ms
+        print(f"{name:<9} : {count} queries  p50 {p50:.3f} ms  p99 {p99:.3f} ms  max {worst:.3f} ms  "
+              f"[{verdict}, target p99 < {args.target_ms} ms]")
+
+    await cog.ddragon.close()
+    cog.parse_executor.shutdown(wait=False)
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--synthetic', action='store_true', help='Không đọc/tải Data Dragon, dùng dữ liệu giả')
+    parser.add_argument('--target-ms', type=float, default=1.0)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""Benchmark parse HTML OP.GG: thời gian parse và thời gian chặn event loop, trước/sau.
+
+So sánh ba cách chạy parse_opgg_champion_page (cogs/lol_integration.py):
+  before   html.parser ngay trên event loop (như code cũ, từ response.text())
+  lxml     lxml nhưng vẫn trên event loop
+  after    lxml trong thread pool parse_executor của cog (code hiện tại)
+Trong lúc parse có một task nhịp 5 ms chạy song song; độ trễ của nhịp đó là
+thời gian event loop bị chặn (gateway của mọi guild cũng trễ đúng như vậy).
+
+Fixture nằm trong benchmarks/fixtures/opgg/*.html.gz:
+    python benchmarks/bench_opgg_parse.py
+    python benchmarks/bench_opgg_parse.py --concurrency 4 --rounds 3
+    python benchmarks/bench_opgg_parse.py --generate          # tạo lại fixture mô phỏng
+    python benchmarks/bench_opgg_parse.py --save ahri yasuo   # lưu trang OP.GG thật (cần mạng)
+"""
+import argparse
+import asyncio
+import glob
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import cogs.lol_integration as lol  # noqa: E402
+
+FIXTURE_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures', 'opgg')
+HEARTBEAT = 0.005
+
+
+# ===== FIXTURE =====
+
+def generate_page(champion: str, seed: int) -> bytes:
+    """Trang mô phỏng cấu trúc/kích thước trang tướng OP.GG (Next.js: JSON nhúng lớn + nhiều div lồng nhau)"""
+    rng = random.Random(seed)
+    names = ['Ahri', 'Yasuo', 'Zed', 'Lux', 'Jinx', 'Thresh', 'Garen', 'Darius', 'Akali', 'Yone',
+             'Katarina', 'Syndra', 'Orianna', 'Viktor', 'Sylas', 'LeBlanc', 'Fizz', 'Talon']
+    next_data = {
+        'props': {'pageProps': {'data': {
+            'champion': champion,
+            'builds': [{'items': [rng.randrange(1000, 8000) for _ in range(6)],
+                        'runes': [rng.randrange(8000, 9000) for _ in range(9)],
+                        'win_rate': rng.random(), 'play': rng.randrange(10**5)} for _ in range(1200)],
+            'matchups': [{'champion': rng.choice(names), 'win_rate': rng.random(),
+                          'play': rng.randrange(10**4)} for _ in range(400)],
+        }}}
+    }
+    head = ''.join(f'<link rel="preload" href="/_next/static/chunks/{rng.randrange(10**9):x}.js" as="script"/>'
+                   for _ in range(80))
+    rows = []
+    for i in range(1500):
+        cells = ''.join(
+            f'<td class="css-{rng.randrange(10**6):x}"><div class="item"><img src="/items/{rng.randrange(1000, 8000)}.png" '
+            f'alt="item" width="24" height="24"/><span>{rng.random() * 100:.2f}%</span></div></td>'
+            for _ in range(4)
+        )
+        rows.append(f'<tr class="build-row">{cells}</tr>')
+    strong = ''.join(
+        f'<li class="champion-matchup-list__item--strong"><img src="/c/{n}.png"/>'
+        f'<span class="champion-name">{n}</span><span class="rate">{rng.random() * 100:.1f}%</span></li>'
+        for n in rng.sample(names, 8)
+    )
+    weak = ''.join(
+        f'<li class="champion-matchup-list__item--weak"><img src="/c/{n}.png"/>'
+        f'<span class="champion-name">{n}</span><span class="rate">{rng.random() * 100:.1f}%</span></li>'
+        for n in rng.sample(names, 8)
+    )
+    page = (
+        f'<!DOCTYPE html><html lang="vi"><head><meta charset="utf-8"/><title>{champion} Build - OP.GG</title>{head}</head>'
+        f'<body><div id="__next"><header class="site-header"><nav>' + '<a href="#">menu</a>' * 60 + '</nav></header>'
+        f'<main><section class="champion-overview"><div class="champion-overview__tier">Tier {rng.randint(1, 5)}</div>'
+        f'<div class="champion-overview__data"><span class="win-rate">{rng.uniform(45, 55):.2f}%</span>'
+        f'<span class="pick-rate">{rng.uniform(1, 15):.2f}%</span><span class="ban-rate">{rng.uniform(0, 30):.2f}%</span></div>'
+        f'</section><div class="champion-position-stats__position"><span class="position-name">Mid</span></div>'
+        f'<div class="champion-position-stats__position"><span class="position-name">Top</span></div>'
+        f'<table class="builds"><tbody>{"".join(rows)}</tbody></table>'
+        f'<ul class="champion-matchup-list">{strong}{weak}</ul></main></div>'
+        f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script></body></html>'
+    )
+    return page.encode('utf-8')
+
+
+def write_fixture(name: str, html: bytes):
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    with gzip.open(os.path.join(FIXTURE_DIR, f'{name}.html.gz'), 'wb') as f:
+        f.write(html)
+    print(f"wrote {name}.html.gz ({len(html) // 1024} KB raw)")
+
+
+async def save_real_pages(champions):
+    from utils.http_client import http_client
+    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                             '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+    try:
+        for champion in champions:
+            async with http_client.get(f"https://op.gg/vi/lol/champions/{champion}", headers=headers) as resp:
+                resp.raise_for_status()
+                write_fixture(champion, await resp.read())
+    finally:
+        await http_client.close()
+
+
+def load_fixtures(directory: str):
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html.gz'))):
+        with gzip.open(path, 'rb') as f:
+            fixtures.append((os.path.basename(path)[:-len('.html.gz')], f.read()))
+    return fixtures
+
+
+# ===== ĐO =====
+
+async def heartbeat(lags: list, stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + HEARTBEAT
+        await asyncio.sleep(HEARTBEAT)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+def parse_with(parser: str, html):
+    lol.HTML_PARSER = parser
+    return lol.parse_opgg_champion_page(html)
+
+
+async def run_mode(mode: str, pages, executor) -> dict:
+    """Parse đồng thời các trang trong pages theo một cách, đo thời gian và độ trễ nhịp"""
+    loop = asyncio.get_running_loop()
+    durations = []
+
+    async def parse_one(html: bytes):
+        started = time.perf_counter()
+        if mode == 'before':
+            await asyncio.sleep(0)
+            parse_with('html.parser', html.decode('utf-8'))
+        elif mode == 'lxml':
+            await asyncio.sleep(0)
+            parse_with('lxml', html)
+        else:
+            await loop.run_in_executor(executor, parse_with, 'lxml', html)
+        durations.append(time.perf_counter() - started)
+
+    lags = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    await asyncio.sleep(HEARTBEAT * 2)
+    started = time.perf_counter()
+    await asyncio.gather(*(parse_one(html) for html in pages))
+    total = time.perf_counter() - started
+    stop.set()
+    await beat
+    return {'durations': durations, 'total': total, 'lags': lags}
+
+
+async def run(args):
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"No fixtures in {args.fixtures}; run with --generate or --save first")
+        return 1
+    print(f"parser    : lxml available = {lol.HTML_PARSER == 'lxml'}")
+    print(f"fixtures  : " + ', '.join(f"{name} ({len(html) // 1024} KB)" for name, html in fixtures))
+    print(f"load      : {args.concurrency} page(s) parsed concurrently, {args.rounds} round(s)\n")
+
+    # Kết quả parse phải giống nhau giữa hai parser
+    for name, html in fixtures:
+        before = parse_with('html.parser', html.decode('utf-8'))
+        after = parse_with('lxml', html)
+        before.pop('last_updated')
+        after.pop('last_updated')
+        if before != after:
+            print(f"WARNING: parsers disagree on {name}: {before} != {after}")
+
+    cog = lol.LeagueOfLegends(SimpleNamespace(config={'opgg_parse_workers': args.workers}))
+    try:
+        print(f"{'mode':<7} {'parse/page ms':>14} {'batch ms':>9} {'loop max blocked ms':>20} {'loop lag p99 ms':>16}")
+        for mode in ('before', 'lxml', 'after'):
+            per_page, batches, max_lag, p99_lag = [], [], [], []
+            for round_no in range(args.rounds):
+                pages = [fixtures[(round_no + i) % len(fixtures)][1] for i in range(args.concurrency)]
+                result = await run_mode(mode, pages, cog.parse_executor)
+                per_page.extend(result['durations'])
+                batches.append(result['total'])
+                lags = sorted(result['lags']) or [0.0]
+                max_lag.append(lags[-1])
+                p99_lag.append(lags[min(len(lags) - 1, int(len(lags) * 0.99))])
+            print(f"{mode:<7} {statistics.median(per_page) * 1000:>14.1f} {statistics.median(batches) * 1000:>9.1f} "
+                  f"{max(max_lag) * 1000:>20.1f} {max(p99_lag) * 1000:>16.1f}")
+    finally:
+        cog.parse_executor.shutdown(wait=True)
+        await cog.ddragon.close()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixtures', default=FIXTURE_DIR)
+    parser.add_argument('--concurrency', type=int, default=4, help='Số trang parse cùng lúc (lệnh đồng thời)')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=2, help='opgg_parse_workers')
+    parser.add_argument('--generate', action='store_true', help='Tạo lại fixture mô phỏng rồi thoát')
+    parser.add_argument('--save', nargs='+', metavar='CHAMPION', help='Lưu trang OP.GG thật làm fixture rồi thoát')
+    args = parser.parse_args()
+
+    if args.generate:
+        for seed, champion in enumerate(('ahri', 'yasuo', 'jinx')):
+            write_fixture(champion, generate_page(champion.capitalize(), seed))
+        return
+    if args.save:
+        asyncio.run(save_real_pages(args.save))
+        return
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Benchmark truy vấn reminder/todo của DatabaseManager theo kích thước bảng.
+
+Tạo DB tạm bằng chính migration của bot, đổ N dòng (phần lớn reminder đã xong
+chưa được archive - trường hợp xấu nhất) rồi đo các truy vấn nóng với index
+của migration 2 và khi bỏ các index đó (như schema cũ).
+
+    python benchmarks/bench_reminder_queries.py
+    python benchmarks/bench_reminder_queries.py --sizes 10000,100000,1000000 --repeat 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import DatabaseManager  # noqa: E402
+
+INDEXES = ('idx_reminders_pending', 'idx_reminders_user_pending', 'idx_todos_user_guild')
+USERS = 20000
+GUILDS = 5
+PENDING = 1000  # Reminder chưa xong, bất kể kích thước bảng
+
+
+def populate(path: str, rows: int, seed: int = 1):
+    """Đổ dữ liệu bằng sqlite3 (nhanh hơn nhiều so với đi qua _write)"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=OFF')
+
+    def reminders():
+        for i in range(rows):
+            pending = i < PENDING
+            remind_time = now + timedelta(minutes=rng.randint(-60, 600)) if pending \
+                else now - timedelta(days=rng.randint(1, 365))
+            yield (rng.randrange(USERS), rng.randrange(10**6), rng.randrange(GUILDS), 'x',
+                   str(remind_time), not pending)
+
+    def todos():
+        for _ in range(rows):
+            yield (rng.randrange(USERS), rng.randrange(GUILDS), 'task', rng.random() < 0.7)
+
+    conn.executemany(
+        'INSERT INTO reminders (user_id, channel_id, guild_id, message, remind_time, completed) '
+        'VALUES (?, ?, ?, ?, ?, ?)', reminders()
+    )
+    conn.executemany('INSERT INTO todos (user_id, guild_id, task, completed) VALUES (?, ?, ?, ?)', todos())
+    conn.commit()
+    conn.execute('ANALYZE')
+    conn.close()
+
+
+async def measure(path: str, repeat: int) -> dict:
+    db = DatabaseManager(path)
+    rng = random.Random(2)
+    queries = {
+        'get_pending_reminders': lambda: db.get_pending_reminders(),
+        'get_user_reminders': lambda: db.get_user_reminders(rng.randrange(USERS)),
+        'get_todos': lambda: db.get_todos(rng.randrange(USERS), rng.randrange(GUILDS)),
+    }
+    results = {}
+    try:
+        for name, query in queries.items():
+            await query()  # warm-up (mở connection, nạp trang vào cache)
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                await query()
+                samples.append(time.perf_counter() - started)
+            samples.sort()
+            results[name] = (statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.99))])
+    finally:
+        await db.close()
+    return results
+
+
+async def run(sizes, repeat: int, baseline: bool):
+    print(f"{'rows':>9}  {'mode':<9} {'query':<22} {'median ms':>10} {'p99 ms':>9}")
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.db')
+            manager = DatabaseManager(path)
+            await manager.initialize()
+            await manager.close()
+
+            started = time.perf_counter()
+            populate(path, rows)
+            print(f"# {rows} rows populated in {time.perf_counter() - started:.1f}s")
+
+            modes = [('indexed', None)]
+            if baseline:
+                modes.append(('no-index', INDEXES))
+            for mode, drop in modes:
+                if drop:
+                    conn = sqlite3.connect(path)
+                    for index in drop:
+                        conn.execute(f'DROP INDEX IF EXISTS {index}')
+                    conn.commit()
+                    conn.close()
+                for name, (median, p99) in (await measure(path, repeat)).items():
+                    print(f"{rows:>9}  {mode:<9} {name:<22} {median * 1000:>10.3f} {p99 * 1000:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='Số dòng mỗi bảng, cách nhau bởi dấu phẩy')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--no-baseline', action='store_true', help='Bỏ qua lượt đo không có index')
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    asyncio.run(run(sizes, args.repeat, not args.no_baseline))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""Benchmark bộ hẹn giờ reminder (cogs/scheduler.py) trên đồng hồ giả lập.
+
+Chạy cog Scheduler thật trên một event loop có thời gian ảo: khi loop rảnh,
+thời gian nhảy thẳng tới timer kế tiếp thay vì ngủ thật, nên 24 giờ với 100k
+reminder chạy trong vài giây. Đo độ trễ gửi so với remind_time, số truy vấn DB
+(để thấy không còn poll khi rảnh) và reminder thêm sau vẫn đánh thức vòng hẹn giờ.
+
+    python benchmarks/bench_reminder_scheduler.py
+    python benchmarks/bench_reminder_scheduler.py --reminders 100000 --hours 24 --channels 5000
+"""
+import argparse
+import asyncio
+import os
+import random
+import selectors
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cogs.scheduler as scheduler_module  # noqa: E402
+from cogs.scheduler import Scheduler  # noqa: E402
+
+
+class InstantSelector(selectors.DefaultSelector):
+    """Không chờ thật: không có sự kiện I/O thì tua thời gian ảo của loop"""
+
+    def __init__(self, loop):
+        super().__init__()
+        self._clock_loop = loop
+
+    def select(self, timeout=None):
+        events = super().select(0)
+        if not events and timeout:
+            self._clock_loop.virtual_time += timeout
+        return events
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    def __init__(self):
+        self.virtual_time = 0.0
+        super().__init__(selector=InstantSelector(self))
+
+    def time(self):
+        return self.virtual_time
+
+
+class CountingDB:
+    """DatabaseManager giả: giữ reminder trong RAM và đếm từng loại truy vấn"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = Counter()
+
+    def add_reminder_listener(self, listener):
+        pass
+
+    def remove_reminder_listener(self, listener):
+        pass
+
+    async def get_all_pending_reminders(self):
+        self.calls['get_all_pending_reminders'] += 1
+        return list(self.rows)
+
+    async def complete_reminder(self, reminder_id):
+        self.calls['complete_reminder'] += 1
+
+    async def archive_reminders(self, retention_days=90):
+        self.calls['archive_reminders'] += 1
+        return 0
+
+
+class FakeChannel:
+    def __init__(self, channel_id, bench):
+        self.id = channel_id
+        self.bench = bench
+
+    async def send(self, embed=None):
+        self.bench.on_send(self.id, embed)
+        await asyncio.sleep(self.bench.send_latency)
+
+
+class Bench:
+    def __init__(self, args):
+        self.args = args
+        self.send_latency = args.send_latency
+        self.epoch = time.time()
+        self.loop = None
+        self.due = {}  # reminder_id -> remind timestamp
+        self.lateness = {}
+        self.by_message = {}
+
+    def now(self) -> float:
+        return self.epoch + self.loop.time()
+
+    def on_send(self, channel_id, embed):
+        reminder_id = self.by_message[embed.description]
+        self.lateness[reminder_id] = self.now() - self.due[reminder_id]
+
+    def make_row(self, reminder_id, offset, rng):
+        remind_ts = self.epoch + offset
+        self.due[reminder_id] = remind_ts
+        message = f"reminder {reminder_id}"
+        self.by_message[message] = reminder_id
+        return (reminder_id, rng.randrange(10**6), rng.randrange(self.args.channels), 1,
+                message, datetime.fromtimestamp(remind_ts))
+
+    async def run(self):
+        args = self.args
+        self.loop = asyncio.get_running_loop()
+        # Cog dùng time.time() cho hạn gửi: cho nó đọc cùng đồng hồ ảo
+        scheduler_module.time = SimpleNamespace(time=self.now)
+
+        rng = random.Random(1)
+        # Giờ đầu để trống để thấy reminder thêm sau vẫn đánh thức vòng hẹn giờ ngay
+        quiet = 3600
+        rows = [self.make_row(i, quiet + rng.uniform(0, args.hours * 3600 - quiet), rng)
+                for i in range(args.reminders)]
+        db = CountingDB(rows)
+
+        async def wait_until_ready():
+            pass
+
+        bot = SimpleNamespace(
+            config={'reminder_concurrency': args.concurrency},
+            db=db,
+            wait_until_ready=wait_until_ready,
+            get_channel=lambda channel_id: FakeChannel(channel_id, self),
+            get_user=lambda user_id: None,
+        )
+
+        started = time.perf_counter()
+        cog = Scheduler(bot)
+        await cog.cog_load()
+
+        # Reminder tạo lúc phút 10, đến hạn sau 5 giây (sớm hơn đầu heap gần 50 phút)
+        await asyncio.sleep(600)
+        late_id = args.reminders
+        cog.schedule_reminder(self.make_row(late_id, self.loop.time() + 5, rng))
+
+        await asyncio.sleep(args.hours * 3600 - self.loop.time() + 120)
+        await cog.cog_unload()
+        wall = time.perf_counter() - started
+
+        self.report(db, late_id, wall)
+
+    def report(self, db, late_id, wall):
+        lateness = sorted(value for key, value in self.lateness.items() if key != late_id)
+        delivered = len(lateness)
+
+        def pct(p):
+            return lateness[min(delivered - 1, int(delivered * p))] if delivered else float('nan')
+
+        print(f"reminders      : {self.args.reminders} over {self.args.hours} simulated hours, "
+              f"{self.args.channels} channels, concurrency {self.args.concurrency}, "
+              f"send latency {self.send_latency * 1000:.0f} ms")
+        print(f"delivered      : {delivered}/{self.args.reminders}")
+        print(f"lateness       : p50 {pct(0.5) * 1000:.1f} ms  p99 {pct(0.99) * 1000:.1f} ms  "
+              f"max {lateness[-1] * 1000 if lateness else float('nan'):.1f} ms")
+        late = self.lateness.get(late_id)
+        print(f"added later    : {'not delivered' if late is None else f'{late * 1000:.1f} ms late'}")
+        print(f"db calls       : {dict(db.calls)}")
+        print(f"wall time      : {wall:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reminders', type=int, default=100000)
+    parser.add_argument('--hours', type=float, default=24)
+    parser.add_argument('--channels', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--send-latency', type=float, default=0.05, help='Thời gian một lần gửi (giây ảo)')
+    args = parser.parse_args()
+
+    loop = VirtualClockLoop()
+    try:
+        loop.run_until_complete(Bench(args).run())
+    finally:
+        loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,11 @@ import asyncio
 import logging
 from dotenv import load_dotenv # type: ignore
 from utils.database import DatabaseManager
+from utils.extraction import extraction_scheduler
+from utils.search_cache import search_cache
+from utils.http_client import http_client
+from utils.message_dispatch import message_dispatcher
+from utils.channel_manager import channel_index
 
 # Load environment variables
 # Ưu tiên .env.local (cho development) rồi mới .env (template)
@@ -41,13 +46,40 @@ class GenZAssistant(commands.Bot):
         )
         
         # Initialize database
-        self.db = DatabaseManager(self.config['database_path'])
+        self.db = DatabaseManager(
+            self.config['database_path'],
+            group_commit=self.config.get('db_group_commit', True)
+        )
         
     async def setup_hook(self):
         """Setup hook called when bot is starting up"""
         # Initialize database
         await self.db.initialize()
         
+        # yt-dlp thread pool dùng chung (giới hạn số job mỗi server)
+        extraction_scheduler.configure(
+            workers=self.config.get('ytdl_workers', 4),
+            per_guild=self.config.get('ytdl_per_guild', 2)
+        )
+        search_cache.configure(ttl=self.config.get('search_cache_ttl', 6 * 3600))
+        
+        # HTTP session dùng chung (keep-alive, DNS cache, giới hạn kết nối mỗi host)
+        http_client.configure(
+            limit_per_host=self.config.get('http_limit_per_host', 10),
+            timeout=self.config.get('http_timeout', 15)
+        )
+        http_client.start()
+        self.http_client = http_client
+        # Listener tin nhắn của các cog đăng ký vào đây (xem on_message)
+        self.message_dispatcher = message_dispatcher
+        
+        # Chỉ mục tên kênh -> ID mỗi server, xóa khi kênh thay đổi
+        await channel_index.settings.load()
+        self.add_listener(channel_index.on_channel_create, 'on_guild_channel_create')
+        self.add_listener(channel_index.on_channel_delete, 'on_guild_channel_delete')
+        self.add_listener(channel_index.on_channel_update, 'on_guild_channel_update')
+        self.add_listener(channel_index.on_guild_remove, 'on_guild_remove')
+        
         # Load all cogs - Clean organized structure
         cogs_to_load = [
             # Core Music System
@@ -86,6 +118,16 @@ class GenZAssistant(commands.Bot):
             except Exception as e:
                 logger.error(f'Failed to load {cog}: {e}')
     
+    async def close(self):
+        """Giải phóng tài nguyên dùng chung khi tắt bot"""
+        # Gỡ cog trước (cog_unload còn cần DB/HTTP để ghi nốt dữ liệu)
+        await super().close()
+        extraction_scheduler.shutdown()
+        await search_cache.close()
+        await http_client.close()
+        await channel_index.settings.close()
+        await self.db.close()
+    
     async def on_ready(self):
         """Called when bot is ready"""
         logger.info(f'{self.user} has connected to Discord!')
@@ -107,6 +149,9 @@ class GenZAssistant(commands.Bot):
     
     async def on_message(self, message):
         """Process messages"""
+        # Listener của cog (analytics, menu, cleanup...) lọc và chạy tại một chỗ
+        message_dispatcher.dispatch(message)
+        
         if message.author.bot:
             return
         
@@ -3,7 +3,9 @@ from discord.ext import commands
 import asyncio
 import os
 from typing import Optional, Union
-from utils.channel_manager import ChannelManager
+from utils.channel_manager import ChannelManager, channel_index
+from utils.http_client import http_client
+from utils.message_dispatch import message_dispatcher
 
 class Admin(commands.Cog):
     """🛠️ Quản trị viên & Server Tools"""
@@ -337,7 +339,84 @@ class Admin(commands.Cog):
             embed.add_field(name="📝 Mô tả", value=guild.description, inline=False)
         
         embed.set_footer(text=f"Server ID: {guild.id}")
-        
+
+        await ctx.send(embed=embed)
+
+    @commands.command(name='httpstats', aliases=['netstats'])
+    @is_admin()
+    async def http_stats(self, ctx):
+        """Độ trễ và tỉ lệ lỗi HTTP theo từng host"""
+        stats = http_client.get_stats()
+
+        embed = discord.Embed(
+            title="🌐 HTTP Client Stats",
+            description=f"Giới hạn: {http_client.limit} kết nối • {http_client.limit_per_host}/host • timeout {http_client.timeout}s",
+            color=0x7289DA
+        )
+
+        if not stats:
+            embed.add_field(name="📭 Chưa có request", value="Chưa gọi API ngoài nào.", inline=False)
+
+        for host, host_stats in list(stats.items())[:10]:
+            embed.add_field(
+                name=host,
+                value=f"Requests: {host_stats['requests']} • Lỗi: {host_stats['errors']} ({host_stats['error_rate']:.1f}%)\n"
+                      f"Avg: {host_stats['avg'] * 1000:.0f}ms • p95: {host_stats['p95'] * 1000:.0f}ms • Max: {host_stats['max'] * 1000:.0f}ms",
+                inline=False
+            )
+
+        await ctx.send(embed=embed)
+
+    @commands.command(name='setchannel')
+    @is_admin()
+    async def set_channel(self, ctx, kind: str, *, name: str = None):
+        """Đặt tên kênh music/bot/welcome cho server (bỏ trống tên để về mặc định)"""
+        kind = kind.lower()
+        if kind not in ChannelManager.CHANNEL_CONFIG:
+            await ctx.send(f"❌ Loại kênh phải là: {', '.join(ChannelManager.CHANNEL_CONFIG)}")
+            return
+
+        # Cho phép truyền #mention
+        if name and ctx.message.channel_mentions:
+            name = ctx.message.channel_mentions[0].name
+        channel_index.set_channel_name(ctx.guild.id, kind, name)
+        current = channel_index.channel_name(ctx.guild.id, kind)
+        target = channel_index.get_channel(ctx.guild, current)
+
+        embed = discord.Embed(
+            title="✅ Đã cập nhật kênh",
+            description=f"Kênh **{kind}**: {target.mention if target else f'#{current}'}",
+            color=0x00ff00
+        )
+        if not target:
+            embed.add_field(name="⚠️ Lưu ý", value="Server chưa có kênh text nào mang tên này.", inline=False)
+        await ctx.send(embed=embed)
+
+    @commands.command(name='listenerstats', aliases=['msgstats'])
+    @is_admin()
+    async def listener_stats(self, ctx):
+        """Chi phí của từng listener on_message (qua message_dispatcher)"""
+        stats = message_dispatcher.get_stats()
+        messages = message_dispatcher.messages
+
+        embed = discord.Embed(
+            title="📨 Message Listener Stats",
+            description=f"Tin nhắn: {messages} • Lọc/khớp trigger: "
+                        f"{(message_dispatcher.scan_time / messages * 1e6) if messages else 0:.0f}µs/tin nhắn",
+            color=0x7289DA
+        )
+
+        if not stats:
+            embed.add_field(name="📭 Chưa có listener", value="Chưa cog nào đăng ký.", inline=False)
+
+        for name, listener_stats in stats.items():
+            embed.add_field(
+                name=name,
+                value=f"Gọi: {listener_stats['calls']} • Bỏ qua: {listener_stats['skipped']} • Lỗi: {listener_stats['errors']}\n"
+                      f"Tổng: {listener_stats['total'] * 1000:.0f}ms • Avg: {listener_stats['avg'] * 1000:.2f}ms • Max: {listener_stats['max'] * 1000:.0f}ms",
+                inline=False
+            )
+
         await ctx.send(embed=embed)
 
 async def setup(bot):
@@ -5,6 +5,7 @@ from discord.ext import commands
 from discord import app_commands
 import discord
 from utils.channel_manager import ChannelManager
+from utils.http_client import http_client
 
 
 class AICog(commands.Cog):
@@ -61,29 +62,28 @@ Trả lời:"""
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}?key={self.api_key}"
-                async with session.post(url, headers=headers, json=data) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        if 'candidates' in result and len(result['candidates']) > 0:
-                            candidate = result['candidates'][0]
-                            if 'content' in candidate and 'parts' in candidate['content']:
-                                return candidate['content']['parts'][0]['text']
-                            else:
-                                return "❌ AI từ chối trả lời do nội dung không phù hợp."
+            url = f"{self.base_url}?key={self.api_key}"
+            async with http_client.post(url, headers=headers, json=data, timeout=aiohttp.ClientTimeout(total=60)) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    if 'candidates' in result and len(result['candidates']) > 0:
+                        candidate = result['candidates'][0]
+                        if 'content' in candidate and 'parts' in candidate['content']:
+                            return candidate['content']['parts'][0]['text']
                         else:
-                            return "❌ Không nhận được phản hồi từ AI."
-                    elif response.status == 400:
-                        error_data = await response.json()
-                        print(f"Gemini API 400 Error: {error_data}")
-                        return "❌ Yêu cầu không hợp lệ. Vui lòng thử lại với nội dung khác."
-                    elif response.status == 403:
-                        return "❌ API key không hợp lệ hoặc đã hết quota."
+                            return "❌ AI từ chối trả lời do nội dung không phù hợp."
                     else:
-                        error_text = await response.text()
-                        print(f"Gemini API Error: {response.status} - {error_text}")
-                        return f"❌ Lỗi API: {response.status}"
+                        return "❌ Không nhận được phản hồi từ AI."
+                elif response.status == 400:
+                    error_data = await response.json()
+                    print(f"Gemini API 400 Error: {error_data}")
+                    return "❌ Yêu cầu không hợp lệ. Vui lòng thử lại với nội dung khác."
+                elif response.status == 403:
+                    return "❌ API key không hợp lệ hoặc đã hết quota."
+                else:
+                    error_text = await response.text()
+                    print(f"Gemini API Error: {response.status} - {error_text}")
+                    return f"❌ Lỗi API: {response.status}"
         except Exception as e:
             print(f"Gemini request error: {e}")
             return "❌ Có lỗi xảy ra khi kết nối với AI."
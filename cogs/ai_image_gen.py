@@ -7,6 +7,10 @@ import asyncio
 import io
 import base64
 from PIL import Image
+from utils.http_client import http_client
+
+# Tạo ảnh chậm hơn nhiều so với timeout mặc định của http_client
+IMAGE_TIMEOUT = aiohttp.ClientTimeout(total=120)
 
 class AIImageCog(commands.Cog):
     def __init__(self, bot):
@@ -33,25 +37,24 @@ class AIImageCog(commands.Cog):
         """Tạo ảnh với Pollinations AI"""
         url = f"https://image.pollinations.ai/prompt/{prompt}"
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    image_data = await response.read()
-                    
-                    # Tạo file từ image data
-                    file = discord.File(io.BytesIO(image_data), filename="generated_image.png")
-                    
-                    embed = discord.Embed(
-                        title="🎨 Ảnh AI được tạo",
-                        description=f"**Prompt:** {prompt}",
-                        color=discord.Color.purple()
-                    )
-                    embed.set_image(url="attachment://generated_image.png")
-                    embed.set_footer(text="Powered by Pollinations AI")
-                    
-                    await ctx.send(embed=embed, file=file)
-                else:
-                    raise Exception(f"HTTP {response.status}")
+        async with http_client.get(url, timeout=IMAGE_TIMEOUT) as response:
+            if response.status == 200:
+                image_data = await response.read()
+                
+                # Tạo file từ image data
+                file = discord.File(io.BytesIO(image_data), filename="generated_image.png")
+                
+                embed = discord.Embed(
+                    title="🎨 Ảnh AI được tạo",
+                    description=f"**Prompt:** {prompt}",
+                    color=discord.Color.purple()
+                )
+                embed.set_image(url="attachment://generated_image.png")
+                embed.set_footer(text="Powered by Pollinations AI")
+                
+                await ctx.send(embed=embed, file=file)
+            else:
+                raise Exception(f"HTTP {response.status}")
     
     async def _generate_with_craiyon(self, ctx, prompt):
         """Tạo ảnh với Craiyon (DALL-E mini)"""
@@ -61,30 +64,29 @@ class AIImageCog(commands.Cog):
             "prompt": prompt
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    images = data.get('images', [])
+        async with http_client.post(url, json=payload, timeout=IMAGE_TIMEOUT) as response:
+            if response.status == 200:
+                data = await response.json()
+                images = data.get('images', [])
+                
+                if images:
+                    # Lấy ảnh đầu tiên
+                    image_data = base64.b64decode(images[0])
+                    file = discord.File(io.BytesIO(image_data), filename="generated_image.png")
+                    
+                    embed = discord.Embed(
+                        title="🎨 Ảnh AI được tạo",
+                        description=f"**Prompt:** {prompt}",
+                        color=discord.Color.purple()
+                    )
+                    embed.set_image(url="attachment://generated_image.png")
+                    embed.set_footer(text="Powered by Craiyon AI")
                     
-                    if images:
-                        # Lấy ảnh đầu tiên
-                        image_data = base64.b64decode(images[0])
-                        file = discord.File(io.BytesIO(image_data), filename="generated_image.png")
-                        
-                        embed = discord.Embed(
-                            title="🎨 Ảnh AI được tạo",
-                            description=f"**Prompt:** {prompt}",
-                            color=discord.Color.purple()
-                        )
-                        embed.set_image(url="attachment://generated_image.png")
-                        embed.set_footer(text="Powered by Craiyon AI")
-                        
-                        await ctx.send(embed=embed, file=file)
-                    else:
-                        raise Exception("Không nhận được ảnh từ API")
+                    await ctx.send(embed=embed, file=file)
                 else:
-                    raise Exception(f"HTTP {response.status}")
+                    raise Exception("Không nhận được ảnh từ API")
+            else:
+                raise Exception(f"HTTP {response.status}")
     
     @commands.command(name="imagine")
     async def imagine_image(self, ctx, *, description):
@@ -104,11 +106,10 @@ class AIImageCog(commands.Cog):
                 try:
                     url = f"https://image.pollinations.ai/prompt/{prompt}"
                     
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(url) as response:
-                            if response.status == 200:
-                                image_data = await response.read()
-                                images.append((f"image_{i+1}.png", image_data))
+                    async with http_client.get(url, timeout=IMAGE_TIMEOUT) as response:
+                        if response.status == 200:
+                            image_data = await response.read()
+                            images.append((f"image_{i+1}.png", image_data))
                     
                     # Delay để tránh rate limit
                     await asyncio.sleep(1)
@@ -143,34 +144,33 @@ class AIImageCog(commands.Cog):
             
             url = f"https://image.pollinations.ai/prompt/{avatar_prompt}"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        image_data = await response.read()
-                        
-                        # Resize ảnh thành avatar size (256x256)
-                        image = Image.open(io.BytesIO(image_data))
-                        image = image.resize((256, 256), Image.Resampling.LANCZOS)
-                        
-                        # Save lại
-                        output = io.BytesIO()
-                        image.save(output, format='PNG')
-                        output.seek(0)
-                        
-                        file = discord.File(output, filename="avatar.png")
-                        
-                        embed = discord.Embed(
-                            title="👤 Avatar AI được tạo",
-                            description=f"**Mô tả:** {description}",
-                            color=discord.Color.gold()
-                        )
-                        embed.set_image(url="attachment://avatar.png")
-                        embed.set_footer(text="Avatar 256x256 • Powered by Pollinations AI")
-                        
-                        await ctx.send(embed=embed, file=file)
-                    else:
-                        await ctx.send("❌ Không thể tạo avatar!")
-                        
+            async with http_client.get(url, timeout=IMAGE_TIMEOUT) as response:
+                if response.status == 200:
+                    image_data = await response.read()
+                    
+                    # Resize ảnh thành avatar size (256x256)
+                    image = Image.open(io.BytesIO(image_data))
+                    image = image.resize((256, 256), Image.Resampling.LANCZOS)
+                    
+                    # Save lại
+                    output = io.BytesIO()
+                    image.save(output, format='PNG')
+                    output.seek(0)
+                    
+                    file = discord.File(output, filename="avatar.png")
+                    
+                    embed = discord.Embed(
+                        title="👤 Avatar AI được tạo",
+                        description=f"**Mô tả:** {description}",
+                        color=discord.Color.gold()
+                    )
+                    embed.set_image(url="attachment://avatar.png")
+                    embed.set_footer(text="Avatar 256x256 • Powered by Pollinations AI")
+                    
+                    await ctx.send(embed=embed, file=file)
+                else:
+                    await ctx.send("❌ Không thể tạo avatar!")
+                    
         except Exception as e:
             await ctx.send(f"❌ Lỗi khi tạo avatar: {str(e)}")
     
@@ -202,24 +202,23 @@ class AIImageCog(commands.Cog):
             
             url = f"https://image.pollinations.ai/prompt/{style_prompt}"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        image_data = await response.read()
-                        file = discord.File(io.BytesIO(image_data), filename=f"{style}_image.png")
-                        
-                        embed = discord.Embed(
-                            title=f"🎨 Ảnh AI - Style {style.title()}",
-                            description=f"**Mô tả:** {description}",
-                            color=discord.Color.purple()
-                        )
-                        embed.set_image(url=f"attachment://{style}_image.png")
-                        embed.set_footer(text=f"Style: {style.title()} • Powered by Pollinations AI")
-                        
-                        await ctx.send(embed=embed, file=file)
-                    else:
-                        await ctx.send("❌ Không thể tạo ảnh!")
-                        
+            async with http_client.get(url, timeout=IMAGE_TIMEOUT) as response:
+                if response.status == 200:
+                    image_data = await response.read()
+                    file = discord.File(io.BytesIO(image_data), filename=f"{style}_image.png")
+                    
+                    embed = discord.Embed(
+                        title=f"🎨 Ảnh AI - Style {style.title()}",
+                        description=f"**Mô tả:** {description}",
+                        color=discord.Color.purple()
+                    )
+                    embed.set_image(url=f"attachment://{style}_image.png")
+                    embed.set_footer(text=f"Style: {style.title()} • Powered by Pollinations AI")
+                    
+                    await ctx.send(embed=embed, file=file)
+                else:
+                    await ctx.send("❌ Không thể tạo ảnh!")
+                    
         except Exception as e:
             await ctx.send(f"❌ Lỗi khi tạo ảnh: {str(e)}")
     
@@ -234,25 +233,24 @@ class AIImageCog(commands.Cog):
             
             url = f"https://image.pollinations.ai/prompt/{enhanced_prompt}"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        image_data = await response.read()
-                        file = discord.File(io.BytesIO(image_data), filename="enhanced_image.png")
-                        
-                        embed = discord.Embed(
-                            title="✨ Ảnh AI với Prompt được cải thiện",
-                            color=discord.Color.gold()
-                        )
-                        embed.add_field(name="Prompt gốc", value=simple_prompt, inline=False)
-                        embed.add_field(name="Prompt cải thiện", value=enhanced_prompt[:1000] + "..." if len(enhanced_prompt) > 1000 else enhanced_prompt, inline=False)
-                        embed.set_image(url="attachment://enhanced_image.png")
-                        embed.set_footer(text="Enhanced Quality • Powered by Pollinations AI")
-                        
-                        await ctx.send(embed=embed, file=file)
-                    else:
-                        await ctx.send("❌ Không thể tạo ảnh!")
-                        
+            async with http_client.get(url, timeout=IMAGE_TIMEOUT) as response:
+                if response.status == 200:
+                    image_data = await response.read()
+                    file = discord.File(io.BytesIO(image_data), filename="enhanced_image.png")
+                    
+                    embed = discord.Embed(
+                        title="✨ Ảnh AI với Prompt được cải thiện",
+                        color=discord.Color.gold()
+                    )
+                    embed.add_field(name="Prompt gốc", value=simple_prompt, inline=False)
+                    embed.add_field(name="Prompt cải thiện", value=enhanced_prompt[:1000] + "..." if len(enhanced_prompt) > 1000 else enhanced_prompt, inline=False)
+                    embed.set_image(url="attachment://enhanced_image.png")
+                    embed.set_footer(text="Enhanced Quality • Powered by Pollinations AI")
+                    
+                    await ctx.send(embed=embed, file=file)
+                else:
+                    await ctx.send("❌ Không thể tạo ảnh!")
+                    
         except Exception as e:
             await ctx.send(f"❌ Lỗi khi tạo ảnh: {str(e)}")
     
@@ -268,24 +266,23 @@ class AIImageCog(commands.Cog):
             
             url = f"https://image.pollinations.ai/prompt/{prompt}"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        image_data = await response.read()
-                        file = discord.File(io.BytesIO(image_data), filename="generated_image.png")
-                        
-                        embed = discord.Embed(
-                            title="🎨 Ảnh AI được tạo",
-                            description=f"**Prompt:** {prompt}",
-                            color=discord.Color.purple()
-                        )
-                        embed.set_image(url="attachment://generated_image.png")
-                        embed.set_footer(text="Powered by Pollinations AI")
-                        
-                        await interaction.followup.send(embed=embed, file=file)
-                    else:
-                        await interaction.followup.send("❌ Không thể tạo ảnh!")
-                        
+            async with http_client.get(url, timeout=IMAGE_TIMEOUT) as response:
+                if response.status == 200:
+                    image_data = await response.read()
+                    file = discord.File(io.BytesIO(image_data), filename="generated_image.png")
+                    
+                    embed = discord.Embed(
+                        title="🎨 Ảnh AI được tạo",
+                        description=f"**Prompt:** {prompt}",
+                        color=discord.Color.purple()
+                    )
+                    embed.set_image(url="attachment://generated_image.png")
+                    embed.set_footer(text="Powered by Pollinations AI")
+                    
+                    await interaction.followup.send(embed=embed, file=file)
+                else:
+                    await interaction.followup.send("❌ Không thể tạo ảnh!")
+                    
         except Exception as e:
             await interaction.followup.send(f"❌ Lỗi khi tạo ảnh: {str(e)}")
     
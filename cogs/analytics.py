@@ -1,26 +1,113 @@
 import discord
-from discord.ext import commands
-from datetime import datetime, timedelta
+from discord.ext import commands, tasks
+from datetime import date, datetime, timedelta
+from collections import Counter
 import asyncio
+import heapq
+from utils.analytics_store import AnalyticsStore
+from utils.message_dispatch import message_dispatcher
+
+WEEKDAY_NAMES = ["T2", "T3", "T4", "T5", "T6", "T7", "CN"]
+HEATMAP_SHADES = " ░▒▓█"
+TREND_BAR_WIDTH = 20
+
+class DailyMessageCounters:
+    """Đếm tin nhắn theo guild -> ngày -> user (khóa số nguyên), tự bỏ các ngày cũ"""
+    __slots__ = ('retention_days', '_days', '_totals', '_today')
+    
+    def __init__(self, retention_days=7):
+        self.retention_days = retention_days
+        self._days = {}  # guild_id -> {day_ordinal: Counter(user_id -> count)}
+        self._totals = {}  # guild_id -> {day_ordinal: tổng tin nhắn}
+        self._today = date.today().toordinal()
+    
+    @staticmethod
+    def day_of(when=None):
+        return (when or date.today()).toordinal()
+    
+    def _rollover(self, today):
+        """Sang ngày mới: xóa các ngày quá retention_days (chạy một lần mỗi ngày)"""
+        self._today = today
+        oldest = today - self.retention_days + 1
+        for per_guild in (self._days, self._totals):
+            for guild_id in list(per_guild):
+                days = per_guild[guild_id]
+                for day in [d for d in days if d < oldest]:
+                    del days[day]
+                if not days:
+                    del per_guild[guild_id]
+    
+    def increment(self, guild_id, user_id, amount=1):
+        today = date.today().toordinal()
+        if today != self._today:
+            self._rollover(today)
+        self._days.setdefault(guild_id, {}).setdefault(today, Counter())[user_id] += amount
+        totals = self._totals.setdefault(guild_id, {})
+        totals[today] = totals.get(today, 0) + amount
+    
+    def user_count(self, guild_id, user_id, day=None):
+        day = day or date.today().toordinal()
+        return self._days.get(guild_id, {}).get(day, Counter()).get(user_id, 0)
+    
+    def guild_total(self, guild_id, day=None):
+        day = day or date.today().toordinal()
+        return self._totals.get(guild_id, {}).get(day, 0)
+    
+    def top_users(self, guild_id, k=10, day=None):
+        """k user nhắn nhiều nhất trong ngày (heap, không sort toàn bộ)"""
+        day = day or date.today().toordinal()
+        counts = self._days.get(guild_id, {}).get(day)
+        if not counts:
+            return []
+        return heapq.nlargest(k, counts.items(), key=lambda item: item[1])
+    
+    def clear(self, guild_id=None):
+        if guild_id is None:
+            self._days.clear()
+            self._totals.clear()
+        else:
+            self._days.pop(guild_id, None)
+            self._totals.pop(guild_id, None)
 
 class SimpleAnalyticsCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.message_cache = {}  # Simple in-memory cache
+        self.counters = DailyMessageCounters(bot.config.get('analytics_retention_days', 7))
+        # Lịch sử theo giờ trên SQLite; on_message chỉ đếm trong RAM, flush theo lô
+        self.store = AnalyticsStore(
+            "data/analytics.db", flush_interval=bot.config.get('analytics_flush_interval', 30)
+        )
+        self.bucket_retention_days = bot.config.get('analytics_bucket_days', 90)
         
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Track messages"""
-        if message.author.bot:
-            return
-            
+    async def cog_load(self):
+        await self.store.load()
+        # Nạp lại số liệu hôm nay để serverstats/topmessages không về 0 sau khi restart
+        for guild_id, user_id, count in await self.store.today_counts():
+            self.counters.increment(guild_id, user_id, count)
+        self.analytics_maintenance.start()
+        message_dispatcher.register('analytics', self.on_message)
+        
+    async def cog_unload(self):
+        message_dispatcher.unregister('analytics')
+        self.analytics_maintenance.cancel()
+        await self.store.close()
+        
+    @tasks.loop(hours=24)
+    async def analytics_maintenance(self):
+        """Xóa bucket theo giờ quá cũ (rollup theo ngày vẫn giữ)"""
+        try:
+            removed = await self.store.prune(self.bucket_retention_days)
+            if removed:
+                print(f"🧹 Analytics: đã xóa {removed} bucket cũ")
+        except Exception as e:
+            print(f"Error pruning analytics buckets: {e}")
+        
+    def on_message(self, message):
+        """Track messages (đăng ký qua message_dispatcher, đã bỏ qua bot)"""
         # Simple tracking
         guild_id = message.guild.id if message.guild else 0
-        user_id = message.author.id
-        today = datetime.now().strftime("%Y-%m-%d")
-        
-        key = f"{guild_id}_{user_id}_{today}"
-        self.message_cache[key] = self.message_cache.get(key, 0) + 1
+        self.counters.increment(guild_id, message.author.id)
+        self.store.record(guild_id, message.author.id, message.channel.id)
     
     @commands.command(name="serverstats")
     async def server_stats(self, ctx):
@@ -46,26 +133,19 @@ class SimpleAnalyticsCog(commands.Cog):
         created_days = (datetime.now() - guild.created_at.replace(tzinfo=None)).days
         embed.add_field(name="🎂 Tuổi server", value=f"{created_days} ngày", inline=True)
         
-        # Today's messages (from cache)
-        today = datetime.now().strftime("%Y-%m-%d")
-        today_messages = sum(count for key, count in self.message_cache.items() 
-                           if key.startswith(f"{guild.id}_") and key.endswith(f"_{today}"))
+        # Today's messages (tổng chạy sẵn, không quét cache)
+        today_messages = self.counters.guild_total(guild.id)
         embed.add_field(name="💬 Tin nhắn hôm nay", value=f"{today_messages}", inline=True)
         
         # Most active user today
-        today_users = {}
-        for key, count in self.message_cache.items():
-            if key.startswith(f"{guild.id}_") and key.endswith(f"_{today}"):
-                user_id = int(key.split("_")[1])
-                today_users[user_id] = today_users.get(user_id, 0) + count
-        
-        if today_users:
-            most_active_id = max(today_users, key=today_users.get)
+        top_user = self.counters.top_users(guild.id, k=1)
+        if top_user:
+            most_active_id, most_active_count = top_user[0]
             most_active_user = guild.get_member(most_active_id)
             if most_active_user:
                 embed.add_field(
                     name="🏆 Hoạt động nhất hôm nay", 
-                    value=f"{most_active_user.mention} ({today_users[most_active_id]} tin nhắn)", 
+                    value=f"{most_active_user.mention} ({most_active_count} tin nhắn)", 
                     inline=False
                 )
         
@@ -92,9 +172,7 @@ class SimpleAnalyticsCog(commands.Cog):
         embed.add_field(name="🔝 Highest role", value=member.top_role.mention, inline=True)
         
         # Messages today from cache
-        today = datetime.now().strftime("%Y-%m-%d")
-        key = f"{ctx.guild.id}_{member.id}_{today}"
-        messages_today = self.message_cache.get(key, 0)
+        messages_today = self.counters.user_count(ctx.guild.id, member.id)
         embed.add_field(name="💬 Tin nhắn hôm nay", value=f"{messages_today}", inline=True)
         
         # Status
@@ -114,23 +192,13 @@ class SimpleAnalyticsCog(commands.Cog):
     @commands.command(name="topmessages")
     async def top_messages(self, ctx):
         """Top users tin nhắn hôm nay"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        guild_id = ctx.guild.id
-        
-        # Collect today's stats
-        today_stats = {}
-        for key, count in self.message_cache.items():
-            if key.startswith(f"{guild_id}_") and key.endswith(f"_{today}"):
-                user_id = int(key.split("_")[1])
-                today_stats[user_id] = today_stats.get(user_id, 0) + count
+        # Top 10 hôm nay (heap, không sort toàn bộ)
+        sorted_stats = self.counters.top_users(ctx.guild.id, k=10)
         
-        if not today_stats:
+        if not sorted_stats:
             await ctx.send("📭 Chưa có ai nhắn tin hôm nay!")
             return
         
-        # Sort by message count
-        sorted_stats = sorted(today_stats.items(), key=lambda x: x[1], reverse=True)[:10]
-        
         embed = discord.Embed(title="🏆 Top 10 tin nhắn hôm nay", color=discord.Color.gold())
         
         medals = ["🥇", "🥈", "🥉"] + ["🏅"] * 7
@@ -146,11 +214,89 @@ class SimpleAnalyticsCog(commands.Cog):
         
         await ctx.send(embed=embed)
     
+    @commands.command(name="trend", aliases=["messagetrend"])
+    @commands.guild_only()
+    async def message_trend(self, ctx, days: int = 7, member: discord.Member = None):
+        """Xu hướng tin nhắn 7/30 ngày của server hoặc một thành viên"""
+        days = max(1, min(days, 90))
+        daily = await self.store.daily_counts(ctx.guild.id, days, member.id if member else None)
+        total = sum(count for _, count in daily)
+        if not total:
+            await ctx.send(f"📭 Chưa có dữ liệu tin nhắn trong {days} ngày qua!")
+            return
+        
+        target = member.display_name if member else ctx.guild.name
+        embed = discord.Embed(title=f"📈 Xu hướng {days} ngày: {target}", color=discord.Color.blue())
+        
+        peak = max(count for _, count in daily)
+        # 30+ ngày thì gộp theo tuần để embed không quá dài
+        step = 7 if days > 14 else 1
+        lines = []
+        for i in range(0, len(daily), step):
+            chunk = daily[i:i + step]
+            count = sum(c for _, c in chunk)
+            label = date.fromordinal(chunk[0][0]).strftime("%d/%m")
+            bar = "█" * round(count / (peak * len(chunk)) * TREND_BAR_WIDTH) if count else ""
+            lines.append(f"{label} {bar:<{TREND_BAR_WIDTH}} {count}")
+        embed.description = "```\n" + "\n".join(lines) + "\n```"
+        
+        peak_day = max(daily, key=lambda item: item[1])
+        embed.add_field(name="💬 Tổng", value=f"{total}", inline=True)
+        embed.add_field(name="📊 Trung bình/ngày", value=f"{total / days:.1f}", inline=True)
+        embed.add_field(
+            name="🔥 Ngày cao nhất",
+            value=f"{date.fromordinal(peak_day[0]).strftime('%d/%m')} ({peak_day[1]})",
+            inline=True
+        )
+        
+        if not member:
+            top = await self.store.top_users(ctx.guild.id, days, limit=5)
+            mentions = []
+            for user_id, count in top:
+                user = ctx.guild.get_member(user_id)
+                if user:
+                    mentions.append(f"{user.mention}: {count}")
+            if mentions:
+                embed.add_field(name="🏆 Hoạt động nhất", value="\n".join(mentions), inline=False)
+        
+        await ctx.send(embed=embed)
+    
+    @commands.command(name="heatmap", aliases=["activityheatmap"])
+    @commands.guild_only()
+    async def activity_heatmap(self, ctx):
+        """Bản đồ nhiệt tin nhắn theo thứ và giờ trong ngày"""
+        cells = await self.store.heatmap(ctx.guild.id)
+        if not cells:
+            await ctx.send("📭 Chưa có dữ liệu tin nhắn!")
+            return
+        
+        peak = max(cells.values())
+        lines = ["    " + "".join(str(hour // 10) if hour % 6 == 0 else " " for hour in range(24)),
+                 "    " + "".join(str(hour % 10) if hour % 6 == 0 else " " for hour in range(24))]
+        for weekday, name in enumerate(WEEKDAY_NAMES):
+            row = ""
+            for hour in range(24):
+                count = cells.get((weekday, hour), 0)
+                level = 0 if not count else 1 + (count * (len(HEATMAP_SHADES) - 2)) // peak
+                row += HEATMAP_SHADES[level]
+            lines.append(f"{name:<3} {row}")
+        
+        busiest_weekday, busiest_hour = max(cells, key=cells.get)
+        embed = discord.Embed(title=f"🗓️ Giờ hoạt động: {ctx.guild.name}", color=discord.Color.orange())
+        embed.description = "```\n" + "\n".join(lines) + "\n```"
+        embed.add_field(
+            name="🔥 Sôi nổi nhất",
+            value=f"{WEEKDAY_NAMES[busiest_weekday]} {busiest_hour:02d}:00 ({cells[(busiest_weekday, busiest_hour)]} tin nhắn)",
+            inline=False
+        )
+        embed.set_footer(text=f"Thang: '{HEATMAP_SHADES[1:]}' (thấp → cao)")
+        await ctx.send(embed=embed)
+    
     @commands.command(name="clearcache")
     @commands.has_permissions(manage_guild=True)
     async def clear_cache(self, ctx):
-        """Xóa cache thống kê (Admin only)"""
-        self.message_cache.clear()
+        """Xóa cache thống kê của server (Admin only)"""
+        self.counters.clear(ctx.guild.id)
         await ctx.send("✅ Đã xóa cache thống kê!")
 
 async def setup(bot):
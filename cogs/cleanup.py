@@ -1,9 +1,18 @@
 import discord # type: ignore
 from discord.ext import commands, tasks # type: ignore
 import asyncio
-from datetime import datetime, timedelta
-import sqlite3
-import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from utils.cleanup_registry import CleanupRegistry
+from utils.message_dispatch import message_dispatcher
+
+# Discord chỉ cho bulk delete tin nhắn chưa quá 14 ngày (chừa 1 giờ an toàn)
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(hours=1)
+BULK_DELETE_LIMIT = 100
+# Khoảng cách giữa hai lần quét kênh của old_messages_cleanup (giây)
+SWEEP_MIN_SPACING = 1.0
+SWEEP_MAX_SPACING = 60.0
 
 class AutoCleanupCog(commands.Cog):
     """Tự động xóa tin nhắn của bot sau một khoảng thời gian"""
@@ -11,134 +20,229 @@ class AutoCleanupCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db_path = "data/cleanup_messages.db"
-        self.init_database()
+        # Hàng chờ xóa nằm trong RAM, ghi xuống SQLite theo lô ở nền
+        self.registry = CleanupRegistry(self.db_path)
+        # Số request REST xóa tin nhắn chạy đồng thời trên toàn bot
+        self.rest_budget = asyncio.Semaphore(bot.config.get('cleanup_rest_concurrency', 4))
+        self.delete_stats = {
+            'deleted': 0,
+            'bulk_requests': 0,
+            'single_requests': 0,
+            'seconds': 0.0,
+            'last_rate': 0.0,
+        }
+        self._sweep_queue = asyncio.Queue()
+        self._sweep_pending = set()
+        self._sweep_spacing = SWEEP_MAX_SPACING
+        self._sweep_task = None
+        
+    async def cog_load(self):
+        await self.registry.load()
         self.cleanup_task.start()
         self.old_messages_cleanup.start()
+        self._sweep_task = asyncio.create_task(self._sweep_worker())
+        # Chỉ tin nhắn của chính bot trong server
+        message_dispatcher.register(
+            'cleanup', self.on_message, include_bots=True, guild_only=True,
+            predicate=lambda message: message.author.id == self.bot.user.id
+        )
         
-    def init_database(self):
-        """Khởi tạo database để lưu trữ thông tin tin nhắn"""
-        os.makedirs("data", exist_ok=True)
+    def add_message_for_cleanup(self, message, delete_after=300):
+        """Thêm tin nhắn vào danh sách chờ xóa (mặc định 5 phút = 300 giây)"""
+        self.registry.add(
+            message.id, message.channel.id, message.guild.id if message.guild else None, delete_after
+        )
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    # ===== XÓA THEO LÔ =====
+    
+    async def _rest(self, coro):
+        """Chạy một request REST trong giới hạn chung"""
+        async with self.rest_budget:
+            return await coro
+    
+    async def _delete_single(self, channel, message_id):
+        """Xóa theo ID bằng PartialMessage (không cần fetch); True nếu tin nhắn không còn"""
+        self.delete_stats['single_requests'] += 1
+        try:
+            await self._rest(channel.get_partial_message(message_id).delete())
+            return True
+        except discord.NotFound:
+            return True
+    
+    async def delete_channel_messages(self, channel, message_ids):
+        """Xóa các tin nhắn của bot trong một kênh; trả về (số đã xóa, danh sách ID lỗi tạm thời)"""
+        cutoff = discord.utils.time_snowflake(datetime.now(timezone.utc) - BULK_DELETE_MAX_AGE)
+        can_bulk = channel.guild and channel.permissions_for(channel.guild.me).manage_messages
+        recent = sorted(mid for mid in message_ids if mid > cutoff) if can_bulk else []
+        singles = [mid for mid in message_ids if not can_bulk or mid <= cutoff]
+        deleted = 0
+        failed = []
         
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS bot_messages (
-                id INTEGER PRIMARY KEY,
-                message_id INTEGER,
-                channel_id INTEGER,
-                guild_id INTEGER,
-                timestamp DATETIME,
-                delete_after INTEGER DEFAULT 300
-            )
-        ''')
+        for i in range(0, len(recent), BULK_DELETE_LIMIT):
+            chunk = recent[i:i + BULK_DELETE_LIMIT]
+            if len(chunk) == 1:
+                singles.extend(chunk)
+                continue
+            try:
+                self.delete_stats['bulk_requests'] += 1
+                await self._rest(channel.delete_messages([channel.get_partial_message(mid) for mid in chunk]))
+                deleted += len(chunk)
+            except discord.Forbidden:
+                singles.extend(chunk)
+            except discord.HTTPException:
+                # Bulk bị từ chối (vd: có ID không hợp lệ) - thử xóa từng tin
+                singles.extend(chunk)
         
-        conn.commit()
-        conn.close()
+        for message_id in singles:
+            try:
+                if await self._delete_single(channel, message_id):
+                    deleted += 1
+            except discord.Forbidden:
+                print(f"❌ Không có quyền xóa tin nhắn {message_id}")
+            except discord.HTTPException as e:
+                if e.status >= 500 or e.status == 429:
+                    failed.append(message_id)
+                else:
+                    print(f"❌ Lỗi khi xóa tin nhắn {message_id}: {e}")
         
-    def add_message_for_cleanup(self, message, delete_after=300):
-        """Thêm tin nhắn vào danh sách chờ xóa (mặc định 5 phút = 300 giây)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        return deleted, failed
+    
+    async def delete_messages_by_channel(self, by_channel):
+        """Xóa {channel_id: [message_id]} song song theo kênh; trả về (số đã xóa, ID lỗi tạm thời)"""
+        started = time.perf_counter()
         
-        cursor.execute('''
-            INSERT INTO bot_messages (message_id, channel_id, guild_id, timestamp, delete_after)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (message.id, message.channel.id, message.guild.id if message.guild else None, 
-              datetime.now(), delete_after))
+        async def run(channel_id, message_ids):
+            channel = self.bot.get_channel(channel_id)
+            if not channel:
+                # Kênh không còn: bỏ qua các tin nhắn này
+                return 0, []
+            try:
+                return await self.delete_channel_messages(channel, message_ids)
+            except Exception as e:
+                print(f"❌ Lỗi khi dọn kênh {channel_id}: {e}")
+                return 0, list(message_ids)
         
-        conn.commit()
-        conn.close()
+        results = await asyncio.gather(*(run(cid, ids) for cid, ids in by_channel.items()))
+        deleted = sum(count for count, _ in results)
+        failed = [mid for _, ids in results for mid in ids]
         
+        elapsed = time.perf_counter() - started
+        if deleted:
+            self.delete_stats['deleted'] += deleted
+            self.delete_stats['seconds'] += elapsed
+            self.delete_stats['last_rate'] = deleted / elapsed if elapsed else 0.0
+        return deleted, failed
+    
     @tasks.loop(minutes=1)  # Chạy mỗi phút
     async def cleanup_task(self):
         """Task chính để xóa tin nhắn đã hết hạn"""
+        expired_messages = []
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Lấy tin nhắn đã hết hạn
-            cursor.execute('''
-                SELECT message_id, channel_id, guild_id, id 
-                FROM bot_messages 
-                WHERE datetime('now') > datetime(timestamp, '+' || delete_after || ' seconds')
-            ''')
+            # Lấy tin nhắn đã hết hạn (từ heap trong RAM, không quét DB)
+            expired_messages = self.registry.pop_expired()
+            if not expired_messages:
+                return
             
-            expired_messages = cursor.fetchall()
+            by_channel = defaultdict(list)
+            entries = {}
+            for entry in expired_messages:
+                by_channel[entry.channel_id].append(entry.message_id)
+                entries[entry.message_id] = entry
             
-            for message_id, channel_id, guild_id, db_id in expired_messages:
-                try:
-                    # Lấy channel
-                    channel = self.bot.get_channel(channel_id)
-                    if not channel:
-                        # Nếu không tìm thấy channel, xóa khỏi database
-                        cursor.execute('DELETE FROM bot_messages WHERE id = ?', (db_id,))
-                        continue
-                    
-                    # Lấy và xóa tin nhắn
-                    message = await channel.fetch_message(message_id)
-                    if message and message.author.id == self.bot.user.id:
-                        await message.delete()
-                        print(f"✅ Đã xóa tin nhắn {message_id} trong {channel.name}")
-                    
-                    # Xóa khỏi database
-                    cursor.execute('DELETE FROM bot_messages WHERE id = ?', (db_id,))
-                    
-                except discord.NotFound:
-                    # Tin nhắn đã bị xóa rồi
-                    cursor.execute('DELETE FROM bot_messages WHERE id = ?', (db_id,))
-                except discord.Forbidden:
-                    # Không có quyền xóa
-                    cursor.execute('DELETE FROM bot_messages WHERE id = ?', (db_id,))
-                    print(f"❌ Không có quyền xóa tin nhắn {message_id}")
-                except Exception as e:
-                    print(f"❌ Lỗi khi xóa tin nhắn {message_id}: {e}")
-                    cursor.execute('DELETE FROM bot_messages WHERE id = ?', (db_id,))
+            deleted, failed = await self.delete_messages_by_channel(by_channel)
+            if deleted:
+                print(f"✅ Đã xóa {deleted} tin nhắn trong {len(by_channel)} kênh")
             
-            conn.commit()
-            conn.close()
+            # Lỗi tạm thời (5xx/429) thử lại sau (giãn dần, có giới hạn), còn lại bỏ khỏi registry
+            failed_set = set(failed)
+            dropped = self.registry.requeue([entries[mid] for mid in failed])
+            if dropped:
+                print(f"⚠️ Bỏ {len(dropped)} tin nhắn không xóa được sau nhiều lần thử")
+            self.registry.discard([mid for mid in entries if mid not in failed_set])
+            expired_messages = []
             
         except Exception as e:
             print(f"❌ Lỗi trong cleanup task: {e}")
+            # Tin nhắn đã lấy khỏi heap nhưng chưa xử lý xong: đưa lại để lần sau thử tiếp
+            if expired_messages:
+                self.registry.requeue(expired_messages)
     
     @tasks.loop(hours=1)  # Chạy mỗi giờ
     async def old_messages_cleanup(self):
-        """Xóa các tin nhắn cũ của bot (hơn 10 phút) trong tất cả channels"""
+        """Xếp các kênh cần quét tin nhắn cũ của bot (hơn 10 phút) vào hàng đợi, rải đều trong giờ"""
         try:
-            cutoff_time = datetime.utcnow() - timedelta(minutes=10)
-            
+            channel_ids = []
             for guild in self.bot.guilds:
                 for channel in guild.text_channels:
-                    try:
-                        # Kiểm tra quyền
-                        if not channel.permissions_for(guild.me).read_message_history:
-                            continue
-                            
-                        if not channel.permissions_for(guild.me).manage_messages:
-                            continue
-                        
-                        # Lấy tin nhắn của bot cũ hơn 10 phút
-                        async for message in channel.history(limit=50, before=cutoff_time):
-                            if message.author.id == self.bot.user.id:
-                                try:
-                                    await message.delete()
-                                    print(f"🧹 Đã xóa tin nhắn cũ {message.id} trong {channel.name}")
-                                    await asyncio.sleep(0.5)  # Tránh rate limit
-                                except discord.NotFound:
-                                    pass
-                                except discord.Forbidden:
-                                    break  # Dừng nếu không có quyền
-                                except Exception as e:
-                                    print(f"❌ Lỗi xóa tin nhắn cũ: {e}")
-                                    
-                    except discord.Forbidden:
+                    # Bỏ qua kênh bot chưa gửi gì mới kể từ lần quét trước
+                    if channel.id in self._sweep_pending or not self.registry.needs_sweep(channel.id):
+                        continue
+                    
+                    # Kiểm tra quyền
+                    permissions = channel.permissions_for(guild.me)
+                    if not permissions.read_message_history or not permissions.manage_messages:
                         continue
-                    except Exception as e:
-                        print(f"❌ Lỗi khi duyệt channel {channel.name}: {e}")
+                    
+                    channel_ids.append(channel.id)
+            
+            if not channel_ids:
+                return
+            
+            # Chia đều giờ tới cho các kênh thay vì quét dồn một lúc
+            self._sweep_spacing = min(SWEEP_MAX_SPACING, max(SWEEP_MIN_SPACING, 3600 / len(channel_ids)))
+            for channel_id in channel_ids:
+                self._sweep_pending.add(channel_id)
+                self._sweep_queue.put_nowait(channel_id)
                         
         except Exception as e:
             print(f"❌ Lỗi trong old messages cleanup: {e}")
     
+    async def _sweep_worker(self):
+        """Lấy từng kênh trong hàng đợi quét, cách nhau _sweep_spacing giây"""
+        while True:
+            channel_id = await self._sweep_queue.get()
+            try:
+                channel = self.bot.get_channel(channel_id)
+                if channel:
+                    await self._sweep_channel(channel)
+            except discord.Forbidden:
+                pass
+            except Exception as e:
+                print(f"❌ Lỗi khi quét channel {channel_id}: {e}")
+            finally:
+                self._sweep_pending.discard(channel_id)
+            await asyncio.sleep(self._sweep_spacing)
+    
+    async def _sweep_channel(self, channel):
+        """Xóa tin nhắn cũ của bot trong kênh, chỉ đọc phần lịch sử sau con trỏ lần quét trước"""
+        cutoff_time = datetime.now(timezone.utc) - timedelta(minutes=10)
+        last_swept = self.registry.last_swept(channel.id)
+        
+        if last_swept:
+            history = channel.history(limit=100, after=discord.Object(last_swept), before=cutoff_time, oldest_first=True)
+        else:
+            # Lần đầu quét kênh này: chỉ xem 50 tin gần nhất như trước
+            history = channel.history(limit=50, before=cutoff_time)
+        
+        message_ids = []
+        scanned = 0
+        newest_seen = 0
+        async for message in history:
+            scanned += 1
+            newest_seen = max(newest_seen, message.id)
+            if message.author.id == self.bot.user.id:
+                message_ids.append(message.id)
+        
+        if message_ids:
+            deleted, _ = await self.delete_messages_by_channel({channel.id: message_ids})
+            print(f"🧹 Đã xóa {deleted} tin nhắn cũ trong {channel.name}")
+        
+        # Đọc hết đoạn lịch sử thì con trỏ nhảy tới mốc cutoff, chưa hết thì dừng ở tin mới nhất đã đọc
+        if last_swept and scanned >= 100:
+            self.registry.set_swept(channel.id, newest_seen)
+        else:
+            self.registry.set_swept(channel.id, discord.utils.time_snowflake(cutoff_time))
+    
     @cleanup_task.before_loop
     async def before_cleanup_task(self):
         await self.bot.wait_until_ready()
@@ -147,36 +251,18 @@ class AutoCleanupCog(commands.Cog):
     async def before_old_cleanup_task(self):
         await self.bot.wait_until_ready()
     
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Tự động đăng ký tin nhắn của bot để xóa sau 5 phút"""
-        # Chỉ theo dõi tin nhắn của bot
-        if message.author.id == self.bot.user.id:
-            # Không theo dõi tin nhắn DM
-            if not message.guild:
-                return
-                
-            # Thêm vào danh sách chờ xóa (5 phút = 300 giây)
-            self.add_message_for_cleanup(message, delete_after=300)
+    def on_message(self, message):
+        """Tự động đăng ký tin nhắn của bot để xóa sau 5 phút (dispatcher đã lọc tin nhắn của bot trong server)"""
+        # Thêm vào danh sách chờ xóa (5 phút = 300 giây)
+        self.add_message_for_cleanup(message, delete_after=300)
 
     @commands.command(name="cleanup_stats")
     @commands.has_permissions(administrator=True)
     async def cleanup_stats(self, ctx):
         """Xem thống kê cleanup (chỉ admin)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT COUNT(*) FROM bot_messages')
-            total_pending = cursor.fetchone()[0]
-            
-            cursor.execute('''
-                SELECT COUNT(*) FROM bot_messages 
-                WHERE datetime('now') > datetime(timestamp, '+' || delete_after || ' seconds')
-            ''')
-            ready_to_delete = cursor.fetchone()[0]
-            
-            conn.close()
+            total_pending = len(self.registry)
+            ready_to_delete = self.registry.count_ready()
             
             embed = discord.Embed(
                 title="🧹 Auto Cleanup Stats",
@@ -187,9 +273,19 @@ class AutoCleanupCog(commands.Cog):
                 value=f"**Tin nhắn chờ xóa:** {total_pending}\n**Sẵn sàng xóa:** {ready_to_delete}",
                 inline=False
             )
+            stats = self.delete_stats
+            avg_rate = stats['deleted'] / stats['seconds'] if stats['seconds'] else 0.0
+            embed.add_field(
+                name="⚡ Hiệu suất xóa",
+                value=f"**Đã xóa:** {stats['deleted']}\n"
+                      f"**Tốc độ TB:** {avg_rate:.1f} tin/s • **Lần gần nhất:** {stats['last_rate']:.1f} tin/s\n"
+                      f"**Request:** {stats['bulk_requests']} bulk • {stats['single_requests']} đơn lẻ",
+                inline=False
+            )
             embed.add_field(
                 name="⚙️ Cấu hình",
-                value="**Tự động xóa:** 5 phút\n**Dọn dẹp cũ:** 10 phút\n**Tần suất:** Mỗi phút",
+                value="**Tự động xóa:** 5 phút\n**Dọn dẹp cũ:** 10 phút\n**Tần suất:** Mỗi phút\n"
+                      f"**Kênh chờ quét:** {self._sweep_queue.qsize()} (mỗi {self._sweep_spacing:.0f}s)",
                 inline=False
             )
             embed.set_footer(text="KSC Support Auto Cleanup System")
@@ -215,14 +311,13 @@ class AutoCleanupCog(commands.Cog):
             
             await ctx.send(f"🧹 Bắt đầu dọn dẹp tin nhắn cũ hơn {minutes} phút...")
             
-            async for message in ctx.channel.history(limit=100, before=cutoff_time):
-                if message.author.id == self.bot.user.id:
-                    try:
-                        await message.delete()
-                        deleted_count += 1
-                        await asyncio.sleep(0.5)
-                    except:
-                        pass
+            message_ids = [
+                message.id
+                async for message in ctx.channel.history(limit=100, before=cutoff_time)
+                if message.author.id == self.bot.user.id
+            ]
+            if message_ids:
+                deleted_count, _ = await self.delete_messages_by_channel({ctx.channel.id: message_ids})
             
             result_msg = await ctx.send(f"✅ Đã xóa {deleted_count} tin nhắn cũ!")
             self.add_message_for_cleanup(result_msg, delete_after=120)
@@ -230,10 +325,14 @@ class AutoCleanupCog(commands.Cog):
         except Exception as e:
             await ctx.send(f"❌ Lỗi: {e}")
     
-    def cog_unload(self):
+    async def cog_unload(self):
         """Dừng tasks khi unload cog"""
+        message_dispatcher.unregister('cleanup')
         self.cleanup_task.cancel()
         self.old_messages_cleanup.cancel()
+        if self._sweep_task:
+            self._sweep_task.cancel()
+        await self.registry.close()
 
 async def setup(bot):
     await bot.add_cog(AutoCleanupCog(bot))
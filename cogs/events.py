@@ -3,6 +3,7 @@ from discord.ext import commands # type: ignore
 import asyncio
 import random
 from datetime import datetime
+from utils.channel_manager import channel_index
 
 class Events(commands.Cog):
     """🎉 Events - Chào mừng & tạm biệt thành viên"""
@@ -33,15 +34,11 @@ class Events(commands.Cog):
             "{user} rời khỏi {server}. Hy vọng sẽ gặp lại bạn sớm! 🌸",
             "Tạm biệt {user}! Bạn luôn được chào đón tại {server}! 💙"
         ]
-        
-        # Welcome channel - chỉ tìm channel có tên chính xác
-        self.welcome_channel_name = '👋・welcome'
+
 
     def get_welcome_channel(self, guild):
-        """Tìm channel welcome - chỉ channel có tên '👋・welcome'"""
-        # Chỉ tìm channel có tên chính xác là "👋・welcome"
-        channel = discord.utils.get(guild.text_channels, name=self.welcome_channel_name)
-        return channel
+        """Tìm channel welcome theo tên đã cấu hình của server (mặc định '👋・welcome')"""
+        return channel_index.get(guild, 'welcome')
 
     @commands.Cog.listener()
     async def on_member_join(self, member):
@@ -199,11 +196,8 @@ class Events(commands.Cog):
         if not channel:
             channel = ctx.channel
         
-        # Lưu vào database hoặc config (tạm thời dùng memory)
-        if not hasattr(self.bot, 'welcome_channels'):
-            self.bot.welcome_channels = {}
-        
-        self.bot.welcome_channels[ctx.guild.id] = channel.id
+        # Lưu tên kênh welcome của server (data/channel_settings.json)
+        channel_index.set_channel_name(ctx.guild.id, 'welcome', channel.name)
         
         embed = discord.Embed(
             title="✅ Đã thiết lập kênh welcome!",
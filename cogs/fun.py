@@ -1,9 +1,9 @@
 import discord
 from discord.ext import commands
-import aiohttp
 import random
 import asyncio
 from typing import Optional
+from utils.http_client import http_client
 
 class Fun(commands.Cog):
     """🎮 Giải trí & Fun - Các lệnh vui nhộn và giải trí"""
@@ -26,10 +26,9 @@ class Fun(commands.Cog):
     async def fetch_json(self, url: str) -> Optional[dict]:
         """Helper function to fetch JSON from API"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        return await response.json()
+            async with http_client.get(url) as response:
+                if response.status == 200:
+                    return await response.json()
         except Exception as e:
             print(f"Error fetching from {url}: {e}")
         return None
@@ -180,17 +179,16 @@ class Fun(commands.Cog):
             data = None
             for api in cat_apis:
                 try:
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(api) as response:
-                            if response.status == 200:
-                                json_data = await response.json()
-                                if api == "https://aws.random.cat/meow":
-                                    data = [{"url": json_data["file"]}]
-                                elif api == "https://cataas.com/cat?json=true":
-                                    data = [{"url": f"https://cataas.com{json_data['url']}"}]
-                                else:
-                                    data = json_data
-                                break
+                    async with http_client.get(api) as response:
+                        if response.status == 200:
+                            json_data = await response.json()
+                            if api == "https://aws.random.cat/meow":
+                                data = [{"url": json_data["file"]}]
+                            elif api == "https://cataas.com/cat?json=true":
+                                data = [{"url": f"https://cataas.com{json_data['url']}"}]
+                            else:
+                                data = json_data
+                            break
                 except:
                     continue
             
@@ -229,17 +227,16 @@ class Fun(commands.Cog):
             data = None
             for api in dog_apis:
                 try:
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(api) as response:
-                            if response.status == 200:
-                                json_data = await response.json()
-                                if api == "https://dog.ceo/api/breeds/image/random":
-                                    data = [{"url": json_data["message"]}]
-                                elif api == "https://random.dog/woof.json":
-                                    data = [{"url": json_data["url"]}]
-                                else:
-                                    data = json_data
-                                break
+                    async with http_client.get(api) as response:
+                        if response.status == 200:
+                            json_data = await response.json()
+                            if api == "https://dog.ceo/api/breeds/image/random":
+                                data = [{"url": json_data["message"]}]
+                            elif api == "https://random.dog/woof.json":
+                                data = [{"url": json_data["url"]}]
+                            else:
+                                data = json_data
+                            break
                 except:
                     continue
             
@@ -302,13 +299,12 @@ class Fun(commands.Cog):
         """Gửi ảnh anime random"""
         async with ctx.typing():
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get("https://api.waifu.pics/sfw/waifu") as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            image_url = data["url"]
-                        else:
-                            raise Exception("API not available")
+                async with http_client.get("https://api.waifu.pics/sfw/waifu") as response:
+                    if response.status == 200:
+                        data = await response.json()
+                        image_url = data["url"]
+                    else:
+                        raise Exception("API not available")
             except:
                 # Fallback anime images
                 fallback_anime = [
@@ -340,13 +336,12 @@ class Fun(commands.Cog):
                 url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name.lower()}"
             
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                        else:
-                            await ctx.send("❌ Không tìm thấy Pokemon này!")
-                            return
+                async with http_client.get(url) as response:
+                    if response.status == 200:
+                        data = await response.json()
+                    else:
+                        await ctx.send("❌ Không tìm thấy Pokemon này!")
+                        return
             except:
                 await ctx.send("❌ Lỗi khi tìm Pokemon!")
                 return
@@ -1,36 +1,83 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import aiohttp
 import asyncio
 import json
 import urllib.parse
-from datetime import datetime, timedelta
+from datetime import datetime
 import random
 import re
 from bs4 import BeautifulSoup
 import os
+from concurrent.futures import ThreadPoolExecutor
+from utils.http_client import http_client
+from utils.ddragon import DataDragonStore, DDRAGON_BASE_URL
+from utils.lol_search import ChampionIndex, ItemIndex
+from utils.async_cache import AsyncCache
+
+try:
+    import lxml  # noqa: F401 - parser C, nhanh hơn html.parser nhiều lần với trang OP.GG lớn
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+
+def parse_opgg_champion_page(html: bytes) -> dict:
+    """Đọc số liệu tướng từ HTML OP.GG (chạy trong thread pool, không đụng tới event loop)"""
+    soup = BeautifulSoup(html, HTML_PARSER)
+
+    def text_of(selector):
+        elem = soup.select_one(selector)
+        return elem.text.strip() if elem else "N/A"
+
+    def names_in(selector, limit=None):
+        names = []
+        for elem in soup.select(selector)[:limit]:
+            name = elem.select_one('.champion-name')
+            if name:
+                names.append(name.text.strip())
+        return names
+
+    positions = []
+    for pos in soup.select('.champion-position-stats__position'):
+        pos_name = pos.select_one('.position-name')
+        if pos_name:
+            positions.append(pos_name.text.strip())
+
+    return {
+        'win_rate': text_of('.champion-overview__data .win-rate'),
+        'pick_rate': text_of('.champion-overview__data .pick-rate'),
+        'ban_rate': text_of('.champion-overview__data .ban-rate'),
+        'tier': text_of('.champion-overview__tier'),
+        'positions': positions if positions else ['Unknown'],
+        # Tướng mạnh nhất chống lại tướng này / tướng yếu nhất trước tướng này
+        'counters': names_in('.champion-matchup-list__item--strong', 5),
+        'good_against': names_in('.champion-matchup-list__item--weak', 5),
+        'source': 'OP.GG',
+        'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M')
+    }
+
 
 class LeagueOfLegends(commands.Cog):
     """League of Legends related commands"""
 
     def __init__(self, bot):
         self.bot = bot
-        self.base_url = "https://ddragon.leagueoflegends.com"
+        self.base_url = DDRAGON_BASE_URL
         self.riot_api_base = "https://kr.api.riotgames.com"  # Thay đổi sang KR server
         self.riot_api_key = os.getenv('RIOT_API_KEY')
         
         if not self.riot_api_key:
             print("⚠️ RIOT_API_KEY not found in environment variables!")
         
-        # Cache cho champion data
-        self.champions_cache = {}
-        self.items_cache = {}
-        self.cache_time = None
+        # Champion/item data theo patch: lưu trên đĩa, tự cập nhật khi có patch mới
+        self.ddragon = DataDragonStore(poll_interval=bot.config.get('ddragon_poll_interval', 3600))
         
-        # Cache cho rotation data
-        self.rotation_cache = None
-        self.rotation_cache_time = None
+        # Cache cho rotation data (đổi hàng tuần: làm mới mỗi 6 giờ, API lỗi thì dùng tiếp bản cũ)
+        self.rotation_cache = AsyncCache(
+            lambda _: self.fetch_champion_rotation(),
+            ttl=6 * 3600, stale_ttl=7 * 24 * 3600, negative_ttl=300, max_size=1, name='rotation'
+        )
         
         # Dictionary tên items tiếng Việt
         self.items_vietnamese = {
@@ -122,9 +169,17 @@ class LeagueOfLegends(commands.Cog):
         self.opgg_base_url = "https://op.gg/vi/lol/champions"
         self.opgg_champion_url = "https://op.gg/vi/lol/champions/{champion_name}"
         
-        # Cache cho OP.GG data
-        self.opgg_cache = {}
-        self.opgg_cache_time = None
+        # Thread pool parse HTML OP.GG (giới hạn số trang parse cùng lúc)
+        self.parse_executor = ThreadPoolExecutor(
+            max_workers=bot.config.get('opgg_parse_workers', 2), thread_name_prefix='opgg-parse'
+        )
+        
+        # Cache cho OP.GG data (mỗi tướng hết hạn riêng sau 2 giờ)
+        self.opgg_cache = AsyncCache(
+            self.scrape_opgg_champion_data,
+            ttl=bot.config.get('opgg_cache_ttl', 2 * 3600), stale_ttl=6 * 3600,
+            negative_ttl=600, max_size=200, name='opgg'
+        )
         
         # Database tướng counter (data mẫu - có thể được cập nhật từ API)
         self.counter_data = {
@@ -166,75 +221,51 @@ class LeagueOfLegends(commands.Cog):
             # Có thể thêm nhiều tướng khác...
         }
         
+    async def cog_load(self):
+        # Snapshot Data Dragon trên đĩa: có ngay khi khởi động, không cần mạng
+        await self.ddragon.load()
+        self.ddragon.start()
+
+    async def cog_unload(self):
+        await self.ddragon.close()
+        await self.opgg_cache.close()
+        await self.rotation_cache.close()
+        self.parse_executor.shutdown(wait=False)
+
     async def get_latest_version(self):
-        """Get latest game version"""
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.base_url}/api/versions.json") as resp:
-                    if resp.status == 200:
-                        versions = await resp.json()
-                        return versions[0] if versions else "13.24.1"
-        except:
-            pass
-        return "13.24.1"  # Fallback version
+        """Get latest game version (từ snapshot, không gọi mạng)"""
+        return self.ddragon.version
 
     async def get_champions_data(self):
-        """Get champions data with caching"""
-        now = datetime.now()
-        
-        # Check cache (refresh every hour)
-        if (self.champions_cache and self.cache_time and 
-            (now - self.cache_time) < timedelta(hours=1)):
-            return self.champions_cache
-        
-        try:
-            version = await self.get_latest_version()
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}/cdn/{version}/data/vi_VN/champion.json"
-                async with session.get(url) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        self.champions_cache = data.get('data', {})
-                        self.cache_time = now
-                        return self.champions_cache
-        except:
-            pass
-        
-        # Return cached data or empty dict if no cache
-        return self.champions_cache or {}
+        """Get champions data từ snapshot Data Dragon trong bộ nhớ"""
+        snapshot = await self.ddragon.ensure_loaded()
+        return snapshot.champions
 
     async def get_items_data(self):
-        """Get items data with caching"""
-        now = datetime.now()
-        
-        # Check cache
-        if (self.items_cache and self.cache_time and 
-            (now - self.cache_time) < timedelta(hours=1)):
-            return self.items_cache
-        
-        try:
-            version = await self.get_latest_version()
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}/cdn/{version}/data/vi_VN/item.json"
-                async with session.get(url) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        self.items_cache = data.get('data', {})
-                        return self.items_cache
-        except:
-            pass
-        
-        return self.items_cache or {}
+        """Get items data từ snapshot Data Dragon trong bộ nhớ"""
+        snapshot = await self.ddragon.ensure_loaded()
+        return snapshot.items
+
+    def champion_index(self) -> ChampionIndex:
+        """Chỉ mục tìm tướng của snapshot hiện tại (dựng lại khi có patch mới)"""
+        return self.ddragon.snapshot.index('champions', lambda snapshot: ChampionIndex(snapshot.champions))
+
+    def item_index(self) -> ItemIndex:
+        """Chỉ mục tìm item (kèm tên tiếng Việt) của snapshot hiện tại"""
+        return self.ddragon.snapshot.index('items', lambda snapshot: ItemIndex(snapshot.items, self.items_vietnamese))
 
     async def get_champion_rotation(self):
-        """Get free champion rotation from Riot API"""
+        """Get free champion rotation (cache, fallback khi API chưa từng trả về)"""
+        rotation = await self.rotation_cache.get('rotation')
+        if not rotation:
+            print("All regions failed, using fallback data")
+            return self.get_fallback_rotation_data()
+        return rotation
+
+    async def fetch_champion_rotation(self):
+        """Get free champion rotation from Riot API; None nếu mọi region lỗi"""
         now = datetime.now()
         
-        # Check cache (refresh every 6 hours since rotation changes weekly)
-        if (self.rotation_cache and self.rotation_cache_time and 
-            (now - self.rotation_cache_time) < timedelta(hours=6)):
-            return self.rotation_cache
-        
         # Try multiple regions
         regions = ["kr", "na1", "euw1", "eun1"]
         
@@ -244,68 +275,57 @@ class LeagueOfLegends(commands.Cog):
                     'X-Riot-Token': self.riot_api_key
                 }
                 
-                async with aiohttp.ClientSession() as session:
-                    url = f"https://{region}.api.riotgames.com/lol/platform/v3/champion-rotations"
-                    async with session.get(url, headers=headers) as resp:
-                        if resp.status == 200:
-                            rotation_data = await resp.json()
-                            
-                            # Get champion data to convert IDs to names
-                            champions_data = await self.get_champions_data()
-                            
-                            # Convert champion IDs to names
-                            free_champions = []
-                            newbie_free_champions = []
-                            
-                            # Create ID to name mapping
-                            id_to_name = {}
-                            for champ_key, champ_data in champions_data.items():
-                                champ_id = int(champ_data.get('key', 0))
-                                id_to_name[champ_id] = champ_data['name']
-                            
-                            # Get free champions for all players
-                            for champ_id in rotation_data.get('freeChampionIds', []):
-                                if champ_id in id_to_name:
-                                    free_champions.append(id_to_name[champ_id])
-                            
-                            # Get free champions for new players (level < 11)
-                            for champ_id in rotation_data.get('freeChampionIdsForNewPlayers', []):
-                                if champ_id in id_to_name:
-                                    newbie_free_champions.append(id_to_name[champ_id])
-                            
-                            self.rotation_cache = {
-                                'free_champions': free_champions,
-                                'newbie_free_champions': newbie_free_champions,
-                                'max_new_player_level': rotation_data.get('maxNewPlayerLevel', 10),
-                                'last_updated': now.strftime('%Y-%m-%d %H:%M'),
-                                'next_rotation': 'Thứ 3 hàng tuần (theo múi giờ Riot)',
-                                'source_region': region.upper()
-                            }
-                            self.rotation_cache_time = now
-                            print(f"Successfully fetched rotation data from {region.upper()}")
-                            return self.rotation_cache
-                            
-                        elif resp.status == 403:
-                            print(f"API key forbidden for region {region}")
-                            continue
-                        elif resp.status == 429:
-                            print(f"Rate limit exceeded for region {region}")
-                            continue
-                        else:
-                            print(f"API error {resp.status} for region {region}")
-                            continue
-                            
+                url = f"https://{region}.api.riotgames.com/lol/platform/v3/champion-rotations"
+                async with http_client.get(url, headers=headers) as resp:
+                    if resp.status == 200:
+                        rotation_data = await resp.json()
+                        
+                        # Get champion data to convert IDs to names
+                        champions_data = await self.get_champions_data()
+                        
+                        # Convert champion IDs to names
+                        free_champions = []
+                        newbie_free_champions = []
+                        
+                        # ID -> tên tướng (dựng sẵn trong chỉ mục)
+                        id_to_name = self.champion_index().by_key
+                        
+                        # Get free champions for all players
+                        for champ_id in rotation_data.get('freeChampionIds', []):
+                            if champ_id in id_to_name:
+                                free_champions.append(id_to_name[champ_id])
+                        
+                        # Get free champions for new players (level < 11)
+                        for champ_id in rotation_data.get('freeChampionIdsForNewPlayers', []):
+                            if champ_id in id_to_name:
+                                newbie_free_champions.append(id_to_name[champ_id])
+                        
+                        rotation = {
+                            'free_champions': free_champions,
+                            'newbie_free_champions': newbie_free_champions,
+                            'max_new_player_level': rotation_data.get('maxNewPlayerLevel', 10),
+                            'last_updated': now.strftime('%Y-%m-%d %H:%M'),
+                            'next_rotation': 'Thứ 3 hàng tuần (theo múi giờ Riot)',
+                            'source_region': region.upper()
+                        }
+                        print(f"Successfully fetched rotation data from {region.upper()}")
+                        return rotation
+                        
+                    elif resp.status == 403:
+                        print(f"API key forbidden for region {region}")
+                        continue
+                    elif resp.status == 429:
+                        print(f"Rate limit exceeded for region {region}")
+                        continue
+                    else:
+                        print(f"API error {resp.status} for region {region}")
+                        continue
+                        
             except Exception as e:
                 print(f"Error getting champion rotation from {region}: {e}")
                 continue
         
-        # If all regions fail, return fallback data
-        if not self.rotation_cache:
-            print("All regions failed, using fallback data")
-            return self.get_fallback_rotation_data()
-        
-        # Return cached data if available
-        return self.rotation_cache
+        return None
     
     def get_fallback_rotation_data(self):
         """Return fallback rotation data when API fails"""
@@ -353,100 +373,23 @@ class LeagueOfLegends(commands.Cog):
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status != 200:
-                        return None
-                    
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Extract win rate
-                    win_rate = "N/A"
-                    win_rate_elem = soup.select_one('.champion-overview__data .win-rate')
-                    if win_rate_elem:
-                        win_rate = win_rate_elem.text.strip()
-                    
-                    # Extract pick rate
-                    pick_rate = "N/A"
-                    pick_rate_elem = soup.select_one('.champion-overview__data .pick-rate')
-                    if pick_rate_elem:
-                        pick_rate = pick_rate_elem.text.strip()
-                    
-                    # Extract ban rate
-                    ban_rate = "N/A"
-                    ban_rate_elem = soup.select_one('.champion-overview__data .ban-rate')
-                    if ban_rate_elem:
-                        ban_rate = ban_rate_elem.text.strip()
-                    
-                    # Extract tier
-                    tier = "N/A"
-                    tier_elem = soup.select_one('.champion-overview__tier')
-                    if tier_elem:
-                        tier = tier_elem.text.strip()
-                    
-                    # Extract positions
-                    positions = []
-                    position_elems = soup.select('.champion-position-stats__position')
-                    for pos in position_elems:
-                        pos_name = pos.select_one('.position-name')
-                        if pos_name:
-                            positions.append(pos_name.text.strip())
-                    
-                    # Extract counters (tướng mạnh nhất chống lại tướng này)
-                    counters = []
-                    counter_elems = soup.select('.champion-matchup-list__item--strong')[:5]
-                    for counter in counter_elems:
-                        counter_name = counter.select_one('.champion-name')
-                        if counter_name:
-                            counters.append(counter_name.text.strip())
-                    
-                    # Extract good against (tướng yếu nhất trước tướng này)
-                    good_against = []
-                    weak_elems = soup.select('.champion-matchup-list__item--weak')[:5]
-                    for weak in weak_elems:
-                        weak_name = weak.select_one('.champion-name')
-                        if weak_name:
-                            good_against.append(weak_name.text.strip())
-                    
-                    return {
-                        'win_rate': win_rate,
-                        'pick_rate': pick_rate,
-                        'ban_rate': ban_rate,
-                        'tier': tier,
-                        'positions': positions if positions else ['Unknown'],
-                        'counters': counters,
-                        'good_against': good_against,
-                        'source': 'OP.GG',
-                        'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M')
-                    }
-                    
+            async with http_client.get(url, headers=headers) as response:
+                if response.status != 200:
+                    return None
+                
+                # Đọc bytes: để parser tự nhận encoding trong thread thay vì decode trên event loop
+                html = await response.read()
+            
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.parse_executor, parse_opgg_champion_page, html)
+                
         except Exception as e:
             print(f"Error scraping OP.GG for {champion_name}: {e}")
             return None
 
     async def get_opgg_champion_data(self, champion_name):
-        """Get champion data from OP.GG with caching"""
-        now = datetime.now()
-        
-        # Check cache (refresh every 2 hours)
-        cache_key = champion_name.lower()
-        if (cache_key in self.opgg_cache and self.opgg_cache_time and 
-            (now - self.opgg_cache_time) < timedelta(hours=2)):
-            return self.opgg_cache[cache_key]
-        
-        # Scrape new data
-        opgg_data = await self.scrape_opgg_champion_data(champion_name)
-        
-        if opgg_data:
-            # Initialize cache if needed
-            if not hasattr(self, 'opgg_cache_time') or not self.opgg_cache_time:
-                self.opgg_cache_time = now
-            
-            self.opgg_cache[cache_key] = opgg_data
-            return opgg_data
-        
-        return None
+        """Get champion data from OP.GG with caching (các lệnh cùng hỏi một tướng chỉ scrape một lần)"""
+        return await self.opgg_cache.get(champion_name.lower())
 
     def get_item_vietnamese_name(self, english_name):
         """Get Vietnamese name for item"""
@@ -465,43 +408,17 @@ class LeagueOfLegends(commands.Cog):
         if not version:
             version = await self.get_latest_version()
         
-        # Convert Vietnamese name back to English if needed
-        english_name = None
-        for eng, viet in self.items_vietnamese.items():
-            if viet == item_name or eng == item_name:
-                english_name = eng
-                break
-        
-        if not english_name:
-            english_name = item_name
-        
-        # Get items data to find item ID
-        items_data = await self.get_items_data()
-        for item_id, item_info in items_data.items():
-            if item_info.get('name') == english_name:
-                return f"{self.base_url}/cdn/{version}/img/item/{item_id}.png"
+        # Tên tiếng Việt hoặc tiếng Anh -> item ID
+        await self.ddragon.ensure_loaded()
+        item_id = self.item_index().id_for(item_name)
+        if item_id:
+            return f"{self.base_url}/cdn/{version}/img/item/{item_id}.png"
         
         return None
 
     def find_champion(self, champions_data, search_term):
-        """Find champion by name (supports partial matching)"""
-        search_term = search_term.lower()
-        
-        # Exact match first
-        for champ_key, champ_data in champions_data.items():
-            if (champ_data['name'].lower() == search_term or 
-                champ_data['id'].lower() == search_term or
-                champ_key.lower() == search_term):
-                return champ_data
-        
-        # Partial match
-        for champ_key, champ_data in champions_data.items():
-            if (search_term in champ_data['name'].lower() or 
-                search_term in champ_data['id'].lower() or
-                search_term in champ_key.lower()):
-                return champ_data
-        
-        return None
+        """Find champion by name (chính xác > tiền tố > chứa chuỗi > gõ sai gần đúng)"""
+        return self.champion_index().find(search_term)
 
     @commands.command(name='champion', aliases=['champ', 'tuong'])
     async def champion_info(self, ctx, *, champion_name):
@@ -517,11 +434,7 @@ class LeagueOfLegends(commands.Cog):
             
             if not champion:
                 # Gợi ý tướng tương tự
-                suggestions = []
-                search_lower = champion_name.lower()
-                for champ_data in list(champions_data.values())[:10]:
-                    if any(word in champ_data['name'].lower() for word in search_lower.split()):
-                        suggestions.append(champ_data['name'])
+                suggestions = self.champion_index().suggest(champion_name, 5)
                 
                 suggestion_text = f"\n💡 **Có thể bạn muốn tìm:** {', '.join(suggestions[:5])}" if suggestions else ""
                 await ctx.send(f"❌ Không tìm thấy tướng **{champion_name}**!{suggestion_text}")
@@ -1082,32 +995,9 @@ class LeagueOfLegends(commands.Cog):
                 await ctx.send("❌ Không thể tải dữ liệu items!")
                 return
             
-            # Tìm item (hỗ trợ tên tiếng Việt)
-            found_item = None
-            found_item_id = None
-            
-            # Tìm bằng tên tiếng Việt trước
-            english_name = None
-            for eng, viet in self.items_vietnamese.items():
-                if viet.lower() == item_name.lower() or eng.lower() == item_name.lower():
-                    english_name = eng
-                    break
-            
-            if english_name:
-                # Tìm item data
-                for item_id, item_info in items_data.items():
-                    if item_info.get('name', '').lower() == english_name.lower():
-                        found_item = item_info
-                        found_item_id = item_id
-                        break
-            else:
-                # Tìm trực tiếp bằng tên
-                for item_id, item_info in items_data.items():
-                    if item_name.lower() in item_info.get('name', '').lower():
-                        found_item = item_info
-                        found_item_id = item_id
-                        break
-            
+            # Tìm item (hỗ trợ tên tiếng Việt, gõ thiếu/sai)
+            found_item_id, found_item = self.item_index().find(item_name)
+
             if not found_item:
                 await ctx.send(f"❌ Không tìm thấy item **{item_name}**!\n"
                               "💡 Thử tìm với tên tiếng Anh hoặc tiếng Việt")
@@ -1462,9 +1352,37 @@ class LeagueOfLegends(commands.Cog):
         await ctx.send(embed=embed)
 
     # =============== SLASH COMMANDS ===============
+
+    async def champion_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Gợi ý tên tướng khi gõ (chỉ đọc chỉ mục trong bộ nhớ, không gọi mạng)"""
+        if not self.ddragon.snapshot:
+            return []
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in self.champion_index().suggest(current, 25)
+        ]
+
+    async def item_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Gợi ý tên item (hiện cả tên tiếng Việt), không gọi mạng"""
+        if not self.ddragon.snapshot:
+            return []
+        choices = []
+        seen = set()
+        # Data Dragon có nhiều item trùng tên (bản theo map), lấy dư rồi bỏ trùng
+        for name in self.item_index().suggest(current, 50):
+            if name in seen:
+                continue
+            seen.add(name)
+            vietnamese_name = self.get_item_vietnamese_name(name)
+            label = f"{vietnamese_name} ({name})" if vietnamese_name != name else name
+            choices.append(app_commands.Choice(name=label[:100], value=name[:100]))
+            if len(choices) >= 25:
+                break
+        return choices
     
     @app_commands.command(name="champion", description="Xem thông tin tướng League of Legends")
     @app_commands.describe(champion_name="Tên tướng cần tra cứu")
+    @app_commands.autocomplete(champion_name=champion_autocomplete)
     async def slash_champion(self, interaction: discord.Interaction, champion_name: str):
         """Slash command for champion info"""
         await interaction.response.defer()
@@ -1478,11 +1396,8 @@ class LeagueOfLegends(commands.Cog):
         champion = self.find_champion(champions_data, champion_name)
         
         if not champion:
-            suggestions = []
-            search_lower = champion_name.lower()
-            for champ_data in list(champions_data.values())[:10]:
-                if any(word in champ_data['name'].lower() for word in search_lower.split()):
-                    suggestions.append(champ_data['name'])
+            # Gợi ý tướng tương tự
+            suggestions = self.champion_index().suggest(champion_name, 5)
             
             suggestion_text = f"\n💡 **Có thể bạn muốn tìm:** {', '.join(suggestions[:5])}" if suggestions else ""
             await interaction.followup.send(f"❌ Không tìm thấy tướng **{champion_name}**!{suggestion_text}")
@@ -1528,6 +1443,7 @@ class LeagueOfLegends(commands.Cog):
 
     @app_commands.command(name="counter", description="Xem thông tin counter chi tiết cho tướng")
     @app_commands.describe(champion_name="Tên tướng cần xem counter")
+    @app_commands.autocomplete(champion_name=champion_autocomplete)
     async def slash_counter(self, interaction: discord.Interaction, champion_name: str):
         """Slash command for champion counter info"""
         await interaction.response.defer()
@@ -1591,6 +1507,7 @@ class LeagueOfLegends(commands.Cog):
 
     @app_commands.command(name="item", description="Xem thông tin chi tiết về item")
     @app_commands.describe(item_name="Tên item (tiếng Việt hoặc tiếng Anh)")
+    @app_commands.autocomplete(item_name=item_autocomplete)
     async def slash_item(self, interaction: discord.Interaction, item_name: str):
         """Slash command for item info"""
         await interaction.response.defer()
@@ -1602,30 +1519,9 @@ class LeagueOfLegends(commands.Cog):
             await interaction.followup.send("❌ Không thể tải dữ liệu items!", ephemeral=True)
             return
         
-        # Find item
-        found_item = None
-        found_item_id = None
-        
-        # Search by Vietnamese name first
-        english_name = None
-        for eng, viet in self.items_vietnamese.items():
-            if viet.lower() == item_name.lower() or eng.lower() == item_name.lower():
-                english_name = eng
-                break
-        
-        if english_name:
-            for item_id, item_info in items_data.items():
-                if item_info.get('name', '').lower() == english_name.lower():
-                    found_item = item_info
-                    found_item_id = item_id
-                    break
-        else:
-            for item_id, item_info in items_data.items():
-                if item_name.lower() in item_info.get('name', '').lower():
-                    found_item = item_info
-                    found_item_id = item_id
-                    break
-        
+        # Tìm item (hỗ trợ tên tiếng Việt, gõ thiếu/sai)
+        found_item_id, found_item = self.item_index().find(item_name)
+
         if not found_item:
             await interaction.followup.send(f"❌ Không tìm thấy item **{item_name}**!")
             return
@@ -1655,6 +1551,7 @@ class LeagueOfLegends(commands.Cog):
     
     @app_commands.command(name="build", description="Xem build gợi ý cho tướng")
     @app_commands.describe(champion_name="Tên tướng cần xem build")
+    @app_commands.autocomplete(champion_name=champion_autocomplete)
     async def slash_build(self, interaction: discord.Interaction, champion_name: str):
         """Slash command for champion build"""
         await interaction.response.defer()
@@ -2,6 +2,10 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import asyncio
+from utils.message_dispatch import message_dispatcher
+
+# Các cách gọi bot mở menu chính
+MENU_TRIGGERS = ('bot ơi', 'bot oi', 'bot ơy', 'bot oy', 'hey bot', 'hi bot')
 
 # Modal classes for text input
 class AskModal(discord.ui.Modal, title='🧠 Hỏi AI'):
@@ -810,7 +814,7 @@ class AdvancedMusicView(discord.ui.View):
                 color=discord.Color.blue()
             )
             
-            for i, song in enumerate(queue.history[-5:], 1):
+            for i, song in enumerate(list(queue.history)[-5:], 1):
                 embed.add_field(
                     name=f"{i}. {song.get('title', 'Unknown')[:30]}{'...' if len(song.get('title', '')) > 30 else ''}",
                     value=f"👤 {song.get('uploader', 'Unknown')[:20]}",
@@ -1378,47 +1382,43 @@ class MenuSystemCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    @commands.Cog.listener()
+    async def cog_load(self):
+        message_dispatcher.register('menu_system', self.on_message, triggers=MENU_TRIGGERS)
+
+    async def cog_unload(self):
+        message_dispatcher.unregister('menu_system')
+
     async def on_message(self, message):
-        """Lắng nghe tin nhắn để phát hiện 'bot ơi' hoặc 'bot oi'"""
-        if message.author.bot:
-            return
+        """Mở menu khi tin nhắn có 'bot ơi', 'bot oi'... (dispatcher đã khớp MENU_TRIGGERS)"""
+        # Tạo main menu embed
+        embed = discord.Embed(
+            title="🤖 KSC Support - Menu Chính",
+            description="**Chào mừng bạn đến với KSC Support!**\n\nBot đa chức năng với AI, Music, Games và nhiều tính năng thú vị khác.\n\n🔥 **Tính năng HOT:**\n• 🧠 AI Chat với Gemini\n• 🎨 Tạo ảnh AI với 10+ styles\n• 🎵 Music bot với Playlist\n• 📊 Analytics real-time\n\n**Chọn một danh mục bên dưới để xem chi tiết:**",
+            color=discord.Color.blurple()
+        )
         
-        content = message.content.lower().strip()
+        # Thêm thông tin user
+        embed.add_field(
+            name="👋 Xin chào!",
+            value=f"Chào {message.author.mention}! Tôi có thể giúp gì cho bạn?",
+            inline=False
+        )
         
-        # Kiểm tra các cách gọi bot
-        triggers = ['bot ơi', 'bot oi', 'bot ơy', 'bot oy', 'hey bot', 'hi bot']
+        embed.set_footer(text="💡 Menu sẽ đóng sau 60s và tự động xóa sau 5 phút | KSC Support v3.0.0")
         
-        if any(trigger in content for trigger in triggers):
-            # Tạo main menu embed
-            embed = discord.Embed(
-                title="🤖 KSC Support - Menu Chính",
-                description="**Chào mừng bạn đến với KSC Support!**\n\nBot đa chức năng với AI, Music, Games và nhiều tính năng thú vị khác.\n\n🔥 **Tính năng HOT:**\n• 🧠 AI Chat với Gemini\n• 🎨 Tạo ảnh AI với 10+ styles\n• 🎵 Music bot với Playlist\n• 📊 Analytics real-time\n\n**Chọn một danh mục bên dưới để xem chi tiết:**",
-                color=discord.Color.blurple()
-            )
-            
-            # Thêm thông tin user
-            embed.add_field(
-                name="👋 Xin chào!",
-                value=f"Chào {message.author.mention}! Tôi có thể giúp gì cho bạn?",
-                inline=False
-            )
-            
-            embed.set_footer(text="💡 Menu sẽ đóng sau 60s và tự động xóa sau 5 phút | KSC Support v3.0.0")
+        # Tạo view với buttons
+        view = MenuView(self.bot)
+        
+        try:
+            msg = await message.channel.send(embed=embed, view=view)
+            view.message = msg  # Lưu message để có thể edit sau
             
-            # Tạo view với buttons
-            view = MenuView(self.bot)
+            # Không cần auto-delete thủ công nữa vì auto_cleanup sẽ xử lý
             
-            try:
-                msg = await message.channel.send(embed=embed, view=view)
-                view.message = msg  # Lưu message để có thể edit sau
-                
-                # Không cần auto-delete thủ công nữa vì auto_cleanup sẽ xử lý
-                
-            except discord.Forbidden:
-                await message.channel.send("❌ Bot không có quyền gửi embed. Vui lòng kiểm tra permissions!")
-            except Exception as e:
-                await message.channel.send(f"❌ Có lỗi xảy ra: {str(e)}")
+        except discord.Forbidden:
+            await message.channel.send("❌ Bot không có quyền gửi embed. Vui lòng kiểm tra permissions!")
+        except Exception as e:
+            await message.channel.send(f"❌ Có lỗi xảy ra: {str(e)}")
 
     @commands.command(name="menu")
     async def manual_menu(self, ctx):
@@ -6,9 +6,15 @@ import yt_dlp # type: ignore
 import os
 import re
 import random
-from collections import deque
+import time
+from collections import deque, OrderedDict, Counter
+from urllib.parse import urlparse, parse_qs
 import logging
 from utils.channel_manager import ChannelManager
+from utils.prefetch import QueuePrefetcher
+from utils.extraction import extraction_scheduler, PRIORITY_PLAY, PRIORITY_QUEUE, PRIORITY_PREFETCH
+from utils.search_cache import search_cache, compact_entry
+from utils.tracks import TrackRecord
 
 # Suppress noise about console usage from errors
 def _suppress_bug_reports(*args, **kwargs):
@@ -45,6 +51,139 @@ ffmpeg_options = {
 
 ytdl = yt_dlp.YoutubeDL(ytdl_format_options)
 
+# Playlist: chỉ lấy danh sách bài (không resolve formats), video đơn vẫn extract đầy đủ
+ytdl_flat = yt_dlp.YoutubeDL({**ytdl_format_options, 'extract_flat': 'in_playlist'})
+
+# Stream URL đã resolve (googlevideo) có hạn dùng - phải còn đủ thời gian phát hết bài
+STREAM_EXPIRY_MARGIN = 60  # giây dự phòng cho reconnect/buffer
+DEFAULT_STREAM_TTL = 300  # URL không có expire= (nguồn khác YouTube)
+MAX_RESOLVED_STREAMS = 512
+
+# Số bài lỗi liên tiếp (riêng tư/bị xóa) tối đa trước khi play_next dừng hẳn
+MAX_CONSECUTIVE_FAILURES = 3
+
+
+def parse_stream_expiry(media_url):
+    """Đọc thời điểm hết hạn (epoch) từ tham số expire= của URL đã ký"""
+    if not media_url:
+        return None
+    try:
+        parsed = urlparse(media_url)
+        values = parse_qs(parsed.query).get('expire')
+        if values:
+            return int(values[0])
+        # Manifest URL dạng .../expire/1700000000/...
+        match = re.search(r'/expire/(\d+)', parsed.path)
+        if match:
+            return int(match.group(1))
+    except (ValueError, TypeError):
+        pass
+    return None
+
+
+def is_resolved_entry(data):
+    """Entry đã có media URL (không phải kết quả extract_flat)"""
+    return bool(data and data.get('format_id') and data.get('url'))
+
+
+def playlist_placeholder(entry):
+    """Entry nhẹ từ extract_flat - media URL sẽ được resolve ngay trước khi phát"""
+    if entry.get('_type') not in ('url', 'url_transparent'):
+        return entry  # Đã extract đầy đủ
+    
+    webpage_url = entry.get('webpage_url') or entry.get('url') or ''
+    if webpage_url and not webpage_url.startswith('http'):
+        webpage_url = f"https://www.youtube.com/watch?v={entry.get('id') or webpage_url}"
+    
+    thumbnail = entry.get('thumbnail')
+    if not thumbnail and entry.get('thumbnails'):
+        thumbnail = entry['thumbnails'][-1].get('url')
+    
+    return {
+        'id': entry.get('id'),
+        'title': entry.get('title') or webpage_url,
+        'uploader': entry.get('uploader') or entry.get('channel'),
+        'duration': entry.get('duration'),
+        'webpage_url': webpage_url,
+        'thumbnail': thumbnail,
+    }
+
+
+class ResolvedStream:
+    """Media URL đã resolve của một bài hát cùng thời điểm hết hạn"""
+    __slots__ = ('url', 'expires_at', 'data')
+
+    def __init__(self, url, expires_at, data):
+        self.url = url
+        self.expires_at = expires_at
+        self.data = data
+
+    def is_fresh(self, duration=None):
+        """URL còn hạn đủ để phát hết bài (cộng thêm khoảng dự phòng)"""
+        try:
+            needed = STREAM_EXPIRY_MARGIN + int(float(duration or 0))
+        except (ValueError, TypeError):
+            needed = STREAM_EXPIRY_MARGIN
+        return self.expires_at - time.time() > needed
+
+
+class StreamResolver:
+    """Giữ media URL đã resolve của từng bài để play_next không phải chạy lại yt-dlp"""
+
+    def __init__(self, max_entries=MAX_RESOLVED_STREAMS):
+        self.max_entries = max_entries
+        self._streams = OrderedDict()  # webpage_url -> ResolvedStream
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(data):
+        return data.get('webpage_url') or data.get('original_url') or data.get('url')
+
+    def remember(self, data):
+        """Lưu media URL vừa extract (gọi ngay sau extract_info)"""
+        if not is_resolved_entry(data):
+            return None
+        key = self._key(data)
+        if not key:
+            return None
+
+        expires_at = parse_stream_expiry(data['url']) or time.time() + DEFAULT_STREAM_TTL
+        # Chỉ giữ vài trường cần để phát lại, không giữ cả danh sách formats của yt-dlp
+        compact = compact_entry(data)
+        compact['url'] = data['url']
+        stream = ResolvedStream(data['url'], expires_at, compact)
+        self._streams[key] = stream
+        self._streams.move_to_end(key)
+
+        while len(self._streams) > self.max_entries:
+            self._streams.popitem(last=False)
+        return stream
+
+    def has_fresh(self, data):
+        """Kiểm tra (không tính thống kê) entry đã có stream còn hạn chưa"""
+        key = self._key(data)
+        stream = self._streams.get(key) if key else None
+        return bool(stream and stream.is_fresh(data.get('duration')))
+
+    def lookup(self, data):
+        """Trả về stream còn hạn cho entry, hoặc None nếu phải extract lại"""
+        key = self._key(data)
+        stream = self._streams.get(key) if key else None
+
+        # Entry chưa được ghi nhận nhưng đã mang URL có expire= (vd: kết quả Auto DJ)
+        if stream is None and is_resolved_entry(data) and parse_stream_expiry(data['url']):
+            stream = self.remember(data)
+
+        if stream and stream.is_fresh(data.get('duration')):
+            self.hits += 1
+            return stream
+
+        if stream:
+            self._streams.pop(key, None)
+        self.misses += 1
+        return None
+
 
 class YTDLSource(discord.PCMVolumeTransformer):
     def __init__(self, source, *, data, volume=0.5):
@@ -57,13 +196,11 @@ class YTDLSource(discord.PCMVolumeTransformer):
         self.thumbnail = data.get('thumbnail')
 
     @classmethod
-    async def from_url(cls, url, *, loop=None, stream=False):
+    async def from_url(cls, url, *, loop=None, stream=False, guild_id=None, priority=PRIORITY_PLAY):
         print(f"🔧 YTDLSource.from_url called")
         print(f"🔗 URL: {url[:50]}...")
         print(f"📡 Stream: {stream}")
         
-        loop = loop or asyncio.get_event_loop()
-        
         def extract_info():
             print(f"📦 Extracting info from yt-dlp...")
             try:
@@ -75,7 +212,7 @@ class YTDLSource(discord.PCMVolumeTransformer):
                 raise
             
         try:
-            data = await loop.run_in_executor(None, extract_info)
+            data = await extraction_scheduler.run(extract_info, guild_id=guild_id, priority=priority)
             if 'entries' in data:
                 data = data['entries'][0]
             
@@ -101,17 +238,50 @@ class YTDLSource(discord.PCMVolumeTransformer):
             raise
 
     @classmethod
-    async def search_youtube(cls, search_term, *, loop=None):
-        loop = loop or asyncio.get_event_loop()
+    async def extract_stream(cls, url, *, loop=None, guild_id=None, priority=PRIORITY_PREFETCH):
+        """Chỉ extract info (không tạo FFmpeg) - dùng cho prefetch"""
+        data = await extraction_scheduler.run(
+            lambda: ytdl.extract_info(url, download=False),
+            guild_id=guild_id, priority=priority
+        )
+        if data and 'entries' in data:
+            data = data['entries'][0]
+        return data
+
+    @classmethod
+    def from_data(cls, data):
+        """Tạo player trực tiếp từ info đã extract, không gọi lại yt-dlp"""
+        audio_source = discord.FFmpegPCMAudio(
+            data['url'],
+            before_options=ffmpeg_options['before_options'],
+            options=ffmpeg_options['options']
+        )
+        return cls(audio_source, data=data)
+
+    @classmethod
+    def from_stream(cls, stream):
+        """Tạo player từ media URL đã resolve"""
+        return cls.from_data(stream.data)
+
+    @classmethod
+    async def search_youtube(cls, search_term, *, loop=None, guild_id=None, priority=PRIORITY_PLAY):
+        # Query lặp lại (Auto DJ, bài phổ biến) trả về ngay từ cache
+        cached = await search_cache.get('youtube', search_term)
+        if cached:
+            print(f"⚡ Search cache hit: {search_term}")
+            return dict(cached[0])
+        
         try:
             def search_func():
                 print(f"🔍 Searching YouTube for: {search_term}")
                 return ytdl.extract_info(f"ytsearch:{search_term}", download=False)
             
-            data = await loop.run_in_executor(None, search_func)
+            data = await extraction_scheduler.run(search_func, guild_id=guild_id, priority=priority)
             if 'entries' in data and len(data['entries']) > 0:
                 result = data['entries'][0]
                 print(f"✅ Found: {result.get('title', 'Unknown title')}")
+                if result:
+                    await search_cache.set('youtube', search_term, [compact_entry(result)])
                 return result
             else:
                 print(f"❌ No results found for: {search_term}")
@@ -127,34 +297,74 @@ class YTDLSource(discord.PCMVolumeTransformer):
 
 
 class MusicQueue:
+    HISTORY_SIZE = 50  # Số bài giữ trong lịch sử
+    RECENT_WINDOW = 15  # Auto DJ không lặp lại các bài trong cửa sổ này
+    preferred_genres = (
+        "nhạc việt nam", "vpop", "ballad việt", "rap việt", "indie việt",
+        "nhạc lofi việt", "acoustic việt", "nhạc trẻ việt nam"
+    )  # Ưu tiên nhạc Việt cho Auto DJ
+
+    __slots__ = (
+        'queue', '_current', 'loop_song', 'loop_queue', 'loop_mode', 'auto_dj', 'auto_dj_24_7',
+        'history', '_recent_urls', '_recent_counts', 'playlists', 'is_paused', 'on_change',
+        'crossfade_duration'
+    )
+
     def __init__(self):
-        self.queue = deque()
-        self.current = None
+        self.queue = deque()  # deque[TrackRecord]
+        self._current = None
         self.loop_song = False
         self.loop_queue = False
         self.loop_mode = "off"  # "off", "song", "queue"
         self.auto_dj = False
         self.auto_dj_24_7 = False  # 24/7 mode
-        self.history = []  # Store played songs
+        self.history = deque(maxlen=self.HISTORY_SIZE)  # Store played songs
+        self._recent_urls = deque()  # webpage_url của RECENT_WINDOW bài gần nhất
+        self._recent_counts = Counter()
         self.playlists = {}  # user_id: {playlist_name: [songs]}
-        self.preferred_genres = [
-            "nhạc việt nam", "vpop", "ballad việt", "rap việt", "indie việt",
-            "nhạc lofi việt", "acoustic việt", "nhạc trẻ việt nam"
-        ]  # Ưu tiên nhạc Việt cho Auto DJ
         
         # State tracking
         self.is_paused = False
+        self.on_change = None  # Callback khi queue đổi thứ tự (prefetch)
+        self.crossfade_duration = 3.0  # DJ Mode (menu_system)
+
+    @property
+    def current(self):
+        return self._current
+
+    @current.setter
+    def current(self, song):
+        self._current = TrackRecord.from_info(song)
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change(self.queue)
+
+    def _add_history(self, song):
+        self.history.append(song)
+        
+        # Cập nhật tập URL gần đây theo kiểu cửa sổ trượt (O(1))
+        url = song.get('webpage_url')
+        self._recent_urls.append(url)
+        self._recent_counts[url] += 1
+        if len(self._recent_urls) > self.RECENT_WINDOW:
+            old_url = self._recent_urls.popleft()
+            self._recent_counts[old_url] -= 1
+            if self._recent_counts[old_url] <= 0:
+                del self._recent_counts[old_url]
+
+    def played_recently(self, webpage_url):
+        """Bài có nằm trong RECENT_WINDOW bài vừa phát không"""
+        return webpage_url in self._recent_counts
 
     def add(self, song):
-        self.queue.append(song)
+        self.queue.append(TrackRecord.from_info(song))
+        self._changed()
 
     def get_next(self):
         # Add current song to history if exists
         if self.current:
-            self.history.append(self.current)
-            # Keep only last 50 songs in history
-            if len(self.history) > 50:
-                self.history.pop(0)
+            self._add_history(self.current)
         
         # Handle loop modes
         if self.loop_mode == "song" and self.current:
@@ -175,13 +385,22 @@ class MusicQueue:
             
         return None
 
+    def discard_requeued(self, song):
+        """Bỏ bài vừa được loop queue đưa lại cuối hàng (bài không phát được)"""
+        if self.queue and self.queue[-1] is song:
+            self.queue.pop()
+            self._changed()
+
     def clear(self):
         self.queue.clear()
         self.current = None
+        self._changed()
 
     def skip(self):
         if len(self.queue) > 0:
-            return self.queue.popleft()
+            song = self.queue.popleft()
+            self._changed()
+            return song
         return None
 
     def shuffle(self):
@@ -189,6 +408,7 @@ class MusicQueue:
         queue_list = list(self.queue)
         random.shuffle(queue_list)
         self.queue = deque(queue_list)
+        self._changed()
         
     def save_playlist(self, user_id, playlist_name, songs):
         """Lưu playlist của user"""
@@ -254,6 +474,7 @@ class MusicControlView(discord.ui.View):
         if music_cog:
             queue = music_cog.get_queue(self.guild_id)
             queue.clear()
+            music_cog.prefetcher.cancel(self.guild_id)
             
             guild = self.bot.get_guild(self.guild_id)
             if guild and guild.voice_client:
@@ -422,13 +643,36 @@ class MusicCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.music_queues = {}  # Guild ID -> MusicQueue
+        self.streams = StreamResolver()  # Media URL đã resolve của các bài trong queue
+        self.prefetcher = QueuePrefetcher(
+            self._prefetch_stream,
+            loop=bot.loop,
+            depth=bot.config.get('music_prefetch_depth', 2),
+            name='youtube'
+        )
         # Per-guild HQ config
         self.hq_settings = {}  # guild_id -> {'normalize': bool}
 
     def get_queue(self, guild_id):
         if guild_id not in self.music_queues:
-            self.music_queues[guild_id] = MusicQueue()
+            queue = MusicQueue()
+            queue.on_change = lambda songs, guild_id=guild_id: self.prefetcher.sync(guild_id, songs)
+            self.music_queues[guild_id] = queue
         return self.music_queues[guild_id]
+
+    async def _prefetch_stream(self, guild_id, data):
+        """Resolve trước media URL cho bài sắp phát (chạy nền)"""
+        if self.streams.has_fresh(data):
+            return data
+        resolved = await YTDLSource.extract_stream(data.get('webpage_url') or data.get('url'), guild_id=guild_id)
+        self.streams.remember(resolved)
+        return resolved
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        """Bot rời voice (stop/leave/bị kick/mất kết nối) -> hủy prefetch còn lại của guild"""
+        if member.id == self.bot.user.id and before.channel and after.channel is None:
+            self.prefetcher.cancel(member.guild.id)
     
     def format_duration(self, duration):
         """Format duration from seconds to MM:SS"""
@@ -523,15 +767,20 @@ class MusicCog(commands.Cog):
             print(f"🔧 FFmpeg options: {ffmpeg_opts}")
             print(f"🔧 FFmpeg before_opts: {before_opts}")
             
-            # Debug: Log data structure
-            print(f"📊 YouTube data keys: {list(data.keys())}")
-            
-            # YouTube thông thường với cấu hình tối ưu
-            player = await YTDLSource.from_url(
-                data.get('webpage_url', ''), 
-                loop=self.bot.loop, 
-                stream=True
-            )
+            # Chờ prefetch nền (nếu có) rồi dùng lại media URL còn hạn
+            await self.prefetcher.take(guild_id, data)
+            stream = self.streams.lookup(data)
+            if stream:
+                print(f"⚡ Reusing resolved stream (expires in {int(stream.expires_at - time.time())}s)")
+                player = YTDLSource.from_stream(stream)
+            else:
+                player = await YTDLSource.from_url(
+                    data.get('webpage_url') or data.get('url', ''), 
+                    loop=self.bot.loop, 
+                    stream=True,
+                    guild_id=guild_id
+                )
+                self.streams.remember(player.data)
             
             # Debug: Check player properties
             print(f"🎵 Player created - Title: {getattr(player, 'title', 'No title')}")
@@ -628,12 +877,11 @@ class MusicCog(commands.Cog):
         for attempt in range(5):  # Thử tối đa 5 lần
             try:
                 search_term = smart_terms[attempt % len(smart_terms)]
-                data = await YTDLSource.search_youtube(search_term)
+                data = await YTDLSource.search_youtube(search_term, guild_id=guild_id)
                 
                 if data:
                     # Kiểm tra không phải bài đã phát gần đây
-                    recent_urls = [song.get('webpage_url', '') for song in queue.history[-15:]]
-                    if data.get('webpage_url') not in recent_urls:
+                    if not queue.played_recently(data.get('webpage_url')):
                         return data
                         
             except Exception as e:
@@ -643,17 +891,31 @@ class MusicCog(commands.Cog):
         # Fallback - tìm nhạc Việt cơ bản
         try:
             fallback_terms = ["vpop mv 2024", "nhạc việt mv", "trending vpop mv"]
-            data = await YTDLSource.search_youtube(random.choice(fallback_terms))
+            data = await YTDLSource.search_youtube(random.choice(fallback_terms), guild_id=guild_id)
             return data
         except:
             # Ultimate fallback
             try:
-                return await YTDLSource.search_youtube("vietnam mv")
+                return await YTDLSource.search_youtube("vietnam mv", guild_id=guild_id)
             except:
                 return None
 
     async def play_next(self, ctx):
-        """Play the next song in queue"""
+        """Play the next song in queue (bỏ qua bài lỗi, dừng sau MAX_CONSECUTIVE_FAILURES bài lỗi liên tiếp)"""
+        failures = 0
+        while True:
+            result = await self._play_next_once(ctx)
+            if result == 'failed':
+                failures += 1
+                if failures >= MAX_CONSECUTIVE_FAILURES:
+                    self.get_queue(ctx.guild.id).current = None
+                    await ctx.send(f"⚠️ {failures} bài liên tiếp không phát được, đã dừng phát. Gõ `!play` để phát tiếp.")
+                    return
+            elif result != 'retry':
+                return
+
+    async def _play_next_once(self, ctx):
+        """Phát bài kế tiếp một lần; 'failed' nếu bài lỗi và nên thử bài sau, 'retry' nếu Auto DJ cần thử lại"""
         queue = self.get_queue(ctx.guild.id)
         next_song = queue.get_next()
         
@@ -722,6 +984,7 @@ class MusicCog(commands.Cog):
                             print(f"❌ Error in play_next recursion: {e}")
                 
                 ctx.voice_client.play(player, after=after_playing)
+                self.prefetcher.sync(ctx.guild.id, queue.queue)
                 
                 # Update Music Manager state
                 if hasattr(self.bot, 'music_manager'):
@@ -776,6 +1039,11 @@ class MusicCog(commands.Cog):
                 if queue.auto_dj_24_7:
                     queue.auto_dj_24_7 = False
                     await ctx.send("⚠️ Auto DJ gặp lỗi liên tục và đã được tắt. Hãy kiểm tra lại sau.")
+                elif queue.queue and queue.loop_mode != "song" and ctx.voice_client and not ctx.voice_client.is_playing():
+                    # Bài trong playlist không resolve được (riêng tư/bị xóa) -> bỏ hẳn, không loop lại
+                    queue.discard_requeued(next_song)
+                    queue.current = None
+                    return 'failed'
         else:
             queue.current = None
             if not queue.auto_dj_24_7:
@@ -784,7 +1052,7 @@ class MusicCog(commands.Cog):
                 # Auto DJ 24/7 failed - try again in 30 seconds to avoid spam
                 print("⏳ Auto DJ waiting 30s before retry...")
                 await asyncio.sleep(30)
-                await self.play_next(ctx)
+                return 'retry'
 
     @commands.command(name='fix_volume')
     @commands.has_permissions(administrator=True)
@@ -820,8 +1088,8 @@ class MusicCog(commands.Cog):
             queue = self.get_queue(ctx.guild.id)
             queue_info = f"Current: {queue.current['title'] if queue.current else 'None'}\n"
             queue_info += f"Queue size: {len(queue.queue)}\n"
-            queue_info += f"Loop: {queue.loop}\n"
-            queue_info += f"Shuffle: {queue.shuffle_mode}"
+            queue_info += f"Loop: {queue.loop_mode}\n"
+            queue_info += f"History: {len(queue.history)}"
             
             embed.add_field(
                 name="📝 Queue Info",
@@ -868,6 +1136,32 @@ class MusicCog(commands.Cog):
             value=f"Songs in queue: {len(queue.queue)}\nCurrent: {queue.current.get('title', 'None') if queue.current else 'None'}",
             inline=True
         )
+        embed.add_field(
+            name="⚡ Stream Cache",
+            value=f"Hits: {self.streams.hits}\nMisses: {self.streams.misses}",
+            inline=True
+        )
+        
+        # Prefetch: thời gian chờ yt-dlp đã tiết kiệm ở ranh giới bài hát
+        prefetchers = [self.prefetcher]
+        soundcloud_cog = self.bot.get_cog('SoundCloudAdvanced')
+        if soundcloud_cog and hasattr(soundcloud_cog, 'prefetcher'):
+            prefetchers.append(soundcloud_cog.prefetcher)
+        if hasattr(self.bot, 'universal_player'):
+            prefetchers.append(self.bot.universal_player.prefetcher)
+        
+        prefetch_lines = []
+        for prefetcher in prefetchers:
+            stats = prefetcher.get_stats()
+            prefetch_lines.append(
+                f"{prefetcher.name}: {stats['hit_rate']:.0f}% hit, "
+                f"tiết kiệm {stats['saved_seconds']:.1f}s (~{stats['avg_saved']:.2f}s/bài)"
+            )
+        embed.add_field(
+            name="⏩ Prefetch",
+            value="\n".join(prefetch_lines),
+            inline=False
+        )
         
         # Check ffmpeg
         try:
@@ -889,6 +1183,44 @@ class MusicCog(commands.Cog):
         
         await ctx.send(embed=embed)
 
+    @commands.command(name='extractstats', aliases=['ytdlstats'])
+    async def extraction_stats(self, ctx):
+        """Thống kê hàng đợi yt-dlp (độ sâu queue, độ trễ)"""
+        stats = extraction_scheduler.get_stats()
+        embed = discord.Embed(
+            title="📥 yt-dlp Extraction Scheduler",
+            color=0x0099ff
+        )
+        embed.add_field(
+            name="⚙️ Cấu hình",
+            value=f"Workers: {stats['workers']}\nGiới hạn mỗi server: {stats['per_guild']}",
+            inline=True
+        )
+        embed.add_field(
+            name="📊 Hiện tại",
+            value=f"Đang chạy: {stats['running']}\nĐang chờ: {stats['queued']}\nServer đang dùng: {stats['busy_guilds']}",
+            inline=True
+        )
+        embed.add_field(
+            name="📈 Tổng cộng",
+            value=f"Đã gửi: {stats['submitted']}\nHoàn thành: {stats['completed']}\nLỗi: {stats['failed']}",
+            inline=True
+        )
+        embed.add_field(
+            name="⏱️ Độ trễ",
+            value=f"Chờ: {stats['wait_avg'] * 1000:.0f}ms (p95 {stats['wait_p95'] * 1000:.0f}ms)\n"
+                  f"Extract: {stats['run_avg']:.2f}s (p95 {stats['run_p95']:.2f}s)",
+            inline=False
+        )
+        cache_stats = search_cache.get_stats()
+        embed.add_field(
+            name="🗂️ Search Cache",
+            value=f"Hit: {cache_stats['hit_rate']:.0f}% (RAM {cache_stats['memory_hits']}, disk {cache_stats['disk_hits']})\n"
+                  f"Miss: {cache_stats['misses']} • TTL: {cache_stats['ttl'] // 3600}h",
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
     @ChannelManager.music_only()
     @commands.command(name='play', aliases=['nhac'])
     async def play(self, ctx, *, search):
@@ -936,78 +1268,78 @@ class MusicCog(commands.Cog):
             if url_pattern.match(search):
                 # Hỗ trợ YouTube URLs và Playlists
                 try:
-                    loop = self.bot.loop or asyncio.get_event_loop()
                     def extract_url_info():
-                        # Cho phép playlist extraction
-                        return ytdl.extract_info(search, download=False)
-                    data = await loop.run_in_executor(None, extract_url_info)
+                        # Playlist chỉ lấy danh sách (flat), từng bài resolve lúc sắp phát
+                        return ytdl_flat.extract_info(search, download=False)
+                    data = await extraction_scheduler.run(extract_url_info, guild_id=ctx.guild.id)
                     
                     # Kiểm tra nếu là playlist
                     if 'entries' in data and len(data['entries']) > 1:
                         # Đây là playlist
                         playlist_title = data.get('title', 'YouTube Playlist')
-                        entries = data['entries']
+                        entries = [playlist_placeholder(entry) for entry in data['entries'] if entry]
                         
                         await ctx.send(f"🎵 Đang thêm playlist: **{playlist_title}** ({len(entries)} bài hát)...")
                         
                         queue = self.get_queue(ctx.guild.id)
-                        added_count = 0
+                        play_first = bool(entries) and not ctx.voice_client.is_playing() and not ctx.voice_client.is_paused()
+                        
+                        # Xếp placeholder vào queue ngay, prefetch sẽ resolve dần các bài kế tiếp
+                        for entry in (entries[1:] if play_first else entries):
+                            queue.add(entry)
+                        added_count = len(entries) - 1 if play_first else len(entries)
                         
-                        # Thêm từng bài vào queue
-                        for i, entry in enumerate(entries):
-                            if entry:  # Kiểm tra entry không null
-                                try:
-                                    if not ctx.voice_client.is_playing() and not ctx.voice_client.is_paused() and i == 0:
-                                        # Phát bài đầu tiên ngay
-                                        player = await self.create_player(entry, ctx.guild.id)
-                                        queue.current = entry
-                                        
-                                        def after_playing(error):
-                                            if error:
-                                                print(f"❌ Player error: {error}")
-                                                if self.is_ffmpeg_expected_error(str(error)):
-                                                    print(f"✅ Expected FFmpeg error - continuing normally")
-                                                else:
-                                                    print(f"⚠️ Unexpected error: {error}")
-                                            else:
-                                                print(f"✅ Song finished playing normally")
-                                            
-                                            if ctx.voice_client and ctx.voice_client.is_connected():
-                                                try:
-                                                    coro = self.play_next(ctx)
-                                                    asyncio.run_coroutine_threadsafe(coro, self.bot.loop)
-                                                except Exception as next_error:
-                                                    print(f"❌ Error scheduling next song: {next_error}")
-                                        
-                                        ctx.voice_client.play(player, after=after_playing)
-                                        added_count += 1
-                                        
-                                        # Hiển thị embed cho bài đầu tiên
-                                        platform_info = "🎬 YouTube Playlist"
-                                        embed = discord.Embed(title="🎵 Đang phát từ playlist", description=f"**{player.title}**", color=0x00ff00)
-                                        embed.add_field(name="Nền tảng", value=platform_info, inline=True)
-                                        if player.uploader:
-                                            embed.add_field(name="Kênh", value=player.uploader, inline=True)
-                                        if entry.get('duration'):
-                                            embed.add_field(name="Thời lượng", value=self.format_duration(entry['duration']), inline=True)
-                                        embed.add_field(name="Playlist", value=f"{playlist_title} (bài 1/{len(entries)})", inline=False)
-                                        if player.thumbnail:
-                                            embed.set_thumbnail(url=player.thumbnail)
-                                        
-                                        view = MusicControlView(self.bot, ctx.guild.id)
-                                        view.message = await ctx.send(embed=embed, view=view)
-                                        
-                                        # Đăng ký message để auto cleanup sau 10 phút
-                                        auto_cleanup_cog = self.bot.get_cog('AutoCleanupCog')
-                                        if auto_cleanup_cog:
-                                            auto_cleanup_cog.add_message_for_cleanup(view.message, delete_after=600)
+                        if play_first:
+                            entry = entries[0]
+                            try:
+                                # Phát bài đầu tiên ngay khi resolve xong
+                                player = await self.create_player(entry, ctx.guild.id)
+                                queue.current = entry
+                                
+                                def after_playing(error):
+                                    if error:
+                                        print(f"❌ Player error: {error}")
+                                        if self.is_ffmpeg_expected_error(str(error)):
+                                            print(f"✅ Expected FFmpeg error - continuing normally")
+                                        else:
+                                            print(f"⚠️ Unexpected error: {error}")
                                     else:
-                                        # Thêm vào queue
-                                        queue.add(entry)
-                                        added_count += 1
-                                except Exception as e:
-                                    print(f"❌ Error processing playlist entry {i+1}: {e}")
-                                    continue
+                                        print(f"✅ Song finished playing normally")
+                                    
+                                    if ctx.voice_client and ctx.voice_client.is_connected():
+                                        try:
+                                            coro = self.play_next(ctx)
+                                            asyncio.run_coroutine_threadsafe(coro, self.bot.loop)
+                                        except Exception as next_error:
+                                            print(f"❌ Error scheduling next song: {next_error}")
+                                
+                                ctx.voice_client.play(player, after=after_playing)
+                                self.prefetcher.sync(ctx.guild.id, queue.queue)
+                                added_count += 1
+                                
+                                # Hiển thị embed cho bài đầu tiên
+                                platform_info = "🎬 YouTube Playlist"
+                                embed = discord.Embed(title="🎵 Đang phát từ playlist", description=f"**{player.title}**", color=0x00ff00)
+                                embed.add_field(name="Nền tảng", value=platform_info, inline=True)
+                                if player.uploader:
+                                    embed.add_field(name="Kênh", value=player.uploader, inline=True)
+                                if entry.get('duration'):
+                                    embed.add_field(name="Thời lượng", value=self.format_duration(entry['duration']), inline=True)
+                                embed.add_field(name="Playlist", value=f"{playlist_title} (bài 1/{len(entries)})", inline=False)
+                                if player.thumbnail:
+                                    embed.set_thumbnail(url=player.thumbnail)
+                                
+                                view = MusicControlView(self.bot, ctx.guild.id)
+                                view.message = await ctx.send(embed=embed, view=view)
+                                
+                                # Đăng ký message để auto cleanup sau 10 phút
+                                auto_cleanup_cog = self.bot.get_cog('AutoCleanupCog')
+                                if auto_cleanup_cog:
+                                    auto_cleanup_cog.add_message_for_cleanup(view.message, delete_after=600)
+                            except Exception as e:
+                                # Bài đầu không phát được (video riêng tư/bị xóa) -> chuyển sang bài kế
+                                print(f"❌ Error processing playlist entry 1: {e}")
+                                await self.play_next(ctx)
                         
                         if added_count > 1:
                             await ctx.send(f"✅ Đã thêm **{added_count}** bài hát từ playlist vào queue!")
@@ -1017,7 +1349,7 @@ class MusicCog(commands.Cog):
                         
                     elif 'entries' in data:
                         # Single video from playlist URL
-                        data = data['entries'][0]
+                        data = playlist_placeholder(data['entries'][0]) if data['entries'] and data['entries'][0] else None
                     
                     if not data:
                         await ctx.send("❌ Không thể tải nhạc từ URL này!")
@@ -1026,7 +1358,7 @@ class MusicCog(commands.Cog):
                     await ctx.send(f"❌ Lỗi: {e}")
                     return
             else:
-                data = await YTDLSource.search_youtube(search)
+                data = await YTDLSource.search_youtube(search, guild_id=ctx.guild.id)
                 if not data:
                     await ctx.send("❌ Không tìm thấy bài hát trên YouTube!\n"
                                  "💡 **Gợi ý:**\n"
@@ -1035,6 +1367,8 @@ class MusicCog(commands.Cog):
                                  "• Kiểm tra chính tả tên bài hát")
                     return
             
+            # Ghi nhận media URL vừa extract để lúc phát không phải extract lại
+            self.streams.remember(data)
             queue = self.get_queue(ctx.guild.id)
             if not ctx.voice_client.is_playing() and not ctx.voice_client.is_paused():
                 try:
@@ -1068,6 +1402,7 @@ class MusicCog(commands.Cog):
                     
                     print(f"🎵 Starting playback...")
                     ctx.voice_client.play(player, after=after_playing)
+                    self.prefetcher.sync(ctx.guild.id, queue.queue)
                     print(f"🔊 Is playing: {ctx.voice_client.is_playing()}")
                     print(f"🔊 Is paused: {ctx.voice_client.is_paused()}")
                     
@@ -1144,6 +1479,7 @@ class MusicCog(commands.Cog):
         """Dừng nhạc và xóa queue"""
         queue = self.get_queue(ctx.guild.id)
         queue.clear()
+        self.prefetcher.cancel(ctx.guild.id)
         
         if ctx.voice_client:
             if ctx.voice_client.is_playing():
@@ -1299,6 +1635,7 @@ class MusicCog(commands.Cog):
         """Slash command for stopping music"""
         queue = self.get_queue(interaction.guild.id)
         queue.clear()
+        self.prefetcher.cancel(interaction.guild.id)
         
         if interaction.guild.voice_client:
             if interaction.guild.voice_client.is_playing():
@@ -1794,8 +2131,10 @@ class MusicCog(commands.Cog):
             
             try:
                 # Tìm bài hát
-                ytdl = YTDLSource.ytdl
-                info = await self.bot.loop.run_in_executor(None, lambda: ytdl.extract_info(f"ytsearch:{song_query}", download=False))
+                info = await extraction_scheduler.run(
+                    lambda: ytdl.extract_info(f"ytsearch:{song_query}", download=False),
+                    guild_id=ctx.guild.id, priority=PRIORITY_QUEUE
+                )
                 
                 if 'entries' in info and len(info['entries']) > 0:
                     entry = info['entries'][0]
@@ -2024,16 +2363,19 @@ class MusicCog(commands.Cog):
         try:
             url_pattern = re.compile(r'https?://')
             if url_pattern.match(query):
-                loop = self.bot.loop or asyncio.get_event_loop()
-                data = await loop.run_in_executor(None, lambda: ytdl.extract_info(query, download=False))
+                data = await extraction_scheduler.run(
+                    lambda: ytdl_flat.extract_info(query, download=False),
+                    guild_id=interaction.guild.id
+                )
                 if 'entries' in data:
-                    data = data['entries'][0]
+                    data = playlist_placeholder(data['entries'][0]) if data['entries'] and data['entries'][0] else None
             else:
-                data = await YTDLSource.search_youtube(query)
+                data = await YTDLSource.search_youtube(query, guild_id=interaction.guild.id)
             if not data:
                 if search_msg:
                     await search_msg.edit(content="❌ Không tìm thấy bài hát trên YouTube!")
                 return
+            self.streams.remember(data)
             queue = self.get_queue(interaction.guild.id)
             voice_client = interaction.guild.voice_client
             if not voice_client.is_playing() and not voice_client.is_paused():
@@ -2048,6 +2390,7 @@ class MusicCog(commands.Cog):
                             coro = self.play_next(fake_ctx)
                             asyncio.run_coroutine_threadsafe(coro, self.bot.loop)
                     voice_client.play(player, after=after_playing)
+                    self.prefetcher.sync(interaction.guild.id, queue.queue)
                     
                     # Detect platform cho slash command
                     platform_info = "🎬 YouTube"
@@ -1,6 +1,8 @@
 import discord
 from discord.ext import commands, tasks
 import asyncio
+import heapq
+import time
 from datetime import datetime, timedelta
 import re
 from typing import Optional
@@ -8,49 +10,149 @@ from typing import Optional
 class Scheduler(commands.Cog):
     """📅 Lịch & Nhắc nhở - Quản lý lịch trình và nhắc nhở"""
     
+    MAX_SLEEP = 300  # Ngủ tối đa 5 phút rồi tính lại (phòng khi đồng hồ hệ thống bị chỉnh)
+    RETRY_DELAY = 60
+    MAX_ATTEMPTS = 3
+    
     def __init__(self, bot):
         self.bot = bot
-        self.reminder_check.start()
+        self._heap = []  # (remind_ts, reminder_id, row) - reminder sớm nhất ở đầu
+        self._scheduled = set()  # id đang nằm trong heap hoặc đang gửi
+        self._attempts = {}  # reminder_id -> số lần gửi lỗi
+        self._wakeup = asyncio.Event()
+        self._delivery = asyncio.Semaphore(bot.config.get('reminder_concurrency', 10))
+        self._channel_locks = {}  # channel_id -> Lock, gửi tuần tự trong cùng kênh
+        self._channel_pending = {}  # channel_id -> số lần gửi đang giữ/chờ lock (0 thì bỏ lock)
+        self._deliveries = set()  # Task gửi đang chạy
+        self._runner = None
+        self.bot.db.add_reminder_listener(self.schedule_reminder)
+        self.reminder_maintenance.start()
+    
+    async def cog_load(self):
+        self._runner = asyncio.create_task(self._reminder_loop())
     
-    def cog_unload(self):
-        self.reminder_check.cancel()
+    async def cog_unload(self):
+        self.bot.db.remove_reminder_listener(self.schedule_reminder)
+        if self._runner:
+            self._runner.cancel()
+        self.reminder_maintenance.cancel()
+        # Reminder đang gửi dở vẫn pending trong DB, lần load sau sẽ gửi lại
+        for task in self._deliveries:
+            task.cancel()
+        await asyncio.gather(*self._deliveries, return_exceptions=True)
+        self._deliveries.clear()
     
-    @tasks.loop(seconds=30)
-    async def reminder_check(self):
-        """Check for pending reminders every 30 seconds"""
+    @tasks.loop(hours=24)
+    async def reminder_maintenance(self):
+        """Chuyển reminder đã xong sang bảng lưu trữ mỗi ngày"""
         try:
-            reminders = await self.bot.db.get_pending_reminders()
-            
-            for reminder in reminders:
-                reminder_id, user_id, channel_id, guild_id, message, remind_time = reminder
-                
-                try:
-                    channel = self.bot.get_channel(channel_id)
-                    if channel:
-                        user = self.bot.get_user(user_id)
-                        
-                        embed = discord.Embed(
-                            title="⏰ Nhắc nhở!",
-                            description=message,
-                            color=0x7289DA
-                        )
-                        embed.add_field(name="Cho", value=user.mention if user else f"<@{user_id}>", inline=False)
-                        embed.set_footer(text="GenZ Assistant Reminder")
-                        
-                        await channel.send(embed=embed)
-                    
-                    # Mark as completed
-                    await self.bot.db.complete_reminder(reminder_id)
-                    
-                except Exception as e:
-                    print(f"Error sending reminder {reminder_id}: {e}")
-                    
+            await self.bot.db.archive_reminders(self.bot.config.get('reminder_archive_days', 90))
         except Exception as e:
-            print(f"Error checking reminders: {e}")
+            print(f"Error archiving reminders: {e}")
     
-    @reminder_check.before_loop
-    async def before_reminder_check(self):
+    # ===== REMINDER TIMER =====
+    
+    @staticmethod
+    def _timestamp(remind_time) -> float:
+        if isinstance(remind_time, str):
+            remind_time = datetime.fromisoformat(remind_time)
+        return remind_time.timestamp()
+    
+    def schedule_reminder(self, row, delay: float = 0):
+        """Đưa reminder vào heap; đánh thức vòng hẹn giờ nếu nó đến hạn sớm hơn"""
+        reminder_id = row[0]
+        if reminder_id in self._scheduled:
+            return
+        remind_ts = self._timestamp(row[5])
+        if delay:
+            remind_ts = max(remind_ts, time.time() + delay)
+        self._scheduled.add(reminder_id)
+        heapq.heappush(self._heap, (remind_ts, reminder_id, row))
+        if self._heap[0][1] == reminder_id:
+            self._wakeup.set()
+    
+    async def _reminder_loop(self):
+        """Ngủ tới reminder sớm nhất thay vì quét DB mỗi 30 giây"""
         await self.bot.wait_until_ready()
+        try:
+            for row in await self.bot.db.get_all_pending_reminders():
+                self.schedule_reminder(row)
+        except Exception as e:
+            print(f"Error loading reminders: {e}")
+        
+        while True:
+            self._wakeup.clear()
+            if self._heap:
+                delay = min(self._heap[0][0] - time.time(), self.MAX_SLEEP)
+            else:
+                delay = None
+            
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            # Gửi mọi reminder đã đến hạn cùng lúc (giới hạn bởi semaphore)
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, row = heapq.heappop(self._heap)
+                task = asyncio.create_task(self._deliver(row))
+                self._deliveries.add(task)
+                task.add_done_callback(self._delivery_done)
+    
+    def _delivery_done(self, task):
+        self._deliveries.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Reminder delivery task failed: {task.exception()}")
+    
+    async def _deliver(self, row):
+        channel_id = row[2]
+        lock = self._channel_locks.setdefault(channel_id, asyncio.Lock())
+        self._channel_pending[channel_id] = self._channel_pending.get(channel_id, 0) + 1
+        try:
+            # Lock kênh trước, semaphore sau: reminder dồn vào một kênh không giữ hết slot của kênh khác
+            async with lock:
+                async with self._delivery:
+                    await self._send_reminder(row)
+        finally:
+            self._channel_pending[channel_id] -= 1
+            if not self._channel_pending[channel_id]:
+                del self._channel_pending[channel_id]
+                self._channel_locks.pop(channel_id, None)
+    
+    async def _send_reminder(self, row):
+        reminder_id, user_id, channel_id, guild_id, message, remind_time = row
+        try:
+            channel = self.bot.get_channel(channel_id)
+            if channel:
+                user = self.bot.get_user(user_id)
+                
+                embed = discord.Embed(
+                    title="⏰ Nhắc nhở!",
+                    description=message,
+                    color=0x7289DA
+                )
+                embed.add_field(name="Cho", value=user.mention if user else f"<@{user_id}>", inline=False)
+                embed.set_footer(text="GenZ Assistant Reminder")
+                
+                await channel.send(embed=embed)
+            
+            # Mark as completed
+            await self.bot.db.complete_reminder(reminder_id)
+            self._attempts.pop(reminder_id, None)
+            self._scheduled.discard(reminder_id)
+            
+        except Exception as e:
+            print(f"Error sending reminder {reminder_id}: {e}")
+            self._scheduled.discard(reminder_id)
+            attempts = self._attempts.get(reminder_id, 0) + 1
+            if attempts < self.MAX_ATTEMPTS:
+                self._attempts[reminder_id] = attempts
+                self.schedule_reminder(row, delay=self.RETRY_DELAY)
+            else:
+                self._attempts.pop(reminder_id, None)
     
     def parse_time(self, time_str: str) -> Optional[timedelta]:
         """Parse time string into timedelta"""
@@ -410,8 +512,7 @@ class Scheduler(commands.Cog):
                 return
             
             # Calculate remind time
-            from datetime import datetime, timedelta
-            remind_time = datetime.now() + timedelta(seconds=time_amount)
+            remind_time = datetime.now() + time_amount
             
             # Save to database
             reminder_id = await self.bot.db.add_reminder(
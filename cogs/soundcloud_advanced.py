@@ -3,31 +3,51 @@ from discord.ext import commands
 from discord import app_commands
 import yt_dlp
 import asyncio
-import os
 from collections import deque
-import json
 import aiohttp
 from datetime import datetime, timedelta
 import random
 import re
 from utils.channel_manager import ChannelManager
+from utils.prefetch import QueuePrefetcher
+from utils.extraction import extraction_scheduler, PRIORITY_PLAY, PRIORITY_QUEUE, PRIORITY_PREFETCH
+from utils.search_cache import search_cache
+from utils.tracks import TrackRecord
+from utils.soundcloud_store import SoundCloudStore, new_user_stats
 
 class SoundCloudQueue:
     """Advanced Queue System cho SoundCloud"""
+    __slots__ = ('queue', 'history', '_current', 'loop_mode', 'shuffle', 'autoplay', 'repeat_count', 'on_change')
+
     def __init__(self):
-        self.queue = deque()
+        self.queue = deque()  # deque[TrackRecord]
         self.history = deque(maxlen=50)  # Lưu 50 bài gần nhất
-        self.current = None
+        self._current = None
         self.loop_mode = "off"  # off, single, queue
         self.shuffle = False
         self.autoplay = False
         self.repeat_count = 0
+        self.on_change = None  # Callback khi queue đổi thứ tự (prefetch)
+
+    @property
+    def current(self):
+        return self._current
+
+    @current.setter
+    def current(self, track):
+        self._current = TrackRecord.from_info(track)
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change(self.queue)
 
     def add(self, track):
-        self.queue.append(track)
+        self.queue.append(TrackRecord.from_info(track))
+        self._changed()
 
     def add_to_front(self, track):
-        self.queue.appendleft(track)
+        self.queue.appendleft(TrackRecord.from_info(track))
+        self._changed()
 
     def get_next(self):
         if not self.queue:
@@ -36,10 +56,12 @@ class SoundCloudQueue:
 
     def clear(self):
         self.queue.clear()
+        self._changed()
 
     def remove(self, index):
         try:
             self.queue.remove(list(self.queue)[index])
+            self._changed()
             return True
         except:
             return False
@@ -50,6 +72,7 @@ class SoundCloudQueue:
             item = queue_list.pop(from_pos)
             queue_list.insert(to_pos, item)
             self.queue = deque(queue_list)
+            self._changed()
             return True
         except:
             return False
@@ -58,6 +81,7 @@ class SoundCloudQueue:
         queue_list = list(self.queue)
         random.shuffle(queue_list)
         self.queue = deque(queue_list)
+        self._changed()
 
 class SoundCloudSource(discord.PCMVolumeTransformer):
     def __init__(self, source, *, data, volume=0.5):
@@ -73,54 +97,71 @@ class SoundCloudSource(discord.PCMVolumeTransformer):
         self.description = data.get('description', '')
         self.upload_date = data.get('upload_date', '')
 
-    @classmethod
-    async def from_url(cls, url, *, loop=None, stream=True):
-        """Create a SoundCloud source from URL with enhanced options"""
-        ytdl_format_options = {
-            'format': 'bestaudio/best',
-            'quiet': True,
-            'no_warnings': True,
-            'default_search': 'scsearch:',
-            'source_address': '0.0.0.0',
-            'extract_flat': False,
-            'noplaylist': True,
-            'restrictfilenames': True,
-            'ignoreerrors': False,
-            'logtostderr': False,
-            'extractaudio': True,
-            'audioformat': 'best',
-            'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36',
-            'referer': 'https://soundcloud.com/',
-            'http_headers': {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36'
-            }
-        }
-        
-        ffmpeg_options = {
-            'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5 -user_agent "Mozilla/5.0"',
-            'options': '-vn -ar 48000 -ac 2 -b:a 192k -loglevel quiet'
+    YTDL_OPTIONS = {
+        'format': 'bestaudio/best',
+        'quiet': True,
+        'no_warnings': True,
+        'default_search': 'scsearch:',
+        'source_address': '0.0.0.0',
+        'extract_flat': False,
+        'noplaylist': True,
+        'restrictfilenames': True,
+        'ignoreerrors': False,
+        'logtostderr': False,
+        'extractaudio': True,
+        'audioformat': 'best',
+        'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36',
+        'referer': 'https://soundcloud.com/',
+        'http_headers': {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36'
         }
-        
-        ytdl = yt_dlp.YoutubeDL(ytdl_format_options)
+    }
+
+    FFMPEG_OPTIONS = {
+        'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5 -user_agent "Mozilla/5.0"',
+        'options': '-vn -ar 48000 -ac 2 -b:a 192k -loglevel quiet'
+    }
+
+    @classmethod
+    async def extract(cls, url, *, loop=None, stream=True, guild_id=None, priority=PRIORITY_PLAY):
+        """Extract info SoundCloud (chưa tạo FFmpeg) - dùng chung cho phát và prefetch"""
+        ytdl = yt_dlp.YoutubeDL(cls.YTDL_OPTIONS)
         
         try:
-            data = await loop.run_in_executor(None, lambda: ytdl.extract_info(url, download=not stream))
+            data = await extraction_scheduler.run(
+                lambda: ytdl.extract_info(url, download=not stream),
+                guild_id=guild_id, priority=priority
+            )
             
             if 'entries' in data:
                 data = data['entries'][0]
-            
-            if stream:
-                filename = data['url']
-                return cls(discord.FFmpegPCMAudio(filename, **ffmpeg_options), data=data)
-            else:
-                filename = ytdl.prepare_filename(data)
-                return cls(discord.FFmpegPCMAudio(filename, **ffmpeg_options), data=data)
+            return data
         except Exception as e:
             raise Exception(f"Error extracting SoundCloud info: {str(e)}")
 
     @classmethod
-    async def search_tracks(cls, query, limit=10):
+    def from_data(cls, data):
+        """Tạo player từ info đã extract, không gọi lại yt-dlp"""
+        return cls(discord.FFmpegPCMAudio(data['url'], **cls.FFMPEG_OPTIONS), data=data)
+
+    @classmethod
+    async def from_url(cls, url, *, loop=None, stream=True, guild_id=None, priority=PRIORITY_PLAY):
+        """Create a SoundCloud source from URL with enhanced options"""
+        data = await cls.extract(url, loop=loop, stream=stream, guild_id=guild_id, priority=priority)
+        
+        if stream:
+            return cls.from_data(data)
+        filename = yt_dlp.YoutubeDL(cls.YTDL_OPTIONS).prepare_filename(data)
+        return cls(discord.FFmpegPCMAudio(filename, **cls.FFMPEG_OPTIONS), data=data)
+
+    @classmethod
+    async def search_tracks(cls, query, limit=10, guild_id=None):
         """Search multiple tracks from SoundCloud"""
+        cache_query = f"{limit}:{query}"
+        cached = await search_cache.get('soundcloud', cache_query)
+        if cached:
+            return [dict(track) for track in cached]
+        
         ytdl_options = {
             'quiet': True,
             'no_warnings': True,
@@ -131,8 +172,9 @@ class SoundCloudSource(discord.PCMVolumeTransformer):
         ytdl = yt_dlp.YoutubeDL(ytdl_options)
         
         try:
-            search_results = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: ytdl.extract_info(f"scsearch{limit}:{query}", download=False)
+            search_results = await extraction_scheduler.run(
+                lambda: ytdl.extract_info(f"scsearch{limit}:{query}", download=False),
+                guild_id=guild_id
             )
             
             if 'entries' in search_results:
@@ -148,6 +190,7 @@ class SoundCloudSource(discord.PCMVolumeTransformer):
                             'thumbnail': entry.get('thumbnail', ''),
                             'webpage_url': entry.get('webpage_url', '')
                         })
+                await search_cache.set('soundcloud', cache_query, tracks)
                 return tracks
             return []
         except Exception as e:
@@ -155,24 +198,17 @@ class SoundCloudSource(discord.PCMVolumeTransformer):
             return []
 
 class SoundCloudPlaylistManager:
-    """Quản lý playlist SoundCloud"""
-    def __init__(self):
-        self.playlists = {}
-        self.file_path = "data/soundcloud_playlists.json"
-        self.load_playlists()
+    """Quản lý playlist SoundCloud (giữ trong RAM, ghi nền qua SoundCloudStore)"""
+    def __init__(self, store):
+        self.playlists = {}  # user_id (int) -> {tên: playlist}
+        self.store = store
 
-    def load_playlists(self):
-        try:
-            if os.path.exists(self.file_path):
-                with open(self.file_path, 'r', encoding='utf-8') as f:
-                    self.playlists = json.load(f)
-        except:
-            self.playlists = {}
+    def load_playlists(self, playlists):
+        self.playlists = playlists
 
-    def save_playlists(self):
-        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
-        with open(self.file_path, 'w', encoding='utf-8') as f:
-            json.dump(self.playlists, f, ensure_ascii=False, indent=2)
+    def save_playlist(self, user_id, name):
+        """Đánh dấu playlist đã đổi (ghi xuống DB ở lần flush kế tiếp)"""
+        self.store.playlist_changed(user_id, name, self.get_playlist(user_id, name))
 
     def create_playlist(self, user_id, name, tracks):
         if user_id not in self.playlists:
@@ -183,7 +219,7 @@ class SoundCloudPlaylistManager:
             'created': datetime.now().isoformat(),
             'play_count': 0
         }
-        self.save_playlists()
+        self.save_playlist(user_id, name)
         return True
 
     def add_to_playlist(self, user_id, playlist_name, track):
@@ -191,9 +227,15 @@ class SoundCloudPlaylistManager:
             return False
         
         self.playlists[user_id][playlist_name]['tracks'].append(track)
-        self.save_playlists()
+        self.save_playlist(user_id, playlist_name)
         return True
 
+    def record_play(self, user_id, name):
+        playlist = self.get_playlist(user_id, name)
+        if playlist:
+            playlist['play_count'] += 1
+            self.save_playlist(user_id, name)
+
     def get_playlist(self, user_id, name):
         return self.playlists.get(user_id, {}).get(name)
 
@@ -203,68 +245,48 @@ class SoundCloudPlaylistManager:
     def delete_playlist(self, user_id, name):
         if user_id in self.playlists and name in self.playlists[user_id]:
             del self.playlists[user_id][name]
-            self.save_playlists()
+            self.save_playlist(user_id, name)
             return True
         return False
 
 class SoundCloudStats:
-    """Thống kê SoundCloud"""
-    def __init__(self):
-        self.stats = {}
-        self.file_path = "data/soundcloud_stats.json"
-        self.load_stats()
-
-    def load_stats(self):
-        try:
-            if os.path.exists(self.file_path):
-                with open(self.file_path, 'r', encoding='utf-8') as f:
-                    self.stats = json.load(f)
-        except:
-            self.stats = {}
+    """Thống kê SoundCloud (cập nhật O(1) trong RAM, ghi nền qua SoundCloudStore)"""
+    def __init__(self, store):
+        self.stats = {}  # user_id (int) -> thống kê
+        self.store = store
 
-    def save_stats(self):
-        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
-        with open(self.file_path, 'w', encoding='utf-8') as f:
-            json.dump(self.stats, f, ensure_ascii=False, indent=2)
+    def load_stats(self, stats):
+        self.stats = stats
 
     def track_play(self, user_id, track_info):
-        user_id = str(user_id)
-        if user_id not in self.stats:
-            self.stats[user_id] = {
-                'total_plays': 0,
-                'favorite_artists': {},
-                'listening_time': 0,
-                'tracks_played': []
-            }
+        user_stats = self.stats.get(user_id)
+        if user_stats is None:
+            user_stats = self.stats[user_id] = new_user_stats()
         
-        self.stats[user_id]['total_plays'] += 1
+        user_stats['total_plays'] += 1
         
         # Track favorite artists
-        artist = track_info.get('uploader', 'Unknown')
-        if artist in self.stats[user_id]['favorite_artists']:
-            self.stats[user_id]['favorite_artists'][artist] += 1
-        else:
-            self.stats[user_id]['favorite_artists'][artist] = 1
+        artist = track_info.get('uploader') or 'Unknown'
+        favorite_artists = user_stats['favorite_artists']
+        favorite_artists[artist] = favorite_artists.get(artist, 0) + 1
         
         # Track listening time
-        duration = track_info.get('duration', 0)
-        self.stats[user_id]['listening_time'] += duration
-        
-        # Track recent plays
-        self.stats[user_id]['tracks_played'].append({
-            'title': track_info.get('title', 'Unknown'),
+        duration = track_info.get('duration') or 0
+        user_stats['listening_time'] += duration
+        
+        # Track recent plays (deque giữ 100 lượt gần nhất)
+        title = track_info.get('title', 'Unknown')
+        played_at = datetime.now().isoformat()
+        user_stats['tracks_played'].append({
+            'title': title,
             'artist': artist,
-            'played_at': datetime.now().isoformat()
+            'played_at': played_at
         })
         
-        # Keep only last 100 plays
-        if len(self.stats[user_id]['tracks_played']) > 100:
-            self.stats[user_id]['tracks_played'] = self.stats[user_id]['tracks_played'][-100:]
-        
-        self.save_stats()
+        self.store.record_play(user_id, title, artist, duration, played_at)
 
     def get_user_stats(self, user_id):
-        return self.stats.get(str(user_id), {})
+        return self.stats.get(user_id, {})
 
 class SoundCloudAdvanced(commands.Cog):
     """🎵 SoundCloud Music Player - Nâng cao với Queue, Playlist & Statistics"""
@@ -273,14 +295,52 @@ class SoundCloudAdvanced(commands.Cog):
         self.bot = bot
         self.queues = {}  # Guild ID -> SoundCloudQueue
         self.current_players = {}  # Guild ID -> Current Player
-        self.playlist_manager = SoundCloudPlaylistManager()
-        self.stats_manager = SoundCloudStats()
+        # Playlist + thống kê: giữ trong RAM, ghi SQLite theo lô ở nền
+        self.store = SoundCloudStore(flush_interval=bot.config.get('soundcloud_flush_interval', 5))
+        self.playlist_manager = SoundCloudPlaylistManager(self.store)
+        self.stats_manager = SoundCloudStats(self.store)
+        self.prefetcher = QueuePrefetcher(
+            self._prefetch_track,
+            loop=bot.loop,
+            depth=bot.config.get('music_prefetch_depth', 2),
+            name='soundcloud'
+        )
+        
+    async def cog_load(self):
+        stats, playlists = await self.store.load()
+        self.stats_manager.load_stats(stats)
+        self.playlist_manager.load_playlists(playlists)
+        
+    async def cog_unload(self):
+        # Ghi nốt thống kê/playlist còn chờ
+        await self.store.close()
         
     def get_queue(self, guild_id):
         if guild_id not in self.queues:
-            self.queues[guild_id] = SoundCloudQueue()
+            queue = SoundCloudQueue()
+            queue.on_change = lambda tracks, guild_id=guild_id: self.prefetcher.sync(guild_id, tracks)
+            self.queues[guild_id] = queue
         return self.queues[guild_id]
 
+    async def _prefetch_track(self, guild_id, track):
+        """Extract trước bài SoundCloud sắp phát (chạy nền)"""
+        return await SoundCloudSource.extract(
+            track['url'], stream=True, guild_id=guild_id, priority=PRIORITY_PREFETCH
+        )
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        """Bot rời voice (stop/leave/bị kick/mất kết nối) -> hủy prefetch còn lại của guild"""
+        if member.id == self.bot.user.id and before.channel and after.channel is None:
+            self.prefetcher.cancel(member.guild.id)
+
+    async def _load_track_details(self, guild_id, url):
+        """Info đầy đủ cho TrackRecord.load_details - ưu tiên player đang phát, không thì extract"""
+        player = self.current_players.get(guild_id)
+        if player and player.url == url:
+            return player.data
+        return await SoundCloudSource.extract(url, stream=True, guild_id=guild_id, priority=PRIORITY_QUEUE)
+
     def format_duration(self, seconds):
         """Format duration to mm:ss"""
         if not seconds:
@@ -305,6 +365,7 @@ class SoundCloudAdvanced(commands.Cog):
                 pass
 
         ctx.voice_client.play(player, after=after_play)
+        self.prefetcher.sync(ctx.guild.id, self.get_queue(ctx.guild.id).queue)
         
         # Update Music Manager state
         if hasattr(self.bot, 'music_manager'):
@@ -333,7 +394,7 @@ class SoundCloudAdvanced(commands.Cog):
             # Replay current track
             try:
                 player = await SoundCloudSource.from_url(
-                    queue.current['url'], loop=self.bot.loop, stream=True
+                    queue.current['url'], loop=self.bot.loop, stream=True, guild_id=ctx.guild.id
                 )
                 await self._play_track(ctx, player)
                 return
@@ -345,10 +406,15 @@ class SoundCloudAdvanced(commands.Cog):
         
         if next_track:
             try:
-                player = await SoundCloudSource.from_url(
-                    next_track['url'], loop=self.bot.loop, stream=True
-                )
-                queue.history.append(queue.current)
+                data = await self.prefetcher.take(ctx.guild.id, next_track)
+                if data:
+                    player = SoundCloudSource.from_data(data)
+                else:
+                    player = await SoundCloudSource.from_url(
+                        next_track['url'], loop=self.bot.loop, stream=True, guild_id=ctx.guild.id
+                    )
+                if queue.current:
+                    queue.history.append(queue.current)
                 queue.current = next_track
                 self.current_players[ctx.guild.id] = player
                 await self._play_track(ctx, player)
@@ -475,7 +541,7 @@ class SoundCloudAdvanced(commands.Cog):
             if not search.startswith('http'):
                 search = f"scsearch:{search}"
             
-            player = await SoundCloudSource.from_url(search, loop=self.bot.loop, stream=True)
+            player = await SoundCloudSource.from_url(search, loop=self.bot.loop, stream=True, guild_id=ctx.guild.id)
             
             # Thêm vào queue hoặc phát ngay
             if ctx.voice_client.is_playing():
@@ -568,7 +634,7 @@ class SoundCloudAdvanced(commands.Cog):
         loading_msg = await ctx.send(embed=loading_embed)
         
         try:
-            tracks = await SoundCloudSource.search_tracks(query, limit=10)
+            tracks = await SoundCloudSource.search_tracks(query, limit=10, guild_id=ctx.guild.id)
             
             if not tracks:
                 embed = discord.Embed(
@@ -668,7 +734,7 @@ class SoundCloudAdvanced(commands.Cog):
             if not search.startswith('http'):
                 search = f"scsearch:{search}"
             
-            player = await SoundCloudSource.from_url(search, loop=self.bot.loop, stream=True)
+            player = await SoundCloudSource.from_url(search, loop=self.bot.loop, stream=True, guild_id=ctx.guild.id)
             queue = self.get_queue(ctx.guild.id)
             
             # Stop current and play immediately
@@ -952,6 +1018,7 @@ class SoundCloudAdvanced(commands.Cog):
             queue = self.get_queue(ctx.guild.id)
             queue.clear()
             queue.current = None
+            self.prefetcher.cancel(ctx.guild.id)
             ctx.voice_client.stop()
             
             embed = discord.Embed(
@@ -1022,6 +1089,7 @@ class SoundCloudAdvanced(commands.Cog):
             queue = self.get_queue(ctx.guild.id)
             queue.clear()
             queue.current = None
+            self.prefetcher.cancel(ctx.guild.id)
             await ctx.voice_client.disconnect()
             
             embed = discord.Embed(
@@ -1083,10 +1151,10 @@ class SoundCloudAdvanced(commands.Cog):
         
         # Add current track
         if queue.current:
-            tracks.append(queue.current)
+            tracks.append(queue.current.to_dict())
         
         # Add queue tracks
-        tracks.extend(list(queue.queue))
+        tracks.extend(track.to_dict() for track in queue.queue)
         
         if not tracks:
             embed = discord.Embed(
@@ -1179,8 +1247,7 @@ class SoundCloudAdvanced(commands.Cog):
             queue.add(track)
         
         # Update play count
-        playlist_data['play_count'] += 1
-        self.playlist_manager.save_playlists()
+        self.playlist_manager.record_play(ctx.author.id, name)
         
         # Start playing if nothing is playing
         if not ctx.voice_client.is_playing():
@@ -1216,7 +1283,7 @@ class SoundCloudAdvanced(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        if self.playlist_manager.add_to_playlist(ctx.author.id, name, queue.current):
+        if self.playlist_manager.add_to_playlist(ctx.author.id, name, queue.current.to_dict()):
             embed = discord.Embed(
                 title="✅ Đã thêm vào playlist",
                 description=f"**{queue.current['title']}**\n➡️ Playlist: {name}",
@@ -1292,7 +1359,7 @@ class SoundCloudAdvanced(commands.Cog):
             )
         
         # Recent tracks
-        recent_tracks = user_stats.get('tracks_played', [])[-5:]
+        recent_tracks = list(user_stats.get('tracks_played', []))[-5:]
         if recent_tracks:
             recent_text = ""
             for track in reversed(recent_tracks):
@@ -1326,6 +1393,11 @@ class SoundCloudAdvanced(commands.Cog):
         if not current_player:
             return
         
+        # Lượt nghe/mô tả chỉ tải khi có người xem nowplaying
+        details = await queue.current.load_details(
+            lambda url: self._load_track_details(ctx.guild.id, url)
+        )
+        
         embed = discord.Embed(
             title="🎵 Đang phát",
             description=f"**{current_player.title}**",
@@ -1346,7 +1418,7 @@ class SoundCloudAdvanced(commands.Cog):
         
         embed.add_field(
             name="👥 Lượt nghe",
-            value=f"{current_player.view_count:,}",
+            value=f"{details.get('view_count', 0):,}",
             inline=True
         )
         
@@ -1372,8 +1444,9 @@ class SoundCloudAdvanced(commands.Cog):
             embed.set_thumbnail(url=current_player.thumbnail)
         
         # Description with more info
-        if hasattr(current_player, 'description') and current_player.description:
-            desc_short = current_player.description[:200] + "..." if len(current_player.description) > 200 else current_player.description
+        description = details.get('description')
+        if description:
+            desc_short = description[:200] + "..." if len(description) > 200 else description
             embed.add_field(
                 name="📝 Mô tả",
                 value=desc_short,
@@ -1481,7 +1554,7 @@ class SoundCloudAdvanced(commands.Cog):
             if not search.startswith('http'):
                 search = f"scsearch:{search}"
             
-            player = await SoundCloudSource.from_url(search, loop=self.bot.loop, stream=True)
+            player = await SoundCloudSource.from_url(search, loop=self.bot.loop, stream=True, guild_id=interaction.guild.id)
             queue = self.get_queue(interaction.guild.id)
             
             # Thêm vào queue hoặc phát ngay
@@ -1566,6 +1639,7 @@ class SoundCloudAdvanced(commands.Cog):
             queue = self.get_queue(interaction.guild.id)
             queue.clear()
             queue.current = None
+            self.prefetcher.cancel(interaction.guild.id)
             interaction.guild.voice_client.stop()
             embed = discord.Embed(
                 title="⏹️ Đã dừng SoundCloud",
@@ -1582,6 +1656,7 @@ class SoundCloudAdvanced(commands.Cog):
             queue = self.get_queue(interaction.guild.id)
             queue.clear()
             queue.current = None
+            self.prefetcher.cancel(interaction.guild.id)
             await interaction.guild.voice_client.disconnect()
             embed = discord.Embed(
                 title="👋 Đã rời voice channel",
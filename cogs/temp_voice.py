@@ -1,55 +1,40 @@
 import discord
 from discord.ext import commands
-import json
-import os
 import asyncio
 import logging
 from utils.channel_manager import ChannelManager
+from utils.settings_store import SettingsStore
 
 logger = logging.getLogger(__name__)
 
+TEMP_VOICE_DEFAULTS = {
+    'enabled': False,
+    'join_to_create_channel': None,
+    'temp_channel_category': None,
+    'default_name': "🎤 {user}'s Channel",
+    'default_limit': 0,
+    'auto_delete': True,
+    'channel_prefix': "🎤"
+}
+
 class TempVoice(commands.Cog):
     """Auto Voice Channel / Join-to-Create VC System"""
     
     def __init__(self, bot):
         self.bot = bot
         self.temp_channels = {}  # {user_id: channel_id}
-        self.temp_channel_settings = {}  # {guild_id: settings}
-        self.data_file = "data/temp_voice_settings.json"
-        self.load_settings()
+        # Cài đặt theo server: đọc từ RAM, ghi file nền (atomic)
+        self.settings = SettingsStore("data/temp_voice_settings.json", TEMP_VOICE_DEFAULTS)
     
-    def load_settings(self):
-        """Load temporary voice settings from file"""
-        try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    self.temp_channel_settings = json.load(f)
-            else:
-                self.temp_channel_settings = {}
-        except Exception as e:
-            logger.error(f"Error loading temp voice settings: {e}")
-            self.temp_channel_settings = {}
+    async def cog_load(self):
+        await self.settings.load()
     
-    def save_settings(self):
-        """Save temporary voice settings to file"""
-        try:
-            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.temp_channel_settings, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"Error saving temp voice settings: {e}")
+    async def cog_unload(self):
+        await self.settings.close()
     
     def get_guild_settings(self, guild_id: int):
-        """Get settings for a specific guild"""
-        return self.temp_channel_settings.get(str(guild_id), {
-            'enabled': False,
-            'join_to_create_channel': None,
-            'temp_channel_category': None,
-            'default_name': "🎤 {user}'s Channel",
-            'default_limit': 0,
-            'auto_delete': True,
-            'channel_prefix': "🎤"
-        })
+        """Get settings for a specific guild (chỉ đọc, từ bộ nhớ)"""
+        return self.settings.get(guild_id)
     
     @commands.hybrid_group(name='tempvc', description='Quản lý Temporary Voice Channels')
     @commands.has_permissions(manage_channels=True)
@@ -85,7 +70,6 @@ class TempVoice(commands.Cog):
     async def setup_tempvc(self, ctx):
         """Setup the temporary voice channel system"""
         guild = ctx.guild
-        guild_id = str(guild.id)
         
         try:
             # Create category for temp voice channels if not exists
@@ -103,14 +87,12 @@ class TempVoice(commands.Cog):
                 )
             
             # Update settings
-            settings = self.get_guild_settings(int(guild_id))
-            settings.update({
-                'enabled': True,
-                'join_to_create_channel': join_channel.id,
-                'temp_channel_category': category.id
-            })
-            self.temp_channel_settings[guild_id] = settings
-            self.save_settings()
+            self.settings.update(
+                guild.id,
+                enabled=True,
+                join_to_create_channel=join_channel.id,
+                temp_channel_category=category.id
+            )
             
             embed = discord.Embed(
                 title="✅ Thiết lập thành công!",
@@ -159,9 +141,7 @@ class TempVoice(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        settings['enabled'] = True
-        self.temp_channel_settings[guild_id] = settings
-        self.save_settings()
+        self.settings.update(ctx.guild.id, enabled=True)
         
         embed = discord.Embed(
             title="✅ Đã bật",
@@ -174,11 +154,7 @@ class TempVoice(commands.Cog):
     @commands.has_permissions(manage_channels=True)
     async def disable_tempvc(self, ctx):
         """Disable the temporary voice channel system"""
-        guild_id = str(ctx.guild.id)
-        settings = self.get_guild_settings(int(guild_id))
-        settings['enabled'] = False
-        self.temp_channel_settings[guild_id] = settings
-        self.save_settings()
+        self.settings.update(ctx.guild.id, enabled=False)
         
         embed = discord.Embed(
             title="❌ Đã tắt",
@@ -260,13 +236,8 @@ class TempVoice(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        guild_id = str(ctx.guild.id)
-        settings = self.get_guild_settings(int(guild_id))
-        
         if setting.lower() == 'name':
-            settings['default_name'] = value
-            self.temp_channel_settings[guild_id] = settings
-            self.save_settings()
+            self.settings.update(ctx.guild.id, default_name=value)
             
             embed = discord.Embed(
                 title="✅ Đã cập nhật",
@@ -281,9 +252,7 @@ class TempVoice(commands.Cog):
                 if limit < 0 or limit > 99:
                     raise ValueError("Limit must be 0-99")
                 
-                settings['default_limit'] = limit
-                self.temp_channel_settings[guild_id] = settings
-                self.save_settings()
+                self.settings.update(ctx.guild.id, default_limit=limit)
                 
                 embed = discord.Embed(
                     title="✅ Đã cập nhật",
@@ -301,9 +270,7 @@ class TempVoice(commands.Cog):
                 await ctx.send(embed=embed)
                 
         elif setting.lower() == 'prefix':
-            settings['channel_prefix'] = value
-            self.temp_channel_settings[guild_id] = settings
-            self.save_settings()
+            self.settings.update(ctx.guild.id, channel_prefix=value)
             
             embed = discord.Embed(
                 title="✅ Đã cập nhật",
@@ -326,9 +293,7 @@ class TempVoice(commands.Cog):
                 await ctx.send(embed=embed)
                 return
             
-            settings['auto_delete'] = auto_delete
-            self.temp_channel_settings[guild_id] = settings
-            self.save_settings()
+            self.settings.update(ctx.guild.id, auto_delete=auto_delete)
             
             embed = discord.Embed(
                 title="✅ Đã cập nhật",
@@ -553,8 +518,8 @@ class TempVoice(commands.Cog):
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
         """Handle voice state updates for temporary channels"""
-        guild_id = str(member.guild.id)
-        settings = self.get_guild_settings(int(guild_id))
+        # Đọc từ bộ nhớ, không chạm file
+        settings = self.get_guild_settings(member.guild.id)
         
         if not settings['enabled']:
             return
@@ -7,6 +7,9 @@ import json
 from datetime import datetime
 import logging
 from utils.channel_manager import ChannelManager
+from utils.prefetch import QueuePrefetcher
+from utils.extraction import PRIORITY_PREFETCH
+from utils.tracks import TrackRecord
 
 class TrackSource(Enum):
     """Enum để xác định nguồn của track"""
@@ -17,48 +20,68 @@ class TrackSource(Enum):
 
 class UniversalTrack:
     """Class đại diện cho một track từ bất kỳ source nào"""
-    def __init__(self, title, url, source, uploader, duration=None, thumbnail=None, **kwargs):
-        self.title = title
-        self.url = url
+    __slots__ = ('record', 'source', 'added_by', 'added_at', 'play_count')
+
+    def __init__(self, title, url, source, uploader, duration=None, thumbnail=None, added_by=None, **kwargs):
+        # Metadata gọn dùng chung với các queue khác, không giữ payload của extractor
+        self.record = TrackRecord(
+            id=kwargs.get('id'),
+            title=title,
+            uploader=uploader,
+            duration=duration,
+            webpage_url=url,
+            thumbnail=thumbnail
+        )
         self.source = TrackSource(source)
-        self.uploader = uploader
-        self.duration = duration
-        self.thumbnail = thumbnail
-        self.added_by = kwargs.get('added_by')
+        self.added_by = added_by
         self.added_at = datetime.now()
         self.play_count = 0
-        
-        # Source-specific data
-        self.source_data = kwargs
+
+    @property
+    def title(self):
+        return self.record.title
+
+    @property
+    def url(self):
+        return self.record.webpage_url
+
+    @property
+    def uploader(self):
+        return self.record.uploader
+
+    @property
+    def duration(self):
+        return self.record.duration
+
+    @property
+    def thumbnail(self):
+        return self.record.thumbnail
     
     def to_dict(self):
         """Convert track to dictionary for JSON storage"""
         return {
-            'title': self.title,
-            'url': self.url,
+            **self.record.to_dict(),
             'source': self.source.value,
-            'uploader': self.uploader,
-            'duration': self.duration,
-            'thumbnail': self.thumbnail,
             'added_by': self.added_by.id if self.added_by else None,
             'added_at': self.added_at.isoformat(),
-            'play_count': self.play_count,
-            'source_data': self.source_data
+            'play_count': self.play_count
         }
     
     @classmethod
     def from_dict(cls, data):
-        """Create track from dictionary"""
+        """Create track from dictionary (bỏ qua 'source_data' của định dạng cũ)"""
         track = cls(
             title=data['title'],
-            url=data['url'], 
+            url=data.get('webpage_url') or data['url'],
             source=data['source'],
             uploader=data['uploader'],
             duration=data.get('duration'),
             thumbnail=data.get('thumbnail'),
-            **data.get('source_data', {})
+            id=data.get('id')
         )
         track.play_count = data.get('play_count', 0)
+        if data.get('added_at'):
+            track.added_at = datetime.fromisoformat(data['added_at'])
         return track
 
 class UniversalQueue:
@@ -72,6 +95,11 @@ class UniversalQueue:
         self.shuffle = False
         self.autoplay = False
         self.volume = 50
+        self.on_change = None  # Callback khi queue đổi thứ tự (prefetch)
+    
+    def _changed(self):
+        if self.on_change:
+            self.on_change(self.queue)
     
     def add(self, track: UniversalTrack, position=None):
         """Thêm track vào queue"""
@@ -82,10 +110,12 @@ class UniversalQueue:
             queue_list = list(self.queue)
             queue_list.insert(position, track)
             self.queue = deque(queue_list)
+        self._changed()
     
     def add_next(self, track: UniversalTrack):
         """Thêm track vào đầu queue (phát tiếp theo)"""
         self.queue.appendleft(track)
+        self._changed()
     
     def get_next(self):
         """Lấy track tiếp theo"""
@@ -99,6 +129,7 @@ class UniversalQueue:
             queue_list = list(self.queue)
             removed = queue_list.pop(index)
             self.queue = deque(queue_list)
+            self._changed()
             return removed
         except (IndexError, ValueError):
             return None
@@ -110,6 +141,7 @@ class UniversalQueue:
             track = queue_list.pop(from_pos)
             queue_list.insert(to_pos, track)
             self.queue = deque(queue_list)
+            self._changed()
             return True
         except (IndexError, ValueError):
             return False
@@ -117,6 +149,7 @@ class UniversalQueue:
     def clear(self):
         """Xóa toàn bộ queue"""
         self.queue.clear()
+        self._changed()
     
     def get_queue_info(self):
         """Lấy thông tin queue để hiển thị"""
@@ -146,6 +179,7 @@ class UniversalQueue:
         queue_list = list(self.queue)
         random.shuffle(queue_list)
         self.queue = deque(queue_list)
+        self._changed()
     
     def get_stats(self):
         """Lấy thống kê queue"""
@@ -176,13 +210,33 @@ class UniversalMusicPlayer:
         self.bot = bot
         self.guild_queues = {}  # guild_id -> UniversalQueue
         self.logger = logging.getLogger(__name__)
+        self.prefetcher = QueuePrefetcher(
+            self._prefetch_track,
+            loop=bot.loop,
+            depth=bot.config.get('music_prefetch_depth', 2),
+            name='universal'
+        )
     
     def get_queue(self, guild_id):
         """Lấy queue của guild"""
         if guild_id not in self.guild_queues:
-            self.guild_queues[guild_id] = UniversalQueue()
+            queue = UniversalQueue()
+            queue.on_change = lambda tracks, guild_id=guild_id: self.prefetcher.sync(guild_id, tracks)
+            self.guild_queues[guild_id] = queue
         return self.guild_queues[guild_id]
     
+    async def _prefetch_track(self, guild_id, track):
+        """Extract trước track sắp phát (chạy nền), chưa tạo FFmpeg"""
+        if track.source == TrackSource.SOUNDCLOUD:
+            from cogs.soundcloud_advanced import SoundCloudSource
+            return await SoundCloudSource.extract(
+                track.url, stream=True, guild_id=guild_id, priority=PRIORITY_PREFETCH
+            )
+        elif track.source == TrackSource.YOUTUBE:
+            from cogs.music import YTDLSource
+            return await YTDLSource.extract_stream(track.url, guild_id=guild_id, priority=PRIORITY_PREFETCH)
+        return None
+    
     async def add_soundcloud_track(self, guild_id, search_term, added_by=None):
         """Thêm SoundCloud track vào universal queue"""
         try:
@@ -197,7 +251,7 @@ class UniversalMusicPlayer:
             
             # Use SoundCloud's search method
             from cogs.soundcloud_advanced import SoundCloudSource
-            player = await SoundCloudSource.from_url(search_term, loop=self.bot.loop, stream=True)
+            player = await SoundCloudSource.from_url(search_term, loop=self.bot.loop, stream=True, guild_id=guild_id)
             
             # Create universal track
             track = UniversalTrack(
@@ -208,7 +262,7 @@ class UniversalMusicPlayer:
                 duration=player.data.get('duration'),
                 thumbnail=player.data.get('thumbnail'),
                 added_by=added_by,
-                player_data=player.data
+                id=player.data.get('id')
             )
             
             queue = self.get_queue(guild_id)
@@ -228,30 +282,22 @@ class UniversalMusicPlayer:
             if not music_cog:
                 raise Exception("Music cog not available")
             
-            # Use YouTube's search method
-            from cogs.music import ytdl
-            import asyncio
+            # Use YouTube's search method (có search cache)
+            from cogs.music import YTDLSource
             
-            loop = self.bot.loop or asyncio.get_event_loop()
+            video_data = await YTDLSource.search_youtube(search_term, guild_id=guild_id)
             
-            def search_youtube():
-                return ytdl.extract_info(f"ytsearch:{search_term}", download=False)
-            
-            data = await loop.run_in_executor(None, search_youtube)
-            
-            if 'entries' in data and data['entries']:
-                video_data = data['entries'][0]
-                
+            if video_data:
                 # Create universal track
                 track = UniversalTrack(
                     title=video_data.get('title', 'Unknown'),
-                    url=video_data.get('url', ''),
+                    url=video_data.get('webpage_url') or video_data.get('url', ''),
                     source="youtube",
                     uploader=video_data.get('uploader', 'Unknown'),
                     duration=video_data.get('duration'),
                     thumbnail=video_data.get('thumbnail'),
                     added_by=added_by,
-                    player_data=video_data
+                    id=video_data.get('id')
                 )
                 
                 queue = self.get_queue(guild_id)
@@ -279,11 +325,12 @@ class UniversalMusicPlayer:
             return None
         
         try:
-            # Create player based on source
+            # Create player based on source (dùng info đã prefetch nếu có)
+            data = await self.prefetcher.take(ctx.guild.id, next_track)
             if next_track.source == TrackSource.SOUNDCLOUD:
-                player = await self._create_soundcloud_player(next_track)
+                player = await self._create_soundcloud_player(next_track, data, ctx.guild.id)
             elif next_track.source == TrackSource.YOUTUBE:
-                player = await self._create_youtube_player(next_track)
+                player = await self._create_youtube_player(next_track, data, ctx.guild.id)
             else:
                 raise Exception(f"Unsupported source: {next_track.source}")
             
@@ -315,6 +362,7 @@ class UniversalMusicPlayer:
             
             ctx.voice_client.play(player, after=after_playing)
             queue.current = next_track
+            self.prefetcher.sync(ctx.guild.id, queue.queue)
             
             # Update volume
             if hasattr(player, 'volume'):
@@ -327,15 +375,19 @@ class UniversalMusicPlayer:
             # Skip to next track
             return await self.play_next_track(ctx)
     
-    async def _create_soundcloud_player(self, track):
+    async def _create_soundcloud_player(self, track, data=None, guild_id=None):
         """Tạo SoundCloud player"""
         from cogs.soundcloud_advanced import SoundCloudSource
-        return await SoundCloudSource.from_url(track.url, loop=self.bot.loop, stream=True)
+        if data:
+            return SoundCloudSource.from_data(data)
+        return await SoundCloudSource.from_url(track.url, loop=self.bot.loop, stream=True, guild_id=guild_id)
     
-    async def _create_youtube_player(self, track):
+    async def _create_youtube_player(self, track, data=None, guild_id=None):
         """Tạo YouTube player"""
         from cogs.music import YTDLSource
-        return await YTDLSource.from_url(track.url, loop=self.bot.loop, stream=True)
+        if data:
+            return YTDLSource.from_data(data)
+        return await YTDLSource.from_url(track.url, loop=self.bot.loop, stream=True, guild_id=guild_id)
 
 class UniversalMusicCog(commands.Cog):
     """Universal Music System - Mix SoundCloud + YouTube trong cùng queue"""
@@ -345,6 +397,12 @@ class UniversalMusicCog(commands.Cog):
         self.player = UniversalMusicPlayer(bot)
         # Make accessible globally
         bot.universal_player = self.player
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        """Bot rời voice (stop/leave/bị kick/mất kết nối) -> hủy prefetch còn lại của guild"""
+        if member.id == self.bot.user.id and before.channel and after.channel is None:
+            self.player.prefetcher.cancel(member.guild.id)
     
     @commands.group(name='uplay', aliases=['universalplay', 'mix'])
     @ChannelManager.music_only()
@@ -0,0 +1,225 @@
+import asyncio
+import os
+import time
+import logging
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import aiosqlite # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# message_buckets: số tin nhắn theo guild/user/kênh/giờ (hour = epoch giây đầu giờ)
+# guild_daily, user_daily, guild_heatmap: bảng rollup cộng dồn lúc flush để lệnh
+# thống kê chỉ đọc vài chục dòng thay vì quét bucket
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS message_buckets (
+        guild_id INTEGER NOT NULL,
+        hour INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        channel_id INTEGER NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (guild_id, hour, user_id, channel_id)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS guild_daily (
+        guild_id INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (guild_id, day)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS user_daily (
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (guild_id, user_id, day)
+    ) WITHOUT ROWID
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_user_daily_day ON user_daily (guild_id, day)',
+    '''
+    CREATE TABLE IF NOT EXISTS guild_heatmap (
+        guild_id INTEGER NOT NULL,
+        weekday INTEGER NOT NULL,
+        hour INTEGER NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (guild_id, weekday, hour)
+    ) WITHOUT ROWID
+    ''',
+)
+
+SQL_UPSERT_BUCKET = '''
+    INSERT INTO message_buckets (guild_id, hour, user_id, channel_id, count) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (guild_id, hour, user_id, channel_id) DO UPDATE SET count = count + excluded.count
+'''
+SQL_UPSERT_GUILD_DAILY = '''
+    INSERT INTO guild_daily (guild_id, day, count) VALUES (?, ?, ?)
+    ON CONFLICT (guild_id, day) DO UPDATE SET count = count + excluded.count
+'''
+SQL_UPSERT_USER_DAILY = '''
+    INSERT INTO user_daily (guild_id, user_id, day, count) VALUES (?, ?, ?, ?)
+    ON CONFLICT (guild_id, user_id, day) DO UPDATE SET count = count + excluded.count
+'''
+SQL_UPSERT_HEATMAP = '''
+    INSERT INTO guild_heatmap (guild_id, weekday, hour, count) VALUES (?, ?, ?, ?)
+    ON CONFLICT (guild_id, weekday, hour) DO UPDATE SET count = count + excluded.count
+'''
+
+
+class AnalyticsStore:
+    """Thống kê tin nhắn theo giờ trên SQLite, ghi theo lô ở nền.
+
+    `record` chỉ tăng một Counter trong RAM (gọi được từ on_message); mỗi
+    `flush_interval` giây các bucket đang chờ được cộng vào `message_buckets`
+    và các bảng rollup trong một transaction.
+    """
+
+    def __init__(self, db_path: str = 'data/analytics.db', flush_interval: float = 30.0,
+                 flush_size: int = 5000):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._pending: Counter = Counter()  # (guild_id, hour, user_id, channel_id) -> count
+        self._db: Optional[aiosqlite.Connection] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_now = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+
+        # Thống kê
+        self.flushes = 0
+        self.rows_written = 0
+
+    async def load(self):
+        """Mở DB, tạo bảng và bật flusher nền"""
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self._db = await aiosqlite.connect(self.db_path)
+        await self._db.execute('PRAGMA journal_mode=WAL')
+        await self._db.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            await self._db.execute(statement)
+        await self._db.commit()
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    # ===== GHI =====
+
+    def record(self, guild_id: int, user_id: int, channel_id: int, when: float = None):
+        """Đếm một tin nhắn vào bucket giờ hiện tại (chỉ trong RAM)"""
+        hour = int((time.time() if when is None else when) // 3600) * 3600
+        self._pending[(guild_id, hour, user_id, channel_id)] += 1
+        if len(self._pending) >= self.flush_size:
+            self._flush_now.set()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Analytics flush error: {e}")
+
+    async def flush(self):
+        """Cộng các bucket đang chờ vào SQLite và rollup trong một transaction"""
+        async with self._flush_lock:
+            if self._db is None or not self._pending:
+                return
+            pending, self._pending = self._pending, Counter()
+
+            guild_daily: Counter = Counter()
+            user_daily: Counter = Counter()
+            heatmap: Counter = Counter()
+            buckets = []
+            for (guild_id, hour, user_id, channel_id), count in pending.items():
+                local = datetime.fromtimestamp(hour)
+                day = local.toordinal()
+                buckets.append((guild_id, hour, user_id, channel_id, count))
+                guild_daily[(guild_id, day)] += count
+                user_daily[(guild_id, user_id, day)] += count
+                heatmap[(guild_id, local.weekday(), local.hour)] += count
+
+            try:
+                await self._db.executemany(SQL_UPSERT_BUCKET, buckets)
+                await self._db.executemany(SQL_UPSERT_GUILD_DAILY, [(*key, n) for key, n in guild_daily.items()])
+                await self._db.executemany(SQL_UPSERT_USER_DAILY, [(*key, n) for key, n in user_daily.items()])
+                await self._db.executemany(SQL_UPSERT_HEATMAP, [(*key, n) for key, n in heatmap.items()])
+                await self._db.commit()
+            except Exception:
+                await self._db.rollback()
+                # Trả lại số liệu để lần flush sau ghi tiếp
+                pending.update(self._pending)
+                self._pending = pending
+                raise
+            self.flushes += 1
+            self.rows_written += len(buckets) + len(guild_daily) + len(user_daily) + len(heatmap)
+
+    async def prune(self, retention_days: int = 90) -> int:
+        """Xóa bucket theo giờ cũ hơn retention_days (rollup theo ngày vẫn giữ)"""
+        if self._db is None:
+            return 0
+        cutoff = int(time.time() // 3600) * 3600 - retention_days * 86400
+        async with self._flush_lock:
+            cursor = await self._db.execute('DELETE FROM message_buckets WHERE hour < ?', (cutoff,))
+            await self._db.commit()
+        return cursor.rowcount
+
+    # ===== ĐỌC (từ rollup) =====
+
+    async def _fetchall(self, sql: str, params: tuple) -> list:
+        await self.flush()
+        async with self._db.execute(sql, params) as cursor:
+            return await cursor.fetchall()
+
+    async def daily_counts(self, guild_id: int, days: int, user_id: int = None) -> List[Tuple[int, int]]:
+        """[(day_ordinal, count)] cho `days` ngày gần nhất, tính cả ngày không có tin nhắn"""
+        today = date.today().toordinal()
+        first = today - days + 1
+        if user_id is None:
+            rows = await self._fetchall(
+                'SELECT day, count FROM guild_daily WHERE guild_id = ? AND day >= ?', (guild_id, first)
+            )
+        else:
+            rows = await self._fetchall(
+                'SELECT day, count FROM user_daily WHERE guild_id = ? AND user_id = ? AND day >= ?',
+                (guild_id, user_id, first)
+            )
+        counts = dict(rows)
+        return [(day, counts.get(day, 0)) for day in range(first, today + 1)]
+
+    async def top_users(self, guild_id: int, days: int, limit: int = 5) -> List[Tuple[int, int]]:
+        """[(user_id, count)] nhắn nhiều nhất trong `days` ngày gần nhất"""
+        first = date.today().toordinal() - days + 1
+        return await self._fetchall(
+            'SELECT user_id, SUM(count) AS total FROM user_daily WHERE guild_id = ? AND day >= ? '
+            'GROUP BY user_id ORDER BY total DESC LIMIT ?',
+            (guild_id, first, limit)
+        )
+
+    async def today_counts(self) -> List[Tuple[int, int, int]]:
+        """[(guild_id, user_id, count)] của hôm nay, để nạp lại bộ đếm trong RAM sau khi khởi động"""
+        return await self._fetchall(
+            'SELECT guild_id, user_id, count FROM user_daily WHERE day = ?', (date.today().toordinal(),)
+        )
+
+    async def heatmap(self, guild_id: int) -> Dict[Tuple[int, int], int]:
+        """{(weekday, hour): count} cộng dồn từ trước tới nay"""
+        rows = await self._fetchall(
+            'SELECT weekday, hour, count FROM guild_heatmap WHERE guild_id = ?', (guild_id,)
+        )
+        return {(weekday, hour): count for weekday, hour, count in rows}
+
+    async def close(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self._db is not None:
+            await self.flush()
+            await self._db.close()
+            self._db = None
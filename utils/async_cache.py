@@ -0,0 +1,142 @@
+import asyncio
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry:
+    """Giá trị đã nạp của một key (value None = lần nạp thất bại)"""
+    __slots__ = ('value', 'fresh_until', 'stale_until')
+
+    def __init__(self, value: Any, fresh_until: float, stale_until: float):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class AsyncCache:
+    """Cache cho coroutine `loader(key)` với TTL riêng từng key, LRU giới hạn `max_size`.
+
+    - Nhiều lệnh cùng hỏi một key chưa có chỉ gọi loader một lần (single-flight).
+    - Hết `ttl` nhưng còn trong `stale_ttl`: trả ngay giá trị cũ và nạp lại ở nền.
+    - Loader trả None hoặc lỗi: nhớ thất bại `negative_ttl` giây để không gọi
+      dồn dập; nếu còn giá trị cũ thì tiếp tục dùng giá trị cũ.
+    `ttl` có thể là số giây hoặc hàm `ttl(key, value)`.
+    """
+
+    def __init__(self, loader: Callable[[Hashable], Awaitable[Any]], *,
+                 ttl: Union[float, Callable[[Hashable, Any], float]],
+                 stale_ttl: float = 0, negative_ttl: float = 60,
+                 max_size: int = 256, name: str = 'cache'):
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.name = name
+        self._entries: 'OrderedDict[Hashable, CacheEntry]' = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+        # Thống kê
+        self.hits = 0
+        self.stale_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def _ttl_for(self, key: Hashable, value: Any) -> float:
+        return self.ttl(key, value) if callable(self.ttl) else self.ttl
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        """Giá trị của key (None nếu nạp thất bại)"""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now < entry.fresh_until:
+                self._entries.move_to_end(key)
+                if entry.value is None:
+                    self.negative_hits += 1
+                else:
+                    self.hits += 1
+                return entry.value
+            if entry.value is not None and now < entry.stale_until:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                self._load(key)
+                return entry.value
+
+        if key in self._inflight:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+        # shield: một lệnh bị hủy không làm hủy lần nạp mà lệnh khác đang chờ
+        return await asyncio.shield(self._load(key))
+
+    def _load(self, key: Hashable) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.create_task(self._run_loader(key))
+        return task
+
+    async def _run_loader(self, key: Hashable) -> Optional[Any]:
+        try:
+            try:
+                value = await self.loader(key)
+            except Exception as e:
+                logger.error(f"{self.name} cache: loading {key!r} failed: {e}")
+                value = None
+
+            now = time.monotonic()
+            if value is None:
+                self.failures += 1
+                previous = self._entries.get(key)
+                if previous is not None and previous.value is not None and now < previous.stale_until:
+                    # Giữ giá trị cũ, thử lại sau negative_ttl
+                    previous.fresh_until = min(now + self.negative_ttl, previous.stale_until)
+                    return previous.value
+                self._store(key, CacheEntry(None, now + self.negative_ttl, now + self.negative_ttl))
+                return None
+
+            fresh_until = now + self._ttl_for(key, value)
+            self._store(key, CacheEntry(value, fresh_until, fresh_until + self.stale_ttl))
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key: Hashable, entry: CacheEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable = None):
+        """Xóa một key (hoặc toàn bộ cache nếu không truyền key)"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def get_stats(self) -> dict:
+        served = self.hits + self.stale_hits + self.negative_hits
+        total = served + self.misses + self.coalesced
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'negative_hits': self.negative_hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'failures': self.failures,
+            'hit_rate': (served / total * 100) if total else 0.0,
+            'entries': len(self._entries),
+            'inflight': len(self._inflight),
+        }
+
+    async def close(self):
+        """Hủy các lần nạp còn dở (gọi khi unload cog)"""
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self._inflight.clear()
@@ -1,6 +1,8 @@
 import discord
 from discord.ext import commands
 import functools
+from typing import Dict, Optional
+from utils.settings_store import SettingsStore
 
 class ChannelManager:
     """Quản lý các hạn chế kênh cho bot"""
@@ -19,26 +21,42 @@ class ChannelManager:
     
     @staticmethod
     def get_required_channel(command_name: str) -> str:
-        """Lấy tên kênh yêu cầu cho command"""
+        """Lấy loại kênh ('music'/'bot') yêu cầu cho command"""
         if command_name.lower() in ChannelManager.MUSIC_COMMANDS:
-            return ChannelManager.CHANNEL_CONFIG['music']
-        return ChannelManager.CHANNEL_CONFIG['bot']
+            return 'music'
+        return 'bot'
+    
+    @staticmethod
+    def resolve_name(guild, channel: str) -> str:
+        """Loại kênh trong CHANNEL_CONFIG -> tên kênh của server đó; tên khác giữ nguyên"""
+        if channel in ChannelManager.CHANNEL_CONFIG:
+            return channel_index.channel_name(guild.id if guild else None, channel)
+        return channel
     
     @staticmethod
     def is_correct_channel(ctx, required_channel: str) -> bool:
         """Kiểm tra xem command có được chạy trong đúng kênh không"""
-        return ctx.channel.name == required_channel
+        if ctx.guild is None:
+            return False
+        return ctx.channel.name == ChannelManager.resolve_name(ctx.guild, required_channel)
+    
+    @staticmethod
+    def channel_mention(guild, required_channel: str) -> str:
+        """Mention kênh yêu cầu nếu server có kênh đó, không thì #tên"""
+        name = ChannelManager.resolve_name(guild, required_channel)
+        target = channel_index.get_channel(guild, name) if guild else None
+        return target.mention if target else f'#{name}'
     
     @staticmethod
     def channel_only(channel_name: str):
-        """Decorator để hạn chế command chỉ chạy trong kênh cụ thể"""
+        """Decorator để hạn chế command chỉ chạy trong kênh cụ thể (loại kênh hoặc tên kênh)"""
         def decorator(func):
             @functools.wraps(func)
             async def wrapper(self, ctx, *args, **kwargs):
                 if not ChannelManager.is_correct_channel(ctx, channel_name):
                     embed = discord.Embed(
                         title="⚠️ Sai kênh",
-                        description=f"Lệnh này chỉ có thể sử dụng trong <#{discord.utils.get(ctx.guild.text_channels, name=channel_name).id if discord.utils.get(ctx.guild.text_channels, name=channel_name) else channel_name}>",
+                        description=f"Lệnh này chỉ có thể sử dụng trong {ChannelManager.channel_mention(ctx.guild, channel_name)}",
                         color=0xF39C12
                     )
                     msg = await ctx.send(embed=embed)
@@ -57,12 +75,75 @@ class ChannelManager:
     @staticmethod
     def music_only():
         """Decorator cho music commands"""
-        return ChannelManager.channel_only(ChannelManager.CHANNEL_CONFIG['music'])
+        return ChannelManager.channel_only('music')
     
     @staticmethod  
     def bot_only():
         """Decorator cho bot commands"""
-        return ChannelManager.channel_only(ChannelManager.CHANNEL_CONFIG['bot'])
+        return ChannelManager.channel_only('bot')
+
+class ChannelIndex:
+    """Chỉ mục tên kênh -> ID theo từng server và tên kênh music/bot/welcome riêng mỗi server.
+
+    Chỉ mục dựng lười ở lần tra cứu đầu tiên (một lần quét text_channels) rồi
+    tra O(1); bị xóa khi kênh của server được tạo/đổi tên/xóa (bot.py gắn
+    listener on_guild_channel_*).
+    """
+    
+    def __init__(self, data_file: str = 'data/channel_settings.json'):
+        self._names: Dict[int, Dict[str, int]] = {}  # guild_id -> {tên kênh: channel_id}
+        # Tên kênh theo loại cho từng server (mặc định CHANNEL_CONFIG)
+        self.settings = SettingsStore(data_file, ChannelManager.CHANNEL_CONFIG)
+    
+    def channel_name(self, guild_id: Optional[int], kind: str) -> str:
+        """Tên kênh loại `kind` của server (mặc định theo CHANNEL_CONFIG)"""
+        if guild_id is None:
+            return ChannelManager.CHANNEL_CONFIG[kind]
+        return self.settings.get(guild_id)[kind]
+    
+    def set_channel_name(self, guild_id: int, kind: str, name: Optional[str]):
+        """Đổi tên kênh loại `kind` cho server; None để về mặc định"""
+        if name:
+            self.settings.update(guild_id, **{kind: name})
+        else:
+            self.settings.reset(guild_id, kind)
+    
+    def get_channel(self, guild, name: str) -> Optional[discord.TextChannel]:
+        """Kênh text có tên `name` trong server, hoặc None"""
+        names = self._names.get(guild.id)
+        if names is None:
+            names = {}
+            # Trùng tên thì giữ kênh đứng đầu như discord.utils.get
+            for channel in guild.text_channels:
+                names.setdefault(channel.name, channel.id)
+            self._names[guild.id] = names
+        channel_id = names.get(name)
+        return guild.get_channel(channel_id) if channel_id else None
+    
+    def get(self, guild, kind: str) -> Optional[discord.TextChannel]:
+        """Kênh loại `kind` ('welcome'/'music'/'bot') của server"""
+        return self.get_channel(guild, self.channel_name(guild.id, kind))
+    
+    def invalidate(self, guild_id: int):
+        self._names.pop(guild_id, None)
+    
+    async def on_channel_create(self, channel):
+        if isinstance(channel, discord.TextChannel):
+            self.invalidate(channel.guild.id)
+    
+    async def on_channel_delete(self, channel):
+        if isinstance(channel, discord.TextChannel):
+            self.invalidate(channel.guild.id)
+    
+    async def on_channel_update(self, before, after):
+        if isinstance(after, discord.TextChannel) and (before.name != after.name or before.position != after.position):
+            self.invalidate(after.guild.id)
+    
+    async def on_guild_remove(self, guild):
+        self.invalidate(guild.id)
+
+# Chỉ mục kênh dùng chung (ChannelManager, Events...)
+channel_index = ChannelIndex()
 
 # Global check function
 async def check_channel_permissions(ctx):
@@ -79,10 +160,9 @@ async def check_channel_permissions(ctx):
     
     # Kiểm tra kênh hiện tại
     if not ChannelManager.is_correct_channel(ctx, required_channel):
-        target_channel = discord.utils.get(ctx.guild.text_channels, name=required_channel)
         embed = discord.Embed(
             title="⚠️ Sai kênh",
-            description=f"Lệnh `{command_name}` chỉ có thể sử dụng trong {target_channel.mention if target_channel else f'#{required_channel}'}",
+            description=f"Lệnh `{command_name}` chỉ có thể sử dụng trong {ChannelManager.channel_mention(ctx.guild, required_channel)}",
             color=0xF39C12
         )
         msg = await ctx.send(embed=embed)
@@ -0,0 +1,271 @@
+import asyncio
+import heapq
+import os
+import time
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import aiosqlite # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Số lần xóa lỗi tạm thời tối đa trước khi bỏ hẳn một tin nhắn
+MAX_DELETE_ATTEMPTS = 5
+
+
+class CleanupEntry:
+    """Tin nhắn của bot chờ xóa"""
+    __slots__ = ('deadline', 'message_id', 'channel_id', 'guild_id', 'attempts')
+
+    def __init__(self, deadline: float, message_id: int, channel_id: int, guild_id: Optional[int]):
+        self.deadline = deadline
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+        self.attempts = 0  # Số lần xóa lỗi (chỉ trong RAM)
+
+    def __lt__(self, other):
+        return (self.deadline, self.message_id) < (other.deadline, other.message_id)
+
+
+class CleanupRegistry:
+    """Danh sách tin nhắn chờ xóa: heap theo hạn xóa trong RAM, ghi SQLite theo lô ở nền.
+
+    `add`/`pop_expired`/`discard` chạy hoàn toàn trong bộ nhớ nên gọi được từ
+    on_message mà không chặn event loop; thay đổi được gom lại và ghi xuống
+    `db_path` mỗi `flush_interval` giây (hoặc khi đủ `flush_size` thay đổi).
+    """
+
+    def __init__(self, db_path: str = 'data/cleanup_messages.db', flush_interval: float = 2.0,
+                 flush_size: int = 200):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._heap: List[CleanupEntry] = []
+        self._entries: Dict[int, CleanupEntry] = {}  # message_id -> entry còn hiệu lực
+        self._inserts: Dict[int, CleanupEntry] = {}
+        self._deletes: set = set()
+        self._cursors: Dict[int, List[int]] = {}  # channel_id -> [last_posted_id, last_swept_id]
+        self._dirty_cursors: set = set()
+        self._db: Optional[aiosqlite.Connection] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_now = asyncio.Event()
+
+        # Thống kê
+        self.flushes = 0
+        self.rows_written = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def load(self):
+        """Mở DB, nạp các tin nhắn còn chờ xóa vào heap và bật flusher nền"""
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self._db = await aiosqlite.connect(self.db_path)
+        await self._db.execute('PRAGMA journal_mode=WAL')
+        await self._db.execute('PRAGMA synchronous=NORMAL')
+        await self._db.execute('''
+            CREATE TABLE IF NOT EXISTS cleanup_messages (
+                message_id INTEGER PRIMARY KEY,
+                channel_id INTEGER NOT NULL,
+                guild_id INTEGER,
+                deadline REAL NOT NULL
+            )
+        ''')
+        await self._db.execute('CREATE INDEX IF NOT EXISTS idx_cleanup_deadline ON cleanup_messages (deadline)')
+        await self._db.execute('''
+            CREATE TABLE IF NOT EXISTS sweep_cursors (
+                channel_id INTEGER PRIMARY KEY,
+                last_posted_id INTEGER NOT NULL DEFAULT 0,
+                last_swept_id INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        await self._import_legacy()
+        await self._db.commit()
+
+        async with self._db.execute('SELECT message_id, channel_id, guild_id, deadline FROM cleanup_messages') as cursor:
+            async for message_id, channel_id, guild_id, deadline in cursor:
+                entry = CleanupEntry(deadline, message_id, channel_id, guild_id)
+                self._entries[message_id] = entry
+                self._heap.append(entry)
+        heapq.heapify(self._heap)
+
+        async with self._db.execute('SELECT channel_id, last_posted_id, last_swept_id FROM sweep_cursors') as cursor:
+            async for channel_id, last_posted_id, last_swept_id in cursor:
+                self._cursors[channel_id] = [last_posted_id, last_swept_id]
+
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        logger.info(f"Cleanup registry loaded {len(self._entries)} pending messages")
+
+    async def _import_legacy(self):
+        """Chuyển dữ liệu từ bảng bot_messages cũ (timestamp + delete_after) sang cột deadline"""
+        async with self._db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'bot_messages'"
+        ) as cursor:
+            if not await cursor.fetchone():
+                return
+
+        rows = []
+        async with self._db.execute(
+            'SELECT message_id, channel_id, guild_id, timestamp, delete_after FROM bot_messages'
+        ) as cursor:
+            async for message_id, channel_id, guild_id, timestamp, delete_after in cursor:
+                try:
+                    created = datetime.fromisoformat(str(timestamp)).timestamp()
+                except ValueError:
+                    created = time.time()
+                rows.append((message_id, channel_id, guild_id, created + (delete_after or 300)))
+
+        await self._db.executemany(
+            'INSERT OR IGNORE INTO cleanup_messages (message_id, channel_id, guild_id, deadline) VALUES (?, ?, ?, ?)',
+            rows
+        )
+        await self._db.execute('DROP TABLE bot_messages')
+        logger.info(f"Migrated {len(rows)} rows from legacy bot_messages table")
+
+    # ===== THAO TÁC TRONG RAM =====
+
+    def add(self, message_id: int, channel_id: int, guild_id: Optional[int], delete_after: float):
+        """Đăng ký tin nhắn để xóa sau delete_after giây (đăng ký lại thì giữ hạn sớm hơn)"""
+        deadline = time.time() + delete_after
+        existing = self._entries.get(message_id)
+        if existing is None or deadline < existing.deadline:
+            entry = CleanupEntry(deadline, message_id, channel_id, guild_id)
+            self._entries[message_id] = entry
+            heapq.heappush(self._heap, entry)
+            self._inserts[message_id] = entry
+            self._deletes.discard(message_id)
+
+        cursor = self._cursors.setdefault(channel_id, [0, 0])
+        if message_id > cursor[0]:
+            cursor[0] = message_id
+            self._dirty_cursors.add(channel_id)
+        self._changed()
+
+    def pop_expired(self, now: float = None) -> List[CleanupEntry]:
+        """Lấy (và bỏ khỏi heap) các tin nhắn đã đến hạn xóa"""
+        now = time.time() if now is None else now
+        expired = []
+        while self._heap and self._heap[0].deadline <= now:
+            entry = heapq.heappop(self._heap)
+            if self._entries.get(entry.message_id) is entry:
+                expired.append(entry)
+        return expired
+
+    def discard(self, message_ids):
+        """Bỏ tin nhắn khỏi registry (đã xóa xong hoặc không thể xóa)"""
+        for message_id in message_ids:
+            self._entries.pop(message_id, None)
+            self._inserts.pop(message_id, None)
+            self._deletes.add(message_id)
+        self._changed()
+
+    def requeue(self, entries: List[CleanupEntry], delay: float = 60) -> List[CleanupEntry]:
+        """Thử lại các tin nhắn xóa lỗi tạm thời, chờ delay giây và gấp đôi sau mỗi lần lỗi.
+
+        Tin nhắn lỗi đủ MAX_DELETE_ATTEMPTS lần bị bỏ khỏi registry; trả về các tin nhắn đó.
+        """
+        dropped = []
+        for entry in entries:
+            if self._entries.get(entry.message_id) is not entry:
+                continue
+            entry.attempts += 1
+            if entry.attempts >= MAX_DELETE_ATTEMPTS:
+                dropped.append(entry)
+                continue
+            entry.deadline = time.time() + delay * 2 ** (entry.attempts - 1)
+            heapq.heappush(self._heap, entry)
+            self._inserts[entry.message_id] = entry
+        if dropped:
+            self.discard([entry.message_id for entry in dropped])
+        self._changed()
+        return dropped
+
+    # ===== CON TRỎ QUÉT TIN NHẮN CŨ =====
+
+    def needs_sweep(self, channel_id: int) -> bool:
+        """Kênh chưa từng quét, hoặc bot đã gửi tin nhắn mới sau lần quét trước"""
+        cursor = self._cursors.get(channel_id)
+        return cursor is None or cursor[0] > cursor[1]
+
+    def last_swept(self, channel_id: int) -> int:
+        cursor = self._cursors.get(channel_id)
+        return cursor[1] if cursor else 0
+
+    def set_swept(self, channel_id: int, message_id: int):
+        """Ghi nhận đã quét kênh tới message_id (snowflake)"""
+        cursor = self._cursors.setdefault(channel_id, [0, 0])
+        if message_id > cursor[1]:
+            cursor[1] = message_id
+            self._dirty_cursors.add(channel_id)
+
+    def count_ready(self, now: float = None) -> int:
+        now = time.time() if now is None else now
+        return sum(1 for entry in self._entries.values() if entry.deadline <= now)
+
+    # ===== GHI NỀN =====
+
+    def _changed(self):
+        if len(self._inserts) + len(self._deletes) >= self.flush_size:
+            self._flush_now.set()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Cleanup registry flush error: {e}")
+
+    async def flush(self):
+        """Ghi các thay đổi đang chờ xuống SQLite trong một transaction"""
+        if self._db is None or (not self._inserts and not self._deletes and not self._dirty_cursors):
+            return
+        pending_inserts, self._inserts = self._inserts, {}
+        pending_deletes, self._deletes = self._deletes, set()
+        dirty_cursors, self._dirty_cursors = self._dirty_cursors, set()
+        inserts = [
+            (entry.message_id, entry.channel_id, entry.guild_id, entry.deadline)
+            for entry in pending_inserts.values()
+        ]
+        deletes = [(message_id,) for message_id in pending_deletes]
+        cursors = [(channel_id, *self._cursors[channel_id]) for channel_id in dirty_cursors]
+
+        try:
+            await self._db.executemany(
+                'INSERT OR REPLACE INTO cleanup_messages (message_id, channel_id, guild_id, deadline) VALUES (?, ?, ?, ?)',
+                inserts
+            )
+            await self._db.executemany('DELETE FROM cleanup_messages WHERE message_id = ?', deletes)
+            await self._db.executemany(
+                'INSERT OR REPLACE INTO sweep_cursors (channel_id, last_posted_id, last_swept_id) VALUES (?, ?, ?)',
+                cursors
+            )
+            await self._db.commit()
+        except Exception:
+            await self._db.rollback()
+            # Giữ lại để lần flush sau ghi tiếp (thay đổi mới hơn trong lúc ghi được ưu tiên)
+            for message_id, entry in pending_inserts.items():
+                if message_id not in self._inserts and message_id not in self._deletes:
+                    self._inserts[message_id] = entry
+            for message_id in pending_deletes:
+                if message_id not in self._inserts:
+                    self._deletes.add(message_id)
+            self._dirty_cursors |= dirty_cursors
+            raise
+        self.flushes += 1
+        self.rows_written += len(inserts) + len(deletes) + len(cursors)
+
+    async def close(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self._db is not None:
+            await self.flush()
+            await self._db.close()
+            self._db = None
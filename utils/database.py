@@ -3,145 +3,420 @@ import aiosqlite # type: ignore
 import asyncio
 from datetime import datetime, timedelta
 import json
-from typing import Optional, List, Tuple
+from typing import Callable, Optional, List, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Pragma cho một connection sống lâu: WAL cho phép đọc song song với ghi,
+# synchronous=NORMAL đủ an toàn với WAL và tránh fsync mỗi commit
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-8000',
+    'PRAGMA busy_timeout=5000',
+)
+
+# Câu lệnh cố định (dùng lại nguyên chuỗi để trúng statement cache của sqlite3)
+SQL_ADD_REMINDER = '''
+    INSERT INTO reminders (user_id, channel_id, guild_id, message, remind_time)
+    VALUES (?, ?, ?, ?, ?)
+'''
+SQL_PENDING_REMINDERS = '''
+    SELECT id, user_id, channel_id, guild_id, message, remind_time
+    FROM reminders
+    WHERE completed = FALSE AND remind_time <= ?
+'''
+SQL_ALL_PENDING_REMINDERS = '''
+    SELECT id, user_id, channel_id, guild_id, message, remind_time
+    FROM reminders
+    WHERE completed = FALSE
+    ORDER BY remind_time
+'''
+SQL_COMPLETE_REMINDER = 'UPDATE reminders SET completed = TRUE, completed_at = ? WHERE id = ?'
+SQL_USER_REMINDERS = '''
+    SELECT id, user_id, channel_id, guild_id, message, remind_time, created_at
+    FROM reminders
+    WHERE user_id = ? AND completed = FALSE
+    ORDER BY remind_time
+'''
+SQL_ADD_TODO = '''
+    INSERT INTO todos (user_id, guild_id, task)
+    VALUES (?, ?, ?)
+'''
+SQL_GET_TODOS = '''
+    SELECT id, task, completed, created_at
+    FROM todos
+    WHERE user_id = ? AND guild_id = ?
+    ORDER BY created_at DESC
+'''
+SQL_COMPLETE_TODO = '''
+    UPDATE todos
+    SET completed = TRUE
+    WHERE id = ? AND user_id = ? AND completed = FALSE
+'''
+SQL_DELETE_TODO = '''
+    DELETE FROM todos
+    WHERE id = ? AND user_id = ?
+'''
+
+
+# Migration theo version (lưu trong PRAGMA user_version). Chỉ thêm migration mới
+# vào cuối, không sửa migration đã phát hành.
+MIGRATIONS = [
+    (1, 'base tables', [
+        '''
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            channel_id INTEGER,
+            guild_id INTEGER,
+            message TEXT,
+            remind_time TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed BOOLEAN DEFAULT FALSE
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS custom_commands (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            command_name TEXT,
+            response TEXT,
+            created_by INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS todos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            guild_id INTEGER,
+            task TEXT,
+            completed BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS server_settings (
+            guild_id INTEGER PRIMARY KEY,
+            prefix TEXT DEFAULT '!',
+            welcome_channel INTEGER,
+            log_channel INTEGER,
+            mute_role INTEGER,
+            settings_json TEXT
+        )
+        ''',
+    ]),
+    (2, 'query indexes', [
+        # Partial index: chỉ chứa reminder chưa xong nên không phình theo lịch sử
+        'CREATE INDEX IF NOT EXISTS idx_reminders_pending ON reminders (remind_time) WHERE completed = FALSE',
+        'CREATE INDEX IF NOT EXISTS idx_reminders_user_pending ON reminders (user_id, remind_time) WHERE completed = FALSE',
+        'CREATE INDEX IF NOT EXISTS idx_todos_user_guild ON todos (user_id, guild_id, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_custom_commands_guild ON custom_commands (guild_id, command_name)',
+    ]),
+    (3, 'reminder archive', [
+        'ALTER TABLE reminders ADD COLUMN completed_at TIMESTAMP',
+        '''
+        CREATE TABLE IF NOT EXISTS reminders_archive (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            channel_id INTEGER,
+            guild_id INTEGER,
+            message TEXT,
+            remind_time TIMESTAMP,
+            created_at TIMESTAMP,
+            completed_at TIMESTAMP
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_reminders_archive_completed ON reminders_archive (completed_at)',
+    ]),
+]
+
+
+class WriteRequest:
+    """Một câu lệnh ghi đang chờ group commit"""
+    __slots__ = ('sql', 'params', 'future')
+
+    def __init__(self, sql, params, future):
+        self.sql = sql
+        self.params = params
+        self.future = future
+
+
 class DatabaseManager:
-    def __init__(self, db_path: str):
+    CLOSE_TIMEOUT = 10  # Giây tối đa chờ ghi nốt các lệnh đang chờ khi tắt bot
+
+    def __init__(self, db_path: str, group_commit: bool = False, commit_delay: float = 0.005,
+                 max_batch: int = 100):
         self.db_path = db_path
-    
+        self.group_commit = group_commit
+        self.commit_delay = commit_delay  # Cửa sổ gom các lệnh ghi nhỏ (giây)
+        self.max_batch = max_batch
+        self._db: Optional[aiosqlite.Connection] = None
+        self._connect_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self._writes: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._reminder_listeners: List[Callable[[Tuple], None]] = []
+
+        # Thống kê group commit
+        self.commits = 0
+        self.batched_writes = 0
+
+    async def _get_db(self) -> aiosqlite.Connection:
+        """Connection dùng chung cho mọi truy vấn, mở một lần"""
+        if self._db is not None:
+            return self._db
+        async with self._connect_lock:
+            if self._db is None:
+                db = await aiosqlite.connect(self.db_path, cached_statements=256)
+                for pragma in PRAGMAS:
+                    await db.execute(pragma)
+                self._db = db
+        return self._db
+
     async def initialize(self):
-        """Initialize database with required tables"""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Reminders table
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS reminders (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    channel_id INTEGER,
-                    guild_id INTEGER,
-                    message TEXT,
-                    remind_time TIMESTAMP,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    completed BOOLEAN DEFAULT FALSE
-                )
-            ''')
-            
-            # Custom commands table
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS custom_commands (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER,
-                    command_name TEXT,
-                    response TEXT,
-                    created_by INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Todo lists table
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS todos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    guild_id INTEGER,
-                    task TEXT,
-                    completed BOOLEAN DEFAULT FALSE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Server settings table
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS server_settings (
-                    guild_id INTEGER PRIMARY KEY,
-                    prefix TEXT DEFAULT '!',
-                    welcome_channel INTEGER,
-                    log_channel INTEGER,
-                    mute_role INTEGER,
-                    settings_json TEXT
-                )
-            ''')
-            
+        """Initialize database: chạy các migration còn thiếu rồi dọn reminder cũ"""
+        db = await self._get_db()
+        await self._migrate(db)
+        await self.archive_reminders()
+
+        if self.group_commit:
+            self._writes = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._writer_loop())
+        logger.info("Database initialized successfully")
+
+    async def _migrate(self, db: aiosqlite.Connection):
+        """Chạy lần lượt các migration có version > PRAGMA user_version"""
+        async with db.execute('PRAGMA user_version') as cursor:
+            current = (await cursor.fetchone())[0]
+
+        for version, description, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            try:
+                await db.execute('BEGIN')
+                for statement in statements:
+                    await db.execute(statement)
+                # PRAGMA không nhận tham số, version là hằng số trong MIGRATIONS
+                await db.execute(f'PRAGMA user_version = {int(version)}')
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                logger.error(f"Database migration {version} ({description}) failed")
+                raise
+            logger.info(f"Applied database migration {version}: {description}")
+
+    async def close(self):
+        """Ghi nốt các lệnh đang chờ rồi đóng connection"""
+        if self._writer_task is not None:
+            # Writer đã dừng thì join() sẽ chờ mãi: chỉ chờ khi nó còn chạy, và có giới hạn
+            if not self._writer_task.done():
+                try:
+                    await asyncio.wait_for(self._writes.join(), timeout=self.CLOSE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logger.error("Timed out flushing pending database writes")
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except BaseException:
+                pass
+            self._writer_task = None
+
+            # Lệnh còn trong hàng chờ sẽ không bao giờ được ghi: báo lỗi cho người gọi
+            pending = []
+            while not self._writes.empty():
+                pending.append(self._writes.get_nowait())
+                self._writes.task_done()
+            self._fail_requests(pending, RuntimeError("Database is closed"))
+            self._writes = None
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+    # ===== GHI =====
+
+    async def _write(self, sql: str, params: tuple = ()) -> Tuple[int, int]:
+        """Thực thi một lệnh ghi, trả về (lastrowid, rowcount)"""
+        if self._writes is not None:
+            future = asyncio.get_running_loop().create_future()
+            self._writes.put_nowait(WriteRequest(sql, params, future))
+            return await future
+
+        db = await self._get_db()
+        async with self._write_lock:
+            async with db.execute(sql, params) as cursor:
+                result = (cursor.lastrowid, cursor.rowcount)
             await db.commit()
-            logger.info("Database initialized successfully")
-    
-    async def add_reminder(self, user_id: int, channel_id: int, guild_id: int, 
+            self.commits += 1
+        return result
+
+    async def _writer_loop(self):
+        """Gom các lệnh ghi đến trong vài ms vào một transaction/commit"""
+        while True:
+            batch = [await self._writes.get()]
+            try:
+                await asyncio.sleep(self.commit_delay)
+                while len(batch) < self.max_batch and not self._writes.empty():
+                    batch.append(self._writes.get_nowait())
+                await self._run_batch(batch)
+            except asyncio.CancelledError:
+                self._fail_requests(batch, RuntimeError("Database is closed"))
+                raise
+            except Exception as e:
+                # Không để writer chết (close() và các lệnh sau sẽ treo): báo lỗi cho cả lô
+                logger.error(f"Group commit writer error: {e}")
+                self._fail_requests(batch, e)
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+
+    @staticmethod
+    def _fail_requests(requests: List[WriteRequest], error: BaseException):
+        for request in requests:
+            if not request.future.done():
+                request.future.set_exception(error)
+
+    async def _run_batch(self, batch: List[WriteRequest]):
+        db = await self._get_db()
+        async with self._write_lock:
+            await self._commit_batch(db, batch)
+
+    async def _commit_batch(self, db: aiosqlite.Connection, batch: List[WriteRequest]):
+        results = []
+        for request in batch:
+            try:
+                async with db.execute(request.sql, request.params) as cursor:
+                    results.append((request, (cursor.lastrowid, cursor.rowcount), None))
+            except Exception as e:
+                results.append((request, None, e))
+
+        try:
+            await db.commit()
+            self.commits += 1
+            self.batched_writes += len(batch)
+        except Exception as e:
+            logger.error(f"Group commit failed: {e}")
+            results = [(request, None, e) for request, _, _ in results]
+
+        for request, result, error in results:
+            if request.future.done():
+                continue
+            if error is not None:
+                request.future.set_exception(error)
+            else:
+                request.future.set_result(result)
+
+    # ===== REMINDERS =====
+
+    async def add_reminder(self, user_id: int, channel_id: int, guild_id: int,
                           message: str, remind_time: datetime) -> int:
         """Add a reminder and return its ID"""
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute('''
-                INSERT INTO reminders (user_id, channel_id, guild_id, message, remind_time)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, channel_id, guild_id, message, remind_time)) as cursor:
-                reminder_id = cursor.lastrowid
-            
-            await db.commit()
-            return reminder_id
-    
+        reminder_id, _ = await self._write(
+            SQL_ADD_REMINDER, (user_id, channel_id, guild_id, message, remind_time)
+        )
+        
+        # Báo cho bộ hẹn giờ reminder (Scheduler cog) để không phải poll DB
+        row = (reminder_id, user_id, channel_id, guild_id, message, remind_time)
+        for listener in self._reminder_listeners:
+            try:
+                listener(row)
+            except Exception as e:
+                logger.error(f"Reminder listener error: {e}")
+        return reminder_id
+
+    def add_reminder_listener(self, listener: Callable[[Tuple], None]):
+        """Đăng ký hàm được gọi với (id, user_id, channel_id, guild_id, message, remind_time) mỗi khi thêm reminder"""
+        self._reminder_listeners.append(listener)
+
+    def remove_reminder_listener(self, listener: Callable[[Tuple], None]):
+        if listener in self._reminder_listeners:
+            self._reminder_listeners.remove(listener)
+
+    async def get_all_pending_reminders(self) -> List[Tuple]:
+        """Mọi reminder chưa xong (kể cả chưa đến hạn), sớm nhất trước - nạp lúc khởi động"""
+        db = await self._get_db()
+        async with db.execute(SQL_ALL_PENDING_REMINDERS) as cursor:
+            rows = await cursor.fetchall()
+        return [(*row[:5], self._parse_time(row[5])) for row in rows]
+
     async def get_pending_reminders(self) -> List[Tuple]:
         """Get all pending reminders that are due"""
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute('''
-                SELECT id, user_id, channel_id, guild_id, message, remind_time
-                FROM reminders 
-                WHERE completed = FALSE AND remind_time <= CURRENT_TIMESTAMP
-            ''') as cursor:
-                return await cursor.fetchall()
-    
+        # remind_time được lưu theo giờ local (datetime.now()) nên so với giờ local,
+        # không dùng CURRENT_TIMESTAMP (UTC)
+        db = await self._get_db()
+        async with db.execute(SQL_PENDING_REMINDERS, (datetime.now(),)) as cursor:
+            return await cursor.fetchall()
+
     async def complete_reminder(self, reminder_id: int):
         """Mark reminder as completed"""
-        async with aiosqlite.connect(self.db_path) as db:
+        await self._write(SQL_COMPLETE_REMINDER, (datetime.now(), reminder_id))
+
+    async def get_user_reminders(self, user_id: int) -> List[Tuple]:
+        """Reminder chưa đến hạn của một người dùng, sớm nhất trước"""
+        db = await self._get_db()
+        async with db.execute(SQL_USER_REMINDERS, (user_id,)) as cursor:
+            rows = await cursor.fetchall()
+        return [
+            (*row[:5], self._parse_time(row[5]), row[6])
+            for row in rows
+        ]
+
+    @staticmethod
+    def _parse_time(value):
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                return value
+        return value
+
+    async def archive_reminders(self, retention_days: int = 90) -> int:
+        """Chuyển reminder đã xong sang reminders_archive và xóa bản lưu trữ quá retention_days.
+
+        Giữ bảng reminders chỉ còn reminder đang chờ để truy vấn không chậm dần theo thời gian.
+        """
+        db = await self._get_db()
+        async with self._write_lock:
+            await db.execute('''
+                INSERT OR REPLACE INTO reminders_archive
+                    (id, user_id, channel_id, guild_id, message, remind_time, created_at, completed_at)
+                SELECT id, user_id, channel_id, guild_id, message, remind_time, created_at,
+                       COALESCE(completed_at, remind_time)
+                FROM reminders WHERE completed = TRUE
+            ''')
+            async with db.execute('DELETE FROM reminders WHERE completed = TRUE') as cursor:
+                archived = cursor.rowcount
             await db.execute(
-                'UPDATE reminders SET completed = TRUE WHERE id = ?',
-                (reminder_id,)
+                'DELETE FROM reminders_archive WHERE completed_at < ?',
+                (datetime.now() - timedelta(days=retention_days),)
             )
             await db.commit()
-    
+        if archived:
+            logger.info(f"Archived {archived} completed reminders")
+        return archived
+
+    # ===== TODOS =====
+
     async def add_todo(self, user_id: int, guild_id: int, task: str) -> int:
         """Add a todo item"""
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute('''
-                INSERT INTO todos (user_id, guild_id, task)
-                VALUES (?, ?, ?)
-            ''', (user_id, guild_id, task)) as cursor:
-                todo_id = cursor.lastrowid
-            
-            await db.commit()
-            return todo_id
-    
+        todo_id, _ = await self._write(SQL_ADD_TODO, (user_id, guild_id, task))
+        return todo_id
+
     async def get_todos(self, user_id: int, guild_id: int) -> List[Tuple]:
         """Get user's todo list"""
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute('''
-                SELECT id, task, completed, created_at
-                FROM todos 
-                WHERE user_id = ? AND guild_id = ?
-                ORDER BY created_at DESC
-            ''', (user_id, guild_id)) as cursor:
-                return await cursor.fetchall()
-    
+        db = await self._get_db()
+        async with db.execute(SQL_GET_TODOS, (user_id, guild_id)) as cursor:
+            return await cursor.fetchall()
+
     async def complete_todo(self, todo_id: int, user_id: int) -> bool:
         """Complete a todo item"""
-        async with aiosqlite.connect(self.db_path) as db:
-            result = await db.execute('''
-                UPDATE todos 
-                SET completed = TRUE 
-                WHERE id = ? AND user_id = ? AND completed = FALSE
-            ''', (todo_id, user_id))
-            
-            await db.commit()
-            return result.rowcount > 0
-    
+        _, rowcount = await self._write(SQL_COMPLETE_TODO, (todo_id, user_id))
+        return rowcount > 0
+
     async def delete_todo(self, todo_id: int, user_id: int) -> bool:
         """Delete a todo item"""
-        async with aiosqlite.connect(self.db_path) as db:
-            result = await db.execute('''
-                DELETE FROM todos 
-                WHERE id = ? AND user_id = ?
-            ''', (todo_id, user_id))
-            
-            await db.commit()
-            return result.rowcount > 0
+        _, rowcount = await self._write(SQL_DELETE_TODO, (todo_id, user_id))
+        return rowcount > 0
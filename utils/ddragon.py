@@ -0,0 +1,197 @@
+import asyncio
+import json
+import os
+import shutil
+import logging
+from typing import Optional
+
+from utils.http_client import http_client
+from utils.async_cache import AsyncCache
+
+logger = logging.getLogger(__name__)
+
+DDRAGON_BASE_URL = "https://ddragon.leagueoflegends.com"
+FALLBACK_VERSION = "13.24.1"
+
+
+def version_key(version: str):
+    """'14.3.1' -> (14, 3, 1) để so sánh; bản không phải số xếp cuối"""
+    try:
+        return tuple(int(part) for part in version.split('.'))
+    except ValueError:
+        return ()
+
+
+class DataDragonSnapshot:
+    """Dữ liệu champion.json/item.json của một patch (không sửa sau khi tạo)"""
+    __slots__ = ('version', 'champions', 'items', '_indexes')
+
+    def __init__(self, version: Optional[str], champions: dict, items: dict):
+        self.version = version
+        self.champions = champions
+        self.items = items
+        self._indexes = {}
+
+    def index(self, name: str, builder):
+        """Chỉ mục dựng một lần cho snapshot này (builder(snapshot)), thay cùng snapshot khi có patch mới"""
+        index = self._indexes.get(name)
+        if index is None:
+            index = self._indexes[name] = builder(self)
+        return index
+
+    def __bool__(self):
+        return bool(self.champions)
+
+
+class DataDragonStore:
+    """Bản sao Data Dragon theo từng patch trên đĩa, phục vụ lệnh LoL từ bộ nhớ.
+
+    Khởi động đọc snapshot mới nhất trong `data_dir` (không cần mạng); task nền
+    hỏi versions.json mỗi `poll_interval` giây, có patch mới thì tải về thư mục
+    riêng rồi thay `snapshot` một lần (lệnh đang chạy vẫn dùng bản cũ trọn vẹn).
+    """
+
+    def __init__(self, data_dir: str = 'data/ddragon', locale: str = 'vi_VN',
+                 poll_interval: float = 3600, keep_versions: int = 2):
+        self.data_dir = data_dir
+        self.locale = locale
+        self.poll_interval = poll_interval
+        self.keep_versions = keep_versions
+        self.snapshot = DataDragonSnapshot(None, {}, {})
+        self._refresh_lock = asyncio.Lock()
+        # versions.json: lần chạy đầu (chưa có snapshot) nhiều lệnh cùng chờ chỉ hỏi một lần,
+        # lỗi mạng được nhớ 30 giây thay vì mỗi lệnh lại thử
+        self._latest_version = AsyncCache(
+            lambda _: self.fetch_latest_version(), ttl=60, negative_ttl=30, max_size=1, name='ddragon-version'
+        )
+        self._poll_task: Optional[asyncio.Task] = None
+
+    @property
+    def version(self) -> str:
+        return self.snapshot.version or FALLBACK_VERSION
+
+    # ===== ĐĨA =====
+
+    def _version_dir(self, version: str) -> str:
+        return os.path.join(self.data_dir, version)
+
+    def _read_snapshot(self, version: str) -> Optional[DataDragonSnapshot]:
+        directory = self._version_dir(version)
+        try:
+            with open(os.path.join(directory, 'champion.json'), 'r', encoding='utf-8') as f:
+                champions = json.load(f).get('data', {})
+            with open(os.path.join(directory, 'item.json'), 'r', encoding='utf-8') as f:
+                items = json.load(f).get('data', {})
+        except (OSError, ValueError):
+            return None
+        return DataDragonSnapshot(version, champions, items)
+
+    def _read_latest(self) -> Optional[DataDragonSnapshot]:
+        """Snapshot đầy đủ mới nhất có trên đĩa"""
+        if not os.path.isdir(self.data_dir):
+            return None
+        versions = sorted(
+            (name for name in os.listdir(self.data_dir) if version_key(name)),
+            key=version_key, reverse=True
+        )
+        for version in versions:
+            snapshot = self._read_snapshot(version)
+            if snapshot:
+                return snapshot
+        return None
+
+    def _write_snapshot(self, version: str, champion_raw: bytes, item_raw: bytes) -> DataDragonSnapshot:
+        """Ghi snapshot vào thư mục tạm rồi rename để không bao giờ đọc phải bản dở dang"""
+        champions = json.loads(champion_raw).get('data', {})
+        items = json.loads(item_raw).get('data', {})
+
+        os.makedirs(self.data_dir, exist_ok=True)
+        final_dir = self._version_dir(version)
+        tmp_dir = final_dir + '.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name, raw in (('champion.json', champion_raw), ('item.json', item_raw)):
+            with open(os.path.join(tmp_dir, name), 'wb') as f:
+                f.write(raw)
+                f.flush()
+                os.fsync(f.fileno())
+        shutil.rmtree(final_dir, ignore_errors=True)
+        os.replace(tmp_dir, final_dir)
+        self._prune(version)
+        return DataDragonSnapshot(version, champions, items)
+
+    def _prune(self, current: str):
+        """Chỉ giữ keep_versions patch gần nhất"""
+        versions = sorted(
+            (name for name in os.listdir(self.data_dir) if version_key(name)),
+            key=version_key, reverse=True
+        )
+        for version in versions[self.keep_versions:]:
+            if version != current:
+                shutil.rmtree(self._version_dir(version), ignore_errors=True)
+
+    # ===== MẠNG =====
+
+    async def fetch_latest_version(self) -> Optional[str]:
+        async with http_client.get(f"{DDRAGON_BASE_URL}/api/versions.json") as resp:
+            if resp.status != 200:
+                return None
+            versions = await resp.json()
+            return versions[0] if versions else None
+
+    async def _download(self, version: str, name: str) -> bytes:
+        url = f"{DDRAGON_BASE_URL}/cdn/{version}/data/{self.locale}/{name}"
+        async with http_client.get(url) as resp:
+            resp.raise_for_status()
+            return await resp.read()
+
+    async def refresh(self) -> bool:
+        """Tải patch mới nếu có; True nếu snapshot đã được thay"""
+        async with self._refresh_lock:
+            version = await self._latest_version.get('latest')
+            if not version or version == self.snapshot.version:
+                return False
+            champion_raw, item_raw = await asyncio.gather(
+                self._download(version, 'champion.json'),
+                self._download(version, 'item.json')
+            )
+            snapshot = await asyncio.to_thread(self._write_snapshot, version, champion_raw, item_raw)
+            self.snapshot = snapshot
+            logger.info(f"Data Dragon snapshot updated to {version}")
+            return True
+
+    # ===== VÒNG ĐỜI =====
+
+    async def load(self):
+        """Nạp snapshot trên đĩa (không gọi mạng)"""
+        snapshot = await asyncio.to_thread(self._read_latest)
+        if snapshot:
+            self.snapshot = snapshot
+            logger.info(f"Loaded Data Dragon snapshot {snapshot.version} from disk")
+
+    def start(self):
+        if self._poll_task is None:
+            self._poll_task = asyncio.create_task(self._poll_loop())
+
+    async def _poll_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Data Dragon refresh error: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def ensure_loaded(self) -> DataDragonSnapshot:
+        """Snapshot hiện tại; chỉ lần chạy đầu tiên (chưa có gì trên đĩa) mới phải chờ tải"""
+        if not self.snapshot:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Data Dragon initial download error: {e}")
+        return self.snapshot
+
+    async def close(self):
+        if self._poll_task:
+            self._poll_task.cancel()
+            self._poll_task = None
+        await self._latest_version.close()
@@ -0,0 +1,158 @@
+import asyncio
+import heapq
+import itertools
+import time
+import logging
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Độ ưu tiên: số nhỏ chạy trước
+PRIORITY_PLAY = 0       # Người dùng đang chờ (play/search)
+PRIORITY_QUEUE = 5      # Thêm bài vào queue/playlist
+PRIORITY_PREFETCH = 10  # Resolve nền cho bài sắp phát
+
+
+class ExtractionJob:
+    """Một lệnh gọi yt-dlp đang chờ hoặc đang chạy"""
+    __slots__ = ('func', 'guild_id', 'priority', 'future', 'submitted_at', 'started_at')
+
+    def __init__(self, func, guild_id, priority, future):
+        self.func = func
+        self.guild_id = guild_id
+        self.priority = priority
+        self.future = future
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+
+
+class ExtractionScheduler:
+    """Thread pool riêng cho yt-dlp, có giới hạn số job mỗi guild và ưu tiên "phát ngay" hơn prefetch.
+
+    Thay cho `loop.run_in_executor(None, ...)` để một guild thêm playlist dài
+    không chiếm hết thread của các guild khác.
+    """
+
+    def __init__(self, workers: int = 4, per_guild: int = 2):
+        self.workers = max(1, workers)
+        self.per_guild = max(1, per_guild)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = []  # heap (priority, seq, job)
+        self._seq = itertools.count()
+        self._running = 0
+        self._guild_running = Counter()
+
+        # Thống kê
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self._wait_samples = deque(maxlen=500)
+        self._run_samples = deque(maxlen=500)
+
+    def configure(self, workers: int = None, per_guild: int = None):
+        """Đổi cấu hình (gọi lúc khởi động, trước khi có job)"""
+        if workers:
+            self.workers = max(1, workers)
+            if self._executor:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        if per_guild:
+            self.per_guild = max(1, per_guild)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ytdl')
+        return self._executor
+
+    async def run(self, func: Callable[[], Any], *, guild_id: int = None, priority: int = PRIORITY_PLAY) -> Any:
+        """Chạy func (blocking) trong pool và chờ kết quả"""
+        loop = asyncio.get_running_loop()
+        job = ExtractionJob(func, guild_id, priority, loop.create_future())
+        self.submitted += 1
+        heapq.heappush(self._pending, (priority, next(self._seq), job))
+        self._dispatch()
+        return await job.future
+
+    def _dispatch(self):
+        skipped = []
+        while self._pending and self._running < self.workers:
+            entry = heapq.heappop(self._pending)
+            job = entry[2]
+            if job.future.done():  # Người gọi đã hủy
+                continue
+            if job.guild_id is not None and self._guild_running[job.guild_id] >= self.per_guild:
+                skipped.append(entry)
+                continue
+            self._start(job)
+        for entry in skipped:
+            heapq.heappush(self._pending, entry)
+
+    def _start(self, job: ExtractionJob):
+        loop = job.future.get_loop()
+        job.started_at = time.perf_counter()
+        self._wait_samples.append(job.started_at - job.submitted_at)
+        self._running += 1
+        if job.guild_id is not None:
+            self._guild_running[job.guild_id] += 1
+
+        fut = loop.run_in_executor(self._get_executor(), job.func)
+        fut.add_done_callback(lambda f, job=job: self._finish(job, f))
+
+    def _finish(self, job: ExtractionJob, fut):
+        self._running -= 1
+        if job.guild_id is not None:
+            self._guild_running[job.guild_id] -= 1
+            if self._guild_running[job.guild_id] <= 0:
+                del self._guild_running[job.guild_id]
+        self._run_samples.append(time.perf_counter() - job.started_at)
+
+        if fut.cancelled():
+            self.failed += 1
+            if not job.future.done():
+                job.future.cancel()
+        elif fut.exception() is not None:
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(fut.exception())
+        else:
+            self.completed += 1
+            if not job.future.done():
+                job.future.set_result(fut.result())
+
+        self._dispatch()
+
+    @staticmethod
+    def _percentile(samples, pct):
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    def get_stats(self) -> dict:
+        waits = list(self._wait_samples)
+        runs = list(self._run_samples)
+        return {
+            'workers': self.workers,
+            'per_guild': self.per_guild,
+            'running': self._running,
+            'queued': sum(1 for _, _, job in self._pending if not job.future.done()),
+            'busy_guilds': len(self._guild_running),
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'wait_avg': sum(waits) / len(waits) if waits else 0.0,
+            'wait_p95': self._percentile(waits, 0.95),
+            'run_avg': sum(runs) / len(runs) if runs else 0.0,
+            'run_p95': self._percentile(runs, 0.95),
+        }
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# Scheduler dùng chung cho mọi cog gọi yt-dlp
+extraction_scheduler = ExtractionScheduler()
@@ -0,0 +1,127 @@
+import asyncio
+import time
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import aiohttp # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+class HostStats:
+    """Độ trễ/lỗi của các request tới một host"""
+    __slots__ = ('requests', 'errors', 'total_time', 'max_time', 'samples')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.samples = deque(maxlen=200)
+
+    def record(self, elapsed: float, failed: bool):
+        self.requests += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.samples.append(elapsed)
+        if failed:
+            self.errors += 1
+
+    def to_dict(self) -> dict:
+        ordered = sorted(self.samples)
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'error_rate': (self.errors / self.requests * 100) if self.requests else 0.0,
+            'avg': (self.total_time / self.requests) if self.requests else 0.0,
+            'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0,
+            'max': self.max_time,
+        }
+
+
+class HttpClient:
+    """Một aiohttp.ClientSession dùng chung cho cả bot.
+
+    Giữ kết nối keep-alive, cache DNS và giới hạn số kết nối mỗi host thay cho
+    việc mở `aiohttp.ClientSession()` mới (TCP + TLS + DNS) ở mỗi request.
+    Dùng: `async with http_client.get(url) as resp: ...`
+    """
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 10, timeout: float = 15,
+                 connect_timeout: float = 5, dns_ttl: int = 300, keepalive: float = 30):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.dns_ttl = dns_ttl
+        self.keepalive = keepalive
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._hosts: Dict[str, HostStats] = {}
+
+    def configure(self, limit: int = None, limit_per_host: int = None, timeout: float = None):
+        """Đổi cấu hình (gọi lúc khởi động, trước khi mở session)"""
+        if limit:
+            self.limit = limit
+        if limit_per_host:
+            self.limit_per_host = limit_per_host
+        if timeout:
+            self.timeout = timeout
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=self.connect_timeout)
+            )
+        return self._session
+
+    def start(self):
+        """Mở session (gọi trong setup_hook khi đã có event loop)"""
+        return self.session
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs):
+        """Như `session.request` nhưng ghi lại độ trễ (tới khi có header) và lỗi theo host"""
+        host = urlparse(url).hostname or 'unknown'
+        stats = self._hosts.setdefault(host, HostStats())
+        started = time.perf_counter()
+        recorded = False
+        try:
+            async with self.session.request(method, url, **kwargs) as response:
+                stats.record(time.perf_counter() - started, response.status >= 500)
+                recorded = True
+                yield response
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if not recorded:
+                stats.record(time.perf_counter() - started, True)
+            raise
+
+    def get(self, url: str, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def get_stats(self) -> Dict[str, dict]:
+        """Thống kê theo host, host nhiều request nhất trước"""
+        ordered = sorted(self._hosts.items(), key=lambda item: item[1].requests, reverse=True)
+        return {host: stats.to_dict() for host, stats in ordered}
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+# Session HTTP dùng chung cho mọi cog (LoL, AI, ảnh AI, Fun...)
+http_client = HttpClient()
@@ -0,0 +1,187 @@
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Ngưỡng điểm trigram tối thiểu để coi là gõ sai gần đúng
+FUZZY_THRESHOLD = 0.3
+
+
+def normalize(text: str) -> str:
+    """Bỏ dấu, đ -> d, chữ thường, chỉ giữ chữ/số: "Kai'Sa" -> "kaisa", "Lưỡi Dao" -> "luoidao\""""
+    text = unicodedata.normalize('NFD', text.lower().replace('đ', 'd'))
+    return ''.join(ch for ch in text if ch.isalnum() and not unicodedata.combining(ch))
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """Tra tên theo chuẩn hóa: khớp chính xác O(1), tiền tố O(log n + k), chuỗi con/gõ sai qua trigram.
+
+    Mỗi mục có một tên hiển thị và nhiều tên gọi (tên, id, bí danh tiếng Việt...).
+    """
+
+    def __init__(self):
+        self._exact: Dict[str, int] = {}  # tên chuẩn hóa -> vị trí mục
+        self._sorted: List[Tuple[str, int]] = []  # (tên chuẩn hóa, vị trí mục) để tìm tiền tố
+        self._values: List[Tuple[str, Any]] = []  # (tên hiển thị, giá trị)
+        self._alphabetical: List[int] = []
+        self._names: List[str] = []  # tên chuẩn hóa theo vị trí trong _sorted
+        self._trigrams: Dict[str, set] = {}
+
+    def add(self, value: Any, display: str, aliases: Iterable[str] = ()):
+        slot = len(self._values)
+        self._values.append((display, value))
+        for name in (display, *aliases):
+            key = normalize(name or '')
+            if not key:
+                continue
+            # Tên chính xác đầu tiên giữ chỗ (tên tướng thắng bí danh trùng)
+            self._exact.setdefault(key, slot)
+            self._sorted.append((key, slot))
+
+    def build(self):
+        """Gọi sau khi add xong"""
+        self._sorted = sorted(set(self._sorted))
+        self._names = [name for name, _ in self._sorted]
+        self._alphabetical = sorted(range(len(self._values)), key=lambda slot: self._values[slot][0])
+        self._trigrams = {}
+        for position, (name, _) in enumerate(self._sorted):
+            for gram in trigrams(name):
+                self._trigrams.setdefault(gram, set()).add(position)
+        return self
+
+    def __len__(self):
+        return len(self._values)
+
+    def exact(self, query: str) -> Optional[Any]:
+        slot = self._exact.get(normalize(query))
+        return None if slot is None else self._values[slot][1]
+
+    def _prefix_slots(self, key: str) -> Iterable[int]:
+        start = bisect_left(self._names, key)
+        for position in range(start, len(self._names)):
+            if not self._names[position].startswith(key):
+                break
+            yield self._sorted[position][1]
+
+    def _scored_slots(self, key: str) -> List[Tuple[float, int]]:
+        """Các mục có tên chứa key (điểm 1) hoặc gần giống theo trigram, điểm cao trước"""
+        grams = trigrams(key)
+        counts: Dict[int, int] = {}
+        for gram in grams:
+            for position in self._trigrams.get(gram, ()):
+                counts[position] = counts.get(position, 0) + 1
+        best: Dict[int, float] = {}
+        for position, shared in counts.items():
+            name, slot = self._sorted[position]
+            if key in name:
+                score = 1.0 + len(key) / len(name)
+            else:
+                score = shared / len(grams | trigrams(name))
+                if score < FUZZY_THRESHOLD:
+                    continue
+            if score > best.get(slot, 0):
+                best[slot] = score
+        return sorted(((score, slot) for slot, score in best.items()), key=lambda item: (-item[0], item[1]))
+
+    def find(self, query: str) -> Optional[Any]:
+        """Mục khớp nhất: chính xác > tiền tố > chứa chuỗi > gần đúng"""
+        key = normalize(query)
+        if not key:
+            return None
+        slot = self._exact.get(key)
+        if slot is None:
+            slot = next(iter(self._prefix_slots(key)), None)
+        if slot is None:
+            scored = self._scored_slots(key)
+            slot = scored[0][1] if scored else None
+        return None if slot is None else self._values[slot][1]
+
+    def suggest(self, query: str, limit: int = 25) -> List[Tuple[str, Any]]:
+        """[(tên hiển thị, giá trị)] cho autocomplete/gợi ý, tối đa limit"""
+        key = normalize(query)
+        slots: List[int] = []
+        seen = set()
+
+        def push(slot):
+            if slot not in seen:
+                seen.add(slot)
+                slots.append(slot)
+
+        if not key:
+            for slot in self._alphabetical[:limit]:
+                push(slot)
+        else:
+            exact = self._exact.get(key)
+            if exact is not None:
+                push(exact)
+            for slot in self._prefix_slots(key):
+                push(slot)
+                if len(slots) >= limit:
+                    break
+            if len(slots) < limit:
+                for _, slot in self._scored_slots(key):
+                    push(slot)
+                    if len(slots) >= limit:
+                        break
+        return [self._values[slot] for slot in slots[:limit]]
+
+
+class ChampionIndex:
+    """Chỉ mục tướng của một snapshot Data Dragon"""
+
+    def __init__(self, champions: dict):
+        self.search = SearchIndex()
+        self.by_key: Dict[int, str] = {}  # key số (Riot API) -> tên tướng
+        for champ_key, champ in champions.items():
+            self.search.add(champ, champ['name'], (champ.get('id'), champ_key))
+            try:
+                self.by_key[int(champ.get('key', 0))] = champ['name']
+            except (TypeError, ValueError):
+                pass
+        self.search.build()
+
+    def find(self, query: str) -> Optional[dict]:
+        return self.search.find(query)
+
+    def suggest(self, query: str, limit: int = 25) -> List[str]:
+        return [name for name, _ in self.search.suggest(query, limit)]
+
+
+class ItemIndex:
+    """Chỉ mục item của một snapshot, kèm bí danh Anh <-> Việt"""
+
+    def __init__(self, items: dict, aliases: Dict[str, str]):
+        self.search = SearchIndex()
+        self.by_name: Dict[str, str] = {}  # tên chuẩn hóa -> item_id
+        # Bí danh theo tên item chuẩn hóa (cả hai chiều: tên Anh <-> tên Việt)
+        alias_map: Dict[str, List[str]] = {}
+        for english, vietnamese in aliases.items():
+            alias_map.setdefault(normalize(english), []).append(vietnamese)
+            alias_map.setdefault(normalize(vietnamese), []).append(english)
+
+        for item_id, item in items.items():
+            name = item.get('name', '')
+            key = normalize(name)
+            self.by_name.setdefault(key, item_id)
+            self.search.add((item_id, item), name, alias_map.get(key, ()))
+        for key, names in alias_map.items():
+            if key in self.by_name:
+                for alias in names:
+                    self.by_name.setdefault(normalize(alias), self.by_name[key])
+        self.search.build()
+
+    def find(self, query: str) -> Tuple[Optional[str], Optional[dict]]:
+        """(item_id, item) khớp nhất hoặc (None, None)"""
+        found = self.search.find(query)
+        return found if found else (None, None)
+
+    def id_for(self, name: str) -> Optional[str]:
+        """item_id theo tên chính xác (tên Anh, Việt hoặc tên trong Data Dragon)"""
+        return self.by_name.get(normalize(name))
+
+    def suggest(self, query: str, limit: int = 25) -> List[str]:
+        return [name for name, _ in self.search.suggest(query, limit)]
@@ -0,0 +1,174 @@
+import asyncio
+import inspect
+import re
+import time
+import logging
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ListenerStats:
+    """Chi phí của một listener tin nhắn"""
+    __slots__ = ('calls', 'skipped', 'errors', 'total_time', 'max_time')
+
+    def __init__(self):
+        self.calls = 0
+        self.skipped = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def record(self, elapsed: float, failed: bool = False):
+        self.calls += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        if failed:
+            self.errors += 1
+
+    def to_dict(self) -> dict:
+        return {
+            'calls': self.calls,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'total': self.total_time,
+            'avg': (self.total_time / self.calls) if self.calls else 0.0,
+            'max': self.max_time,
+        }
+
+
+class MessageListener:
+    __slots__ = ('name', 'handler', 'include_bots', 'guild_only', 'predicate', 'triggers', 'stats')
+
+    def __init__(self, name: str, handler: Callable, include_bots: bool, guild_only: bool,
+                 predicate: Optional[Callable], triggers: tuple):
+        self.name = name
+        self.handler = handler
+        self.include_bots = include_bots
+        self.guild_only = guild_only
+        self.predicate = predicate
+        self.triggers = triggers
+        self.stats = ListenerStats()
+
+
+class MessageDispatcher:
+    """Một điểm phát on_message cho các cog thay cho nhiều `Cog.listener()` riêng lẻ.
+
+    Cog đăng ký handler kèm bộ lọc rẻ (bỏ bot, chỉ guild, predicate hoặc danh
+    sách cụm từ kích hoạt). Mọi cụm từ của mọi listener được gộp vào một regex
+    duy nhất, compile lại chỉ khi đăng ký/hủy, nên mỗi tin nhắn chỉ lower() và
+    quét nội dung một lần. Handler async chạy thành task riêng để không chặn
+    process_commands; thời gian chạy của từng listener được ghi lại.
+    """
+
+    def __init__(self):
+        self._listeners: Dict[str, MessageListener] = {}
+        self._trigger_map: Dict[str, set] = {}  # cụm từ -> tên listener khớp khi gặp cụm này
+        self._trigger_pattern: Optional[re.Pattern] = None
+        self._tasks: set = set()
+
+        # Thống kê
+        self.messages = 0
+        self.scan_time = 0.0
+
+    def register(self, name: str, handler: Callable, *, include_bots: bool = False,
+                 guild_only: bool = False, predicate: Callable = None, triggers: Iterable[str] = ()):
+        """Đăng ký handler(message); có `triggers` thì chỉ gọi khi nội dung chứa một cụm từ"""
+        listener = MessageListener(
+            name, handler, include_bots, guild_only, predicate,
+            tuple(trigger.lower() for trigger in triggers)
+        )
+        self._listeners[name] = listener
+        self._rebuild_triggers()
+        return listener
+
+    def unregister(self, name: str):
+        if self._listeners.pop(name, None):
+            self._rebuild_triggers()
+
+    def _rebuild_triggers(self):
+        owners: Dict[str, List[str]] = {}
+        for listener in self._listeners.values():
+            for trigger in listener.triggers:
+                owners.setdefault(trigger, []).append(listener.name)
+        # Cụm khớp được còn kéo theo mọi cụm nằm bên trong nó ('hey bot' chứa 'hey'),
+        # nên regex chỉ cần lấy cụm dài nhất tại mỗi vị trí
+        self._trigger_map = {
+            phrase: {name for other, names in owners.items() if other in phrase for name in names}
+            for phrase in owners
+        }
+        if owners:
+            phrases = sorted(owners, key=len, reverse=True)
+            self._trigger_pattern = re.compile('|'.join(re.escape(phrase) for phrase in phrases))
+        else:
+            self._trigger_pattern = None
+
+    def _match_triggers(self, content: str) -> set:
+        """Tập listener có cụm từ xuất hiện trong content (một lần quét regex)"""
+        matched = set()
+        pattern = self._trigger_pattern
+        if pattern is None or not content:
+            return matched
+        lowered = content.lower()
+        pos = 0
+        while True:
+            found = pattern.search(lowered, pos)
+            if found is None:
+                break
+            matched |= self._trigger_map[found.group()]
+            pos = found.start() + 1
+        return matched
+
+    def dispatch(self, message):
+        """Gọi các listener phù hợp với tin nhắn (gọi từ Bot.on_message)"""
+        started = time.perf_counter()
+        self.messages += 1
+        is_bot = message.author.bot
+        triggered = None
+
+        for listener in list(self._listeners.values()):
+            if (is_bot and not listener.include_bots) or (listener.guild_only and message.guild is None):
+                continue
+            if listener.triggers:
+                if triggered is None:
+                    triggered = self._match_triggers(message.content)
+                if listener.name not in triggered:
+                    continue
+            if listener.predicate is not None and not listener.predicate(message):
+                listener.stats.skipped += 1
+                continue
+
+            call_started = time.perf_counter()
+            try:
+                result = listener.handler(message)
+            except Exception as e:
+                listener.stats.record(time.perf_counter() - call_started, True)
+                logger.error(f"Message listener {listener.name} error: {e}")
+                continue
+            if inspect.isawaitable(result):
+                task = asyncio.create_task(self._run(listener, result, call_started))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            else:
+                listener.stats.record(time.perf_counter() - call_started)
+
+        self.scan_time += time.perf_counter() - started
+
+    async def _run(self, listener: MessageListener, coro, started: float):
+        failed = False
+        try:
+            await coro
+        except Exception as e:
+            failed = True
+            logger.error(f"Message listener {listener.name} error: {e}")
+        finally:
+            listener.stats.record(time.perf_counter() - started, failed)
+
+    def get_stats(self) -> Dict[str, dict]:
+        """Thống kê theo listener, tốn thời gian nhất trước"""
+        ordered = sorted(self._listeners.values(), key=lambda listener: listener.stats.total_time, reverse=True)
+        return {listener.name: listener.stats.to_dict() for listener in ordered}
+
+
+# Điểm phát on_message dùng chung (Bot.on_message gọi dispatch cho mọi tin nhắn)
+message_dispatcher = MessageDispatcher()
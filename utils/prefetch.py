@@ -0,0 +1,134 @@
+import asyncio
+import itertools
+import time
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchJob:
+    """Một lần resolve nền cho một entry trong queue"""
+    __slots__ = ('entry', 'task', 'started_at', 'duration')
+
+    def __init__(self, entry, task):
+        self.entry = entry
+        self.task = task
+        self.started_at = time.perf_counter()
+        self.duration = None  # Thời gian resolve thực tế (giây)
+
+
+class QueuePrefetcher:
+    """Resolve trước N bài tiếp theo của queue mỗi guild để chuyển bài gần như không có khoảng lặng.
+
+    `resolve` là coroutine nhận (guild_id, entry) và trả về dữ liệu đã sẵn sàng phát
+    (media URL/info). Cog gọi `sync` mỗi khi queue đổi thứ tự/xóa/xáo trộn
+    hoặc sau khi bắt đầu phát một bài, và gọi `take` ở ranh giới bài hát.
+    """
+
+    def __init__(self, resolve: Callable[[int, Any], Awaitable[Any]], *, loop=None, depth: int = 2, name: str = 'music'):
+        self.resolve = resolve
+        self.loop = loop
+        self.depth = max(0, depth)
+        self.name = name
+        self._jobs: Dict[int, Dict[int, PrefetchJob]] = {}  # guild_id -> id(entry) -> job
+
+        # Thống kê
+        self.started = 0
+        self.ready_hits = 0    # Bài đã resolve xong trước khi cần
+        self.waited_hits = 0   # Bài đang resolve dở, chỉ phải chờ phần còn lại
+        self.misses = 0
+        self.cancelled = 0
+        self.saved_seconds = 0.0
+
+    def sync(self, guild_id: int, queue: Iterable):
+        """Đồng bộ danh sách prefetch với N bài đầu queue (an toàn khi gọi từ thread audio)"""
+        upcoming = list(itertools.islice(queue, self.depth))
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            if self.loop:
+                self.loop.call_soon_threadsafe(self._sync, guild_id, upcoming)
+            return
+        self._sync(guild_id, upcoming)
+
+    def _sync(self, guild_id: int, upcoming: list):
+        jobs = self._jobs.setdefault(guild_id, {})
+        wanted = {id(entry): entry for entry in upcoming if entry is not None}
+
+        # Hủy các job không còn nằm trong N bài tiếp theo
+        for key in list(jobs):
+            job = jobs[key]
+            if key not in wanted or wanted[key] is not job.entry:
+                self._drop(jobs.pop(key))
+
+        for key, entry in wanted.items():
+            if key not in jobs:
+                jobs[key] = self._start(guild_id, entry)
+
+    def _start(self, guild_id: int, entry) -> PrefetchJob:
+        task = asyncio.ensure_future(self.resolve(guild_id, entry))
+        job = PrefetchJob(entry, task)
+        self.started += 1
+
+        def _done(fut, job=job):
+            job.duration = time.perf_counter() - job.started_at
+            if not fut.cancelled() and fut.exception():
+                logger.debug(f"[{self.name}] prefetch failed: {fut.exception()}")
+
+        task.add_done_callback(_done)
+        return job
+
+    def _drop(self, job: PrefetchJob):
+        if not job.task.done():
+            job.task.cancel()
+            self.cancelled += 1
+
+    async def take(self, guild_id: int, entry) -> Optional[Any]:
+        """Lấy kết quả đã prefetch cho entry; None nếu phải tự resolve"""
+        jobs = self._jobs.get(guild_id, {})
+        job = jobs.pop(id(entry), None)
+        if job is None or job.entry is not entry:
+            self.misses += 1
+            return None
+
+        if job.task.done():
+            if job.task.cancelled() or job.task.exception():
+                self.misses += 1
+                return None
+            self.ready_hits += 1
+            self.saved_seconds += job.duration or 0.0
+            return job.task.result()
+
+        # Đang resolve dở: chờ nốt thay vì extract lần thứ hai
+        waited_from = time.perf_counter()
+        try:
+            result = await asyncio.shield(job.task)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.misses += 1
+            return None
+        waited = time.perf_counter() - waited_from
+        self.waited_hits += 1
+        self.saved_seconds += max(0.0, (job.duration or waited) - waited)
+        return result
+
+    def cancel(self, guild_id: int):
+        """Hủy toàn bộ prefetch của guild (stop/leave)"""
+        for job in self._jobs.pop(guild_id, {}).values():
+            self._drop(job)
+
+    def get_stats(self) -> dict:
+        hits = self.ready_hits + self.waited_hits
+        total = hits + self.misses
+        return {
+            'started': self.started,
+            'ready_hits': self.ready_hits,
+            'waited_hits': self.waited_hits,
+            'misses': self.misses,
+            'cancelled': self.cancelled,
+            'hit_rate': (hits / total * 100) if total else 0.0,
+            'saved_seconds': self.saved_seconds,
+            'avg_saved': (self.saved_seconds / hits) if hits else 0.0,
+        }
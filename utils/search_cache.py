@@ -0,0 +1,169 @@
+import asyncio
+import json
+import os
+import re
+import time
+import unicodedata
+import logging
+from collections import OrderedDict
+from typing import List, Optional
+
+import aiosqlite # type: ignore
+
+from utils.tracks import TrackRecord
+
+logger = logging.getLogger(__name__)
+
+# Chỉ giữ metadata gọn, không lưu formats/media URL (hết hạn sau vài giờ)
+COMPACT_FIELDS = TrackRecord.FIELDS
+
+
+def normalize_query(query: str) -> str:
+    """Chuẩn hóa query để "Sơn Tùng  MTP" và "sơn tùng mtp" dùng chung cache"""
+    query = unicodedata.normalize('NFC', query or '').lower().strip()
+    return re.sub(r'\s+', ' ', query)
+
+
+def compact_entry(data: dict) -> dict:
+    """Rút gọn info yt-dlp còn các trường cần để hiển thị và resolve lại"""
+    entry = {field: data.get(field) for field in COMPACT_FIELDS}
+    if not entry['webpage_url']:
+        entry['webpage_url'] = data.get('original_url') or data.get('url')
+    return entry
+
+
+class SearchCache:
+    """Cache kết quả ytsearch:/scsearch: - LRU trong RAM + SQLite trên đĩa, có TTL"""
+
+    def __init__(self, db_path: str = 'data/search_cache.db', ttl: int = 6 * 3600,
+                 max_memory: int = 1000, max_rows: int = 50000):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self.max_rows = max_rows
+        self._memory = OrderedDict()  # (source, query) -> (created_at, results)
+        self._db = None
+        self._db_lock = asyncio.Lock()
+        self._writes = 0
+
+        # Thống kê
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def configure(self, ttl: int = None, max_memory: int = None):
+        if ttl:
+            self.ttl = ttl
+        if max_memory:
+            self.max_memory = max_memory
+
+    async def _get_db(self):
+        if self._db is not None:
+            return self._db
+        async with self._db_lock:
+            if self._db is None:
+                os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+                db = await aiosqlite.connect(self.db_path)
+                await db.execute('PRAGMA journal_mode=WAL')
+                await db.execute('''
+                    CREATE TABLE IF NOT EXISTS search_cache (
+                        source TEXT NOT NULL,
+                        query TEXT NOT NULL,
+                        results TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        PRIMARY KEY (source, query)
+                    )
+                ''')
+                await db.execute('CREATE INDEX IF NOT EXISTS idx_search_cache_created ON search_cache (created_at)')
+                await db.commit()
+                self._db = db
+        return self._db
+
+    def _remember(self, key, created_at, results):
+        self._memory[key] = (created_at, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    async def get(self, source: str, query: str) -> Optional[List[dict]]:
+        """Lấy kết quả đã cache; None nếu chưa có hoặc đã hết hạn"""
+        key = (source, normalize_query(query))
+        now = time.time()
+
+        cached = self._memory.get(key)
+        if cached:
+            if now - cached[0] < self.ttl:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return cached[1]
+            del self._memory[key]
+
+        try:
+            db = await self._get_db()
+            async with db.execute(
+                'SELECT results, created_at FROM search_cache WHERE source = ? AND query = ?', key
+            ) as cursor:
+                row = await cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Search cache read error: {e}")
+            row = None
+
+        if row and now - row[1] < self.ttl:
+            results = json.loads(row[0])
+            self._remember(key, row[1], results)
+            self.disk_hits += 1
+            return results
+
+        self.misses += 1
+        return None
+
+    async def set(self, source: str, query: str, results: List[dict]):
+        """Lưu kết quả (đã rút gọn) vào RAM và SQLite"""
+        if not results:
+            return
+        key = (source, normalize_query(query))
+        created_at = time.time()
+        self._remember(key, created_at, results)
+
+        try:
+            db = await self._get_db()
+            await db.execute(
+                'INSERT OR REPLACE INTO search_cache (source, query, results, created_at) VALUES (?, ?, ?, ?)',
+                (key[0], key[1], json.dumps(results, ensure_ascii=False), created_at)
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                await self._prune(db)
+            await db.commit()
+        except Exception as e:
+            logger.error(f"Search cache write error: {e}")
+
+    async def _prune(self, db):
+        """Xóa bản ghi hết hạn và giữ bảng không vượt quá max_rows"""
+        await db.execute('DELETE FROM search_cache WHERE created_at < ?', (time.time() - self.ttl,))
+        await db.execute('''
+            DELETE FROM search_cache WHERE rowid IN (
+                SELECT rowid FROM search_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?
+            )
+        ''', (self.max_rows,))
+
+    def get_stats(self) -> dict:
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (hits / total * 100) if total else 0.0,
+            'memory_entries': len(self._memory),
+            'ttl': self.ttl,
+        }
+
+    async def close(self):
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+
+# Cache dùng chung cho mọi cog tìm kiếm bằng yt-dlp
+search_cache = SearchCache()
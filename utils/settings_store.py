@@ -0,0 +1,152 @@
+import asyncio
+import json
+import os
+import logging
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SettingsStore:
+    """Cài đặt theo server lưu trong một file JSON, đọc từ RAM và ghi nền an toàn.
+
+    Mỗi server là một document (dict) có khóa và kiểu theo `defaults`. `get`
+    trả về bản chỉ đọc từ cache; `update` tạo document mới (copy-on-write)
+    rồi hẹn ghi file sau `flush_delay` giây, nhiều lần sửa liên tiếp gộp thành
+    một lần ghi. File được ghi ra file tạm, fsync rồi rename nên crash giữa
+    chừng không làm hỏng dữ liệu cũ.
+    """
+
+    def __init__(self, path: str, defaults: Mapping[str, Any], flush_delay: float = 1.0):
+        self.path = path
+        self.defaults = dict(defaults)
+        self.flush_delay = flush_delay
+        self._docs: Optional[Dict[str, dict]] = None  # str(guild_id) -> document
+        self._views: Dict[str, Mapping[str, Any]] = {}  # cache bản đã gộp mặc định
+        self._flush_task: Optional[asyncio.Task] = None
+        self._dirty = False
+        self._write_lock = asyncio.Lock()
+
+        # Thống kê
+        self.writes = 0
+
+    # ===== ĐỌC =====
+
+    def _read_file(self) -> Dict[str, dict]:
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading settings {self.path}: {e}")
+        return {}
+
+    async def load(self):
+        """Đọc file một lần (ngoài event loop); gọi trong cog_load/setup_hook"""
+        if self._docs is None:
+            docs = await asyncio.to_thread(self._read_file)
+            if self._docs is None:
+                self._docs = docs
+
+    def _ensure_loaded(self) -> Dict[str, dict]:
+        # Dự phòng khi chưa gọi load(): đọc đồng bộ đúng một lần
+        if self._docs is None:
+            self._docs = self._read_file()
+        return self._docs
+
+    def get(self, guild_id: int) -> Mapping[str, Any]:
+        """Cài đặt của server (chỉ đọc, đã gộp giá trị mặc định)"""
+        key = str(guild_id)
+        view = self._views.get(key)
+        if view is None:
+            doc = self._ensure_loaded().get(key, {})
+            view = self._views[key] = MappingProxyType({**self.defaults, **doc})
+        return view
+
+    # ===== GHI =====
+
+    def _validate(self, changes: Dict[str, Any]):
+        for key, value in changes.items():
+            if key not in self.defaults:
+                raise KeyError(f"Unknown setting '{key}' for {self.path}")
+            default = self.defaults[key]
+            if default is not None and value is not None and not isinstance(value, type(default)):
+                raise TypeError(f"Setting '{key}' expects {type(default).__name__}, got {type(value).__name__}")
+
+    def update(self, guild_id: int, **changes) -> Mapping[str, Any]:
+        """Đổi một số khóa của server; trả về cài đặt mới"""
+        self._validate(changes)
+        docs = self._ensure_loaded()
+        key = str(guild_id)
+        docs[key] = {**docs.get(key, {}), **changes}
+        self._views.pop(key, None)
+        self._schedule_flush()
+        return self.get(guild_id)
+
+    def reset(self, guild_id: int, *keys: str):
+        """Đưa các khóa (hoặc cả server nếu không truyền khóa) về mặc định"""
+        docs = self._ensure_loaded()
+        key = str(guild_id)
+        if key not in docs:
+            return
+        if keys:
+            doc = {k: v for k, v in docs[key].items() if k not in keys}
+            if doc:
+                docs[key] = doc
+            else:
+                del docs[key]
+        else:
+            del docs[key]
+        self._views.pop(key, None)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+            except RuntimeError:
+                # Không có event loop (script/đồng bộ): ghi ngay
+                self._dirty = False
+                self._write_file(dict(self._docs))
+
+    async def _delayed_flush(self):
+        # Thay đổi trong lúc đang ghi không tạo task mới (task này chưa xong): ghi tiếp tới khi hết bẩn
+        while self._dirty:
+            await asyncio.sleep(self.flush_delay)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error saving settings {self.path}: {e}")
+                return
+
+    def _write_file(self, snapshot: Dict[str, dict]):
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.writes += 1
+
+    async def flush(self):
+        """Ghi ngay trạng thái hiện tại (document bất biến nên chỉ cần chép dict ngoài)"""
+        async with self._write_lock:
+            if self._docs is None or not self._dirty:
+                return
+            self._dirty = False
+            snapshot = dict(self._docs)
+            try:
+                await asyncio.to_thread(self._write_file, snapshot)
+            except Exception:
+                self._dirty = True
+                raise
+
+    async def close(self):
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
+        await self.flush()
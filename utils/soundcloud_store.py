@@ -0,0 +1,256 @@
+import asyncio
+import json
+import os
+import logging
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import aiosqlite # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Số lượt phát gần nhất giữ lại cho mỗi user
+RECENT_PLAYS = 100
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS sc_user_stats (
+        user_id INTEGER PRIMARY KEY,
+        total_plays INTEGER NOT NULL DEFAULT 0,
+        listening_time REAL NOT NULL DEFAULT 0
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS sc_artist_plays (
+        user_id INTEGER NOT NULL,
+        artist TEXT NOT NULL,
+        plays INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, artist)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS sc_recent_plays (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        title TEXT,
+        artist TEXT,
+        played_at TEXT
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_sc_recent_user ON sc_recent_plays (user_id, id)',
+    '''
+    CREATE TABLE IF NOT EXISTS sc_playlists (
+        user_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        created TEXT,
+        play_count INTEGER NOT NULL DEFAULT 0,
+        tracks TEXT NOT NULL DEFAULT '[]',
+        PRIMARY KEY (user_id, name)
+    )
+    ''',
+)
+
+SQL_UPSERT_USER = '''
+    INSERT INTO sc_user_stats (user_id, total_plays, listening_time) VALUES (?, ?, ?)
+    ON CONFLICT (user_id) DO UPDATE SET
+        total_plays = total_plays + excluded.total_plays,
+        listening_time = listening_time + excluded.listening_time
+'''
+SQL_UPSERT_ARTIST = '''
+    INSERT INTO sc_artist_plays (user_id, artist, plays) VALUES (?, ?, ?)
+    ON CONFLICT (user_id, artist) DO UPDATE SET plays = plays + excluded.plays
+'''
+SQL_INSERT_RECENT = 'INSERT INTO sc_recent_plays (user_id, title, artist, played_at) VALUES (?, ?, ?, ?)'
+SQL_TRIM_RECENT = '''
+    DELETE FROM sc_recent_plays WHERE user_id = ? AND id NOT IN (
+        SELECT id FROM sc_recent_plays WHERE user_id = ? ORDER BY id DESC LIMIT ?
+    )
+'''
+SQL_UPSERT_PLAYLIST = '''
+    INSERT OR REPLACE INTO sc_playlists (user_id, name, created, play_count, tracks) VALUES (?, ?, ?, ?, ?)
+'''
+
+
+class SoundCloudStore:
+    """Lưu thống kê nghe nhạc và playlist SoundCloud trên SQLite, ghi theo lô ở nền.
+
+    Các manager giữ dữ liệu trong RAM và chỉ báo thay đổi (`record_play`,
+    `playlist_changed`); cứ `flush_interval` giây các thay đổi được ghi trong
+    một transaction, nên mỗi lượt phát là O(1) dù lịch sử lớn tới đâu. Lần đầu
+    chạy sẽ nhập dữ liệu từ các file JSON cũ.
+    """
+
+    def __init__(self, db_path: str = 'data/soundcloud.db', flush_interval: float = 5.0,
+                 legacy_stats: str = 'data/soundcloud_stats.json',
+                 legacy_playlists: str = 'data/soundcloud_playlists.json'):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.legacy_stats = legacy_stats
+        self.legacy_playlists = legacy_playlists
+        self._plays: List[Tuple[int, str, str, float, str]] = []  # (user_id, title, artist, duration, played_at)
+        self._playlists: Dict[Tuple[int, str], Optional[dict]] = {}  # None = đã xóa
+        self._db: Optional[aiosqlite.Connection] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+        # Thống kê
+        self.flushes = 0
+
+    async def load(self) -> Tuple[dict, dict]:
+        """Mở DB, nhập JSON cũ nếu có; trả về (stats, playlists) để manager giữ trong RAM"""
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self._db = await aiosqlite.connect(self.db_path)
+        await self._db.execute('PRAGMA journal_mode=WAL')
+        await self._db.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            await self._db.execute(statement)
+        await self._db.commit()
+        await self._import_legacy()
+
+        stats = {}
+        async with self._db.execute('SELECT user_id, total_plays, listening_time FROM sc_user_stats') as cursor:
+            async for user_id, total_plays, listening_time in cursor:
+                stats[user_id] = new_user_stats(total_plays, listening_time)
+        async with self._db.execute('SELECT user_id, artist, plays FROM sc_artist_plays') as cursor:
+            async for user_id, artist, plays in cursor:
+                stats.setdefault(user_id, new_user_stats())['favorite_artists'][artist] = plays
+        async with self._db.execute(
+            'SELECT user_id, title, artist, played_at FROM sc_recent_plays ORDER BY id'
+        ) as cursor:
+            async for user_id, title, artist, played_at in cursor:
+                stats.setdefault(user_id, new_user_stats())['tracks_played'].append(
+                    {'title': title, 'artist': artist, 'played_at': played_at}
+                )
+
+        playlists = {}
+        async with self._db.execute('SELECT user_id, name, created, play_count, tracks FROM sc_playlists') as cursor:
+            async for user_id, name, created, play_count, tracks in cursor:
+                playlists.setdefault(user_id, {})[name] = {
+                    'tracks': json.loads(tracks),
+                    'created': created,
+                    'play_count': play_count
+                }
+
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        return stats, playlists
+
+    async def _import_legacy(self):
+        """Chuyển soundcloud_stats.json / soundcloud_playlists.json cũ vào DB (một lần)"""
+        for path, importer in ((self.legacy_stats, self._import_stats),
+                               (self.legacy_playlists, self._import_playlists)):
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    legacy = json.load(f)
+                await importer(legacy)
+                await self._db.commit()
+            except Exception as e:
+                await self._db.rollback()
+                logger.error(f"Error importing {path}: {e}")
+                continue
+            # Chỉ đổi tên file cũ sau khi dữ liệu đã nằm chắc trong DB
+            os.replace(path, path + '.migrated')
+            logger.info(f"Migrated {len(legacy)} users from {path}")
+
+    async def _import_stats(self, legacy: dict):
+        for user_id, data in legacy.items():
+            await self._db.execute(SQL_UPSERT_USER, (
+                int(user_id), data.get('total_plays', 0), data.get('listening_time', 0)
+            ))
+            await self._db.executemany(SQL_UPSERT_ARTIST, [
+                (int(user_id), artist, plays) for artist, plays in data.get('favorite_artists', {}).items()
+            ])
+            await self._db.executemany(SQL_INSERT_RECENT, [
+                (int(user_id), play.get('title'), play.get('artist'), play.get('played_at'))
+                for play in data.get('tracks_played', [])[-RECENT_PLAYS:]
+            ])
+
+    async def _import_playlists(self, legacy: dict):
+        for user_id, playlists in legacy.items():
+            await self._db.executemany(SQL_UPSERT_PLAYLIST, [
+                (int(user_id), name, data.get('created'), data.get('play_count', 0),
+                 json.dumps(data.get('tracks', []), ensure_ascii=False))
+                for name, data in playlists.items()
+            ])
+
+    # ===== GHI NHẬN THAY ĐỔI (trong RAM) =====
+
+    def record_play(self, user_id: int, title: str, artist: str, duration: float, played_at: str):
+        self._plays.append((user_id, title, artist, duration, played_at))
+
+    def playlist_changed(self, user_id: int, name: str, playlist: Optional[dict]):
+        """Đánh dấu playlist cần ghi lại (None = đã xóa)"""
+        self._playlists[(user_id, name)] = playlist
+
+    # ===== GHI NỀN =====
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"SoundCloud store flush error: {e}")
+
+    async def flush(self):
+        """Ghi các lượt phát và playlist đã đổi trong một transaction"""
+        async with self._flush_lock:
+            if self._db is None or (not self._plays and not self._playlists):
+                return
+            plays, self._plays = self._plays, []
+            changed, self._playlists = self._playlists, {}
+
+            users: Dict[int, list] = {}
+            artists: Dict[Tuple[int, str], int] = {}
+            for user_id, title, artist, duration, played_at in plays:
+                totals = users.setdefault(user_id, [0, 0.0])
+                totals[0] += 1
+                totals[1] += duration or 0
+                artists[(user_id, artist)] = artists.get((user_id, artist), 0) + 1
+
+            # Playlist được chụp lại (JSON) ngay lúc ghi để không lẫn sửa đổi đang diễn ra
+            upserts = [
+                (user_id, name, playlist.get('created'), playlist.get('play_count', 0),
+                 json.dumps(playlist.get('tracks', []), ensure_ascii=False))
+                for (user_id, name), playlist in changed.items() if playlist is not None
+            ]
+            deletes = [(user_id, name) for (user_id, name), playlist in changed.items() if playlist is None]
+
+            try:
+                await self._db.executemany(SQL_UPSERT_USER, [(user_id, n, t) for user_id, (n, t) in users.items()])
+                await self._db.executemany(SQL_UPSERT_ARTIST, [(*key, n) for key, n in artists.items()])
+                await self._db.executemany(SQL_INSERT_RECENT, [
+                    (user_id, title, artist, played_at) for user_id, title, artist, _, played_at in plays
+                ])
+                await self._db.executemany(SQL_TRIM_RECENT, [(user_id, user_id, RECENT_PLAYS) for user_id in users])
+                await self._db.executemany(SQL_UPSERT_PLAYLIST, upserts)
+                await self._db.executemany('DELETE FROM sc_playlists WHERE user_id = ? AND name = ?', deletes)
+                await self._db.commit()
+            except Exception:
+                await self._db.rollback()
+                # Giữ lại để lần flush sau ghi tiếp (thay đổi mới hơn của playlist được ưu tiên)
+                self._plays = plays + self._plays
+                changed.update(self._playlists)
+                self._playlists = changed
+                raise
+            self.flushes += 1
+
+    async def close(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self._db is not None:
+            await self.flush()
+            await self._db.close()
+            self._db = None
+
+
+def new_user_stats(total_plays: int = 0, listening_time: float = 0) -> dict:
+    """Thống kê trống của một user (cùng dạng dict cũ; tracks_played là deque giới hạn)"""
+    return {
+        'total_plays': total_plays,
+        'favorite_artists': {},
+        'listening_time': listening_time,
+        'tracks_played': deque(maxlen=RECENT_PLAYS)
+    }
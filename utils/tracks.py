@@ -0,0 +1,82 @@
+from typing import Any, Awaitable, Callable, Optional
+
+# Trường chi tiết chỉ tải khi cần (nowplaying...), không giữ sẵn trong queue
+RICH_FIELDS = ('view_count', 'like_count', 'description', 'upload_date', 'genre')
+
+
+class TrackRecord:
+    """Bản ghi bài hát gọn (vài trăm byte) thay cho info dict đầy đủ của yt-dlp.
+
+    Dùng chung cho queue của MusicCog, SoundCloudAdvanced và UniversalMusicPlayer.
+    Hỗ trợ `record['title']` và `record.get('duration', 0)` như dict cũ nên
+    các embed/playlist hiện có không cần đổi. Bất biến sau khi tạo; các trường
+    chi tiết (RICH_FIELDS) được tải lười qua `load_details`.
+    """
+    FIELDS = ('id', 'title', 'uploader', 'duration', 'webpage_url', 'thumbnail')
+    __slots__ = FIELDS + ('_details',)
+
+    def __init__(self, id: Optional[str] = None, title: Optional[str] = None, uploader: Optional[str] = None,
+                 duration: Optional[float] = None, webpage_url: Optional[str] = None, thumbnail: Optional[str] = None):
+        object.__setattr__(self, 'id', id)
+        object.__setattr__(self, 'title', title or webpage_url or 'Unknown')
+        object.__setattr__(self, 'uploader', uploader)
+        object.__setattr__(self, 'duration', duration)
+        object.__setattr__(self, 'webpage_url', webpage_url)
+        object.__setattr__(self, 'thumbnail', thumbnail)
+        object.__setattr__(self, '_details', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    @classmethod
+    def from_info(cls, info) -> Optional['TrackRecord']:
+        """Tạo từ info dict yt-dlp (đầy đủ hoặc flat) hoặc dict playlist đã lưu"""
+        if info is None or isinstance(info, cls):
+            return info
+        return cls(
+            id=info.get('id'),
+            title=info.get('title'),
+            uploader=info.get('uploader') or info.get('channel'),
+            duration=info.get('duration'),
+            webpage_url=info.get('webpage_url') or info.get('original_url') or info.get('url'),
+            thumbnail=info.get('thumbnail'),
+        )
+
+    def to_dict(self) -> dict:
+        """Dict gọn để lưu JSON (playlist); 'url' giữ lại cho dữ liệu cũ"""
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        data['url'] = self.webpage_url
+        return data
+
+    @property
+    def details_loaded(self) -> bool:
+        return self._details is not None
+
+    async def load_details(self, loader: Callable[[str], Awaitable[Optional[dict]]]) -> dict:
+        """Tải trường chi tiết một lần; loader nhận webpage_url và trả info yt-dlp"""
+        if self._details is None:
+            info = await loader(self.webpage_url) or {}
+            details = {field: info[field] for field in RICH_FIELDS if info.get(field) is not None}
+            object.__setattr__(self, '_details', details)
+        return self._details
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == 'url':
+            key = 'webpage_url'
+        if key in self.FIELDS:
+            value = getattr(self, key)
+        elif key in RICH_FIELDS and self._details:
+            value = self._details.get(key)
+        else:
+            return default
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'url':
+            key = 'webpage_url'
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __repr__(self):
+        return f"TrackRecord(title={self.title!r}, webpage_url={self.webpage_url!r})"